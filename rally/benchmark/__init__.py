@@ -21,6 +21,7 @@ from rally import utils as rutils
 rutils.import_modules_from_package("rally.benchmark.context")
 rutils.import_modules_from_package("rally.benchmark.runners")
 rutils.import_modules_from_package("rally.benchmark.scenarios")
+rutils.import_modules_from_package("rally.benchmark.sla")
 
 rutils.load_plugins("/etc/rally/plugins/scenarios/")
 rutils.load_plugins(os.path.expanduser("~/.rally/plugins/scenarios/"))
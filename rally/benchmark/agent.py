@@ -0,0 +1,130 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Load generator agent of the distributed scenario runner.
+
+The agent is started by the distributed runner on a load generator host
+(over SSH or locally) as:
+
+    python -m rally.benchmark.agent
+
+It reads the base64 encoded pickled job from stdin, runs the iterations
+of the job and writes the list of their results as JSON to the last line
+of stdout. The runner aborts the agent by creating the abort file of the
+job, then no more iterations are started and the running ones are
+cancelled after the grace period.
+"""
+
+import base64
+import cPickle as pickle
+import json
+import os
+import sys
+import threading
+import time
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import rps
+from rally.benchmark import workers
+from rally import consts
+
+
+# Interval of checking whether the abort file of the job exists
+ABORT_POLL_INTERVAL = 1.0
+
+
+def encode_job(job):
+    return base64.b64encode(pickle.dumps(job, pickle.HIGHEST_PROTOCOL))
+
+
+def decode_job(data):
+    return pickle.loads(base64.b64decode(data))
+
+
+def _watch_abort_file(path, grace_period, aborted, finished):
+    """Sets the aborted event as soon as the abort file is created.
+
+    The jobs of the worker pool still running after the grace period are
+    cancelled.
+    """
+    while not finished.wait(ABORT_POLL_INTERVAL):
+        if os.path.exists(path):
+            aborted.set()
+            if not finished.wait(grace_period):
+                workers.cancel_jobs()
+            return
+
+
+def run(job):
+    """Runs iterations of the job.
+
+    :param job: dict with the scenario class ("cls"), method name
+                ("method"), context, args, numbers of iterations to run
+                ("iterations"), "timeout", "start_at" (time on the clock of
+                this host to start at), either "concurrency" or "rps" and
+                optionally "abort_file" with "abort_grace_period"
+    :returns: list of iteration results
+    """
+    delay = job["start_at"] - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+    runner = None
+    if job.get("rps"):
+        runner = rps.RPSScenarioRunner(
+            None, [job["context"]["admin"]["endpoint"]],
+            {"type": consts.RunnerType.RPS, "rps": job["rps"],
+             "times": len(job["iterations"]), "timeout": job["timeout"]})
+    aborted = runner.aborted if runner else threading.Event()
+    finished = threading.Event()
+    if job.get("abort_file"):
+        watcher = threading.Thread(
+            target=_watch_abort_file,
+            args=(job["abort_file"], job.get("abort_grace_period", 0),
+                  aborted, finished))
+        watcher.daemon = True
+        watcher.start()
+    try:
+        if runner:
+            return list(runner._run_scenario(job["cls"], job["method"],
+                                             job["context"], job["args"]))
+        return _run_iterations(job, aborted)
+    finally:
+        finished.set()
+
+
+def _run_iterations(job, aborted):
+    iter_args = ((i, job["cls"], job["method"],
+                  base._get_scenario_context(job["context"]), job["args"])
+                 for i in job["iterations"] if not aborted.is_set())
+    pool = workers.get_pool(job["concurrency"])
+    results = []
+    for async_result in pool.imap_unordered(base._run_scenario_once,
+                                            iter_args,
+                                            concurrency=job["concurrency"],
+                                            timeout=job["timeout"]):
+        results.append(base._get_iteration_result(async_result, 0,
+                                                  job["timeout"]))
+    return results
+
+
+def main():
+    results = run(decode_job(sys.stdin.read()))
+    # Output of the scenarios may precede the results
+    sys.stdout.write("\n%s\n" % json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import contextlib
+import fcntl
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from rally.benchmark.context import base
+from rally.benchmark.scenarios.cinder import utils as cinder_utils
+from rally.benchmark.scenarios.glance import utils as glance_utils
+from rally.benchmark.scenarios.nova import utils as nova_utils
+from rally.benchmark import utils as bench_utils
+from rally import exceptions
+from rally.openstack.common.gettextutils import _
+from rally.openstack.common import log as logging
+from rally import osclients
+from rally import utils
+
+
+LOG = logging.getLogger(__name__)
+
+RESOURCE_NAME_PREFIX = "rally_pool_"
+
+# Interval of retries of checkout() while all the resources are in use
+CHECKOUT_POLL_INTERVAL = 0.1
+
+
+def _create_server(clients, config):
+    scenario = nova_utils.NovaScenario(clients=clients)
+    return scenario._boot_server(
+        scenario._generate_random_name(RESOURCE_NAME_PREFIX),
+        config["image_id"], config["flavor_id"],
+        **config.get("args", {})).id
+
+
+def _delete_server(clients, resource_id):
+    scenario = nova_utils.NovaScenario(clients=clients)
+    scenario._delete_server(clients.nova().servers.get(resource_id))
+
+
+def _get_server_status(clients, resource_id):
+    return clients.nova().servers.get(resource_id).status
+
+
+def _create_volume(clients, config):
+    scenario = cinder_utils.CinderScenario(clients=clients)
+    return scenario._create_volume(config["size"],
+                                   **config.get("args", {})).id
+
+
+def _delete_volume(clients, resource_id):
+    scenario = cinder_utils.CinderScenario(clients=clients)
+    scenario._delete_volume(clients.cinder().volumes.get(resource_id))
+
+
+def _get_volume_status(clients, resource_id):
+    return clients.cinder().volumes.get(resource_id).status
+
+
+def _create_image(clients, config):
+    scenario = glance_utils.GlanceScenario(clients=clients)
+    return scenario._create_image(
+        scenario._generate_random_name(RESOURCE_NAME_PREFIX),
+        config["container_format"], config["image_location"],
+        config["disk_format"], **config.get("args", {})).id
+
+
+def _delete_image(clients, resource_id):
+    scenario = glance_utils.GlanceScenario(clients=clients)
+    scenario._delete_image(clients.glance().images.get(resource_id))
+
+
+def _get_image_status(clients, resource_id):
+    return clients.glance().images.get(resource_id).status
+
+
+def _create_network(clients, config):
+    network = dict(config.get("args", {}))
+    network.setdefault("name", nova_utils.NovaScenario._generate_random_name(
+        RESOURCE_NAME_PREFIX))
+    return clients.neutron().create_network(
+        {"network": network})["network"]["id"]
+
+
+def _delete_network(clients, resource_id):
+    clients.neutron().delete_network(resource_id)
+
+
+def _get_network_status(clients, resource_id):
+    return clients.neutron().show_network(resource_id)["network"]["status"]
+
+
+# Functions creating, deleting the resources and getting their status by
+# kind, in order of deletion
+_KINDS = collections.OrderedDict([
+    ("servers", (_create_server, _delete_server, _get_server_status)),
+    ("volumes", (_create_volume, _delete_volume, _get_volume_status)),
+    ("images", (_create_image, _delete_image, _get_image_status)),
+    ("networks", (_create_network, _delete_network, _get_network_status))
+])
+
+# Statuses of the resources that can't be used anymore
+_FAILED_STATUSES = ("ERROR", "KILLED")
+
+
+def _resource_schema(properties, required):
+    properties = dict(properties, amount={"type": "integer", "minimum": 1},
+                      args={"type": "object"})
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": ["amount"] + required,
+        "additionalProperties": False
+    }
+
+
+class ResourcePool(base.Context):
+    """Creates a pool of reusable resources of every tenant before the run.
+
+    Iterations that measure operations on existing resources (e.g. reboot
+    of a server) take them from the pool instead of creating them, see
+    checkout(). All the resources are created at the same time and deleted
+    when the benchmark is finished.
+    """
+
+    __ctx_name__ = "resource_pool"
+    __ctx_order__ = 350
+    __ctx_hidden__ = False
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": utils.JSON_SCHEMA,
+        "properties": {
+            "servers": _resource_schema(
+                {"image_id": {"type": "string"},
+                 "flavor_id": {"type": ["string", "integer"]}},
+                ["image_id", "flavor_id"]),
+            "volumes": _resource_schema(
+                {"size": {"type": "integer", "minimum": 1}}, ["size"]),
+            "images": _resource_schema(
+                {"image_location": {"type": "string"},
+                 "container_format": {"type": "string"},
+                 "disk_format": {"type": "string"}},
+                ["image_location", "container_format", "disk_format"]),
+            "networks": _resource_schema({}, []),
+            "concurrent": {
+                "type": "integer",
+                "minimum": 1
+            }
+        },
+        "additionalProperties": False
+    }
+
+    def __init__(self, context):
+        super(ResourcePool, self).__init__(context)
+        self.config.setdefault("concurrent", 10)
+
+    @classmethod
+    def _create_resource(cls, args):
+        """Creates a resource, returns its id or None on failure."""
+        endpoint, kind, config = args
+        create = _KINDS[kind][0]
+        try:
+            return create(osclients.Clients(endpoint), config)
+        except Exception as e:
+            LOG.warning(_("Failed to create %(kind)s of the resource pool: "
+                          "%(error)s") % {"kind": kind, "error": e})
+            return None
+
+    @classmethod
+    def _delete_resource(cls, args):
+        endpoint, kind, resource_id = args
+        delete = _KINDS[kind][1]
+        try:
+            delete(osclients.Clients(endpoint), resource_id)
+        except Exception as e:
+            LOG.warning(_("Failed to delete %(kind)s %(id)s of the resource "
+                          "pool: %(error)s") % {"kind": kind,
+                                                "id": resource_id,
+                                                "error": e})
+
+    def _get_endpoints(self):
+        """Returns endpoint of a user of every tenant, by tenant id."""
+        endpoints = {}
+        for user in self.context["users"]:
+            endpoints.setdefault(user["tenant_id"], user["endpoint"])
+        return endpoints
+
+    @utils.log_task_wrapper(LOG.info, _("Enter context: `resource_pool`"))
+    def setup(self):
+        pool = self.context["resource_pool"] = {
+            "lock_dir": tempfile.mkdtemp(prefix="rally-resource-pool-"),
+            "resources": {}
+        }
+        endpoints = self._get_endpoints()
+        keys = []
+        args = []
+        for tenant in self.context["tenants"]:
+            for kind in _KINDS:
+                if kind not in self.config:
+                    continue
+                amount = self.config[kind]["amount"]
+                keys.extend([(tenant["id"], kind)] * amount)
+                args.extend([(endpoints[tenant["id"]], kind,
+                              self.config[kind])] * amount)
+
+        results = bench_utils.run_concurrent(self.config["concurrent"],
+                                             ResourcePool,
+                                             "_create_resource", args)
+        failed = 0
+        for (tenant_id, kind), resource_id in zip(keys, results):
+            if resource_id is None:
+                failed += 1
+                continue
+            pool["resources"].setdefault(tenant_id, {}).setdefault(
+                kind, []).append(resource_id)
+        if failed:
+            raise exceptions.BenchmarkSetupFailure(
+                message="%d resources of the resource pool were not "
+                        "created" % failed)
+
+    @utils.log_task_wrapper(LOG.info, _("Exit context: `resource_pool`"))
+    def cleanup(self):
+        pool = self.context.get("resource_pool")
+        if pool is None:
+            return
+        endpoints = self._get_endpoints()
+        for kind in _KINDS:
+            args = [(endpoints[tenant_id], kind, resource_id)
+                    for tenant_id, resources in pool["resources"].items()
+                    for resource_id in resources.get(kind, [])]
+            if args:
+                list(bench_utils.run_concurrent(self.config["concurrent"],
+                                                ResourcePool,
+                                                "_delete_resource", args))
+        shutil.rmtree(pool["lock_dir"], ignore_errors=True)
+
+
+def _is_failed(context, kind, resource_id):
+    """Checks if the resource failed or was deleted by the iteration."""
+    clients = osclients.cached_clients(context["user"]["endpoint"])
+    try:
+        status = _KINDS[kind][2](clients, resource_id)
+    except Exception as e:
+        if 404 in (getattr(e, "code", None),
+                   getattr(e, "status_code", None)):
+            return True
+        LOG.warning(_("Failed to get status of %(kind)s %(id)s of the "
+                      "resource pool: %(error)s") % {"kind": kind,
+                                                     "id": resource_id,
+                                                     "error": e})
+        return False
+    return status.upper() in _FAILED_STATUSES
+
+
+@contextlib.contextmanager
+def checkout(context, kind, timeout=600):
+    """Checks out a resource of the tenant of the scenario user.
+
+    The resource is checked in on exit, meanwhile it isn't given to any
+    other iteration. A resource of an iteration killed by timeout is
+    checked in as well, because resources are locked with flock(). The
+    locks are local to the host, so the pool can't be used by iterations
+    run on other hosts, e.g. by the distributed runner.
+
+    The status of the resource is checked on check-in. A resource left in
+    ERROR status or deleted is marked as failed in its lock file and isn't
+    checked out anymore.
+
+        with resource_pool.checkout(self.context(), "servers") as server_id:
+            server = self.clients("nova").servers.get(server_id)
+
+    :param context: context of the scenario
+    :param kind: kind of the resources: "servers", "volumes", "images"
+                 or "networks"
+    :param timeout: seconds to wait for a resource while all of them are
+                    checked out
+    :returns: id of the resource
+    :raises ResourcePoolExhausted: if there are no resources of the kind,
+                                   all of them failed or are checked out
+                                   for timeout seconds
+    """
+    pool = context["resource_pool"]
+    tenant_id = context["user"]["tenant_id"]
+    ids = pool["resources"].get(tenant_id, {}).get(kind, [])
+    if not ids:
+        raise exceptions.ResourcePoolExhausted(kind=kind, tenant=tenant_id)
+
+    # Resources are tried from a random one, so they are used evenly
+    offset = random.randrange(len(ids))
+    ids = ids[offset:] + ids[:offset]
+    deadline = time.time() + timeout
+    failed = set()
+    while True:
+        for resource_id in ids:
+            if resource_id in failed:
+                continue
+            fd = os.open(os.path.join(pool["lock_dir"],
+                                      "%s-%s" % (kind, resource_id)),
+                         os.O_RDWR | os.O_CREAT)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except IOError:
+                os.close(fd)
+                continue
+            try:
+                if os.fstat(fd).st_size:
+                    # Marked as failed on check-in by another iteration
+                    failed.add(resource_id)
+                    continue
+                try:
+                    yield resource_id
+                finally:
+                    if _is_failed(context, kind, resource_id):
+                        LOG.warning(_("%(kind)s %(id)s of the resource pool "
+                                      "failed, it isn't used anymore")
+                                    % {"kind": kind, "id": resource_id})
+                        os.write(fd, b"failed")
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            return
+        if len(failed) == len(ids):
+            raise exceptions.ResourcePoolExhausted(kind=kind,
+                                                   tenant=tenant_id)
+        if time.time() > deadline:
+            raise exceptions.ResourcePoolExhausted(kind=kind,
+                                                   tenant=tenant_id)
+        time.sleep(CHECKOUT_POLL_INTERVAL)
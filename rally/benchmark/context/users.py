@@ -16,6 +16,7 @@
 from oslo.config import cfg
 from rally.benchmark.context import base
 from rally.benchmark import utils
+from rally.benchmark import workers
 from rally import consts
 from rally.objects import endpoint
 from rally.openstack.common.gettextutils import _
@@ -176,6 +177,12 @@ class UserGenerator(base.Context):
 
         concurrent = self.config["concurrent"]
 
+        # Clients of the deleted users are dropped from the caches of this
+        # process and of the worker processes
+        endpoints = [user["endpoint"] for user in self.context["users"]]
+        osclients.forget_clients(endpoints)
+        workers.call_all(osclients.forget_clients, (endpoints,))
+
         # Delete users
         users_chunks = utils.chunks(self.context["users"], concurrent)
         utils.run_concurrent(
@@ -191,3 +198,10 @@ class UserGenerator(base.Context):
             UserGenerator,
             "_delete_tenants",
             [(self.endpoint, tenants) for tenants in tenants_chunks])
+
+        # Tokens of the deleted users are useless
+        try:
+            osclients.forget_tokens(endpoints)
+        except Exception as e:
+            LOG.warning("Failed to remove tokens of the deleted users from "
+                        "the token store: %s" % e)
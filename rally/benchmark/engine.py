@@ -13,15 +13,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import json
 import jsonschema
+import signal
 import six
+import sys
+import threading
 import traceback
 
 from rally.benchmark.context import base as base_ctx
 from rally.benchmark.context import users as users_ctx
+from rally.benchmark import poller
 from rally.benchmark.runners import base as base_runner
 from rally.benchmark.scenarios import base as base_scenario
+from rally.benchmark.sla import base as base_sla
+from rally.benchmark import workers
 from rally import consts
 from rally import exceptions
 from rally.objects import endpoint
@@ -33,6 +40,9 @@ from rally import utils as rutils
 
 LOG = logging.getLogger(__name__)
 
+# Interval of checking whether the task is being aborted.
+ABORT_POLL_INTERVAL = 1.0
+
 
 CONFIG_SCHEMA = {
     "type": "object",
@@ -55,6 +65,12 @@ CONFIG_SCHEMA = {
                     },
                     "context": {
                         "type": "object"
+                    },
+                    "sla": {
+                        "type": "object"
+                    },
+                    "group": {
+                        "type": "string"
                     }
                 },
                 "additionalProperties": False
@@ -86,12 +102,22 @@ class BenchmarkEngine(object):
         """
         self.config = config
         self.task = task
+        self._interrupted = False
+        self._results_lock = threading.Lock()
+        self.admin_endpoint = None
 
     @rutils.log_task_wrapper(LOG.info,
                              _("Task validation of scenarios names."))
     def _validate_config_scenarios_name(self, config):
         available = set(base_scenario.Scenario.list_benchmark_scenarios())
         specified = set(config.iterkeys())
+        for values in config.itervalues():
+            for kw in values:
+                # Scenarios without a name are reported by the validation
+                # of the mixed runner config
+                specified.update(s["name"]
+                                 for s in self._mixed_scenarios(kw)
+                                 if isinstance(s, dict) and "name" in s)
 
         if not specified.issubset(available):
             names = ", ".join(specified - available)
@@ -105,6 +131,7 @@ class BenchmarkEngine(object):
                     base_runner.ScenarioRunner.validate(kw.get("runner", {}))
                     base_ctx.ContextManager.validate(kw.get("context", {}),
                                                      non_hidden=True)
+                    base_sla.SLA.validate(kw.get("sla", {}))
                 except (exceptions.RallyException,
                         jsonschema.ValidationError) as e:
                     raise exceptions.InvalidBenchmarkConfig(
@@ -114,11 +141,14 @@ class BenchmarkEngine(object):
                     )
 
     def _validate_config_sematic_helper(self, admin, user, name, pos,
-                                        task, kwargs):
+                                        task, kwargs, context=None):
         args = {} if not kwargs else kwargs.get("args", {})
+        if context is None:
+            context = {} if not kwargs else kwargs.get("context", {})
         try:
             base_scenario.Scenario.validate(name, args, admin=admin,
-                                            users=[user], task=task)
+                                            users=[user], task=task,
+                                            context=context)
         except exceptions.InvalidScenarioArgument as e:
             kw = {"name": name, "pos": pos,
                   "args": args, "reason": six.text_type(e)}
@@ -142,11 +172,20 @@ class BenchmarkEngine(object):
                     self._validate_config_sematic_helper(admin, user, name,
                                                          pos, self.task,
                                                          kwargs)
+                    # Scenarios of a mixed workload share its context
+                    for scenario in self._mixed_scenarios(kwargs):
+                        self._validate_config_sematic_helper(
+                            admin, user, scenario["name"], pos, self.task,
+                            scenario, context=kwargs.get("context", {}))
 
     @rutils.log_task_wrapper(LOG.info, _("Task validation."))
     def validate(self):
         """Perform full task configuration validation."""
-        self.task.update_status(consts.TaskStatus.VERIFYING)
+        if not self._update_status(consts.TaskStatus.VERIFYING,
+                                   [consts.TaskStatus.INIT,
+                                    consts.TaskStatus.VERIFYING]):
+            # The task is being aborted, run() marks it as aborted
+            return
         try:
             jsonschema.validate(self.config, CONFIG_SCHEMA)
             self._validate_config_scenarios_name(self.config)
@@ -157,6 +196,11 @@ class BenchmarkEngine(object):
             self.task.set_failed(log=log)
             raise exceptions.InvalidTaskException(message=str(e))
 
+    @staticmethod
+    def _mixed_scenarios(kw):
+        """Returns the other scenarios run by the benchmark (see "mixed")."""
+        return (kw or {}).get("runner", {}).get("scenarios", [])
+
     def _get_runner(self, config):
         runner = config.get("runner", {})
         runner.setdefault("type", consts.RunnerType.SERIAL)
@@ -168,21 +212,183 @@ class BenchmarkEngine(object):
         """Runs the benchmarks according to the test configuration
         the benchmark engine was initialized with.
 
-        :returns: List of dicts, each dict containing the results of all the
-                  corresponding benchmark test launches
+        Results of iterations are stored in the task results in chunks
+        while the benchmark is running, so they are never kept in memory
+        all at once.
+
+        Benchmarks are run one by one, except the ones with the same
+        "group", which are run at the same time (see _get_stages()). The
+        iterations of all of them are run by the task-wide pool of worker
+        processes, the total number of them may be limited by the
+        `max_concurrency` option.
+
+        The task is aborted gracefully if its status is set to "aborting"
+        (see rally.orchestrator.api.abort_task) or on Ctrl-C: the running
+        benchmarks stop starting new iterations, their results and the
+        cleanup of their contexts are kept, the other benchmarks are
+        skipped.
         """
-        self.task.update_status(consts.TaskStatus.RUNNING)
-        results = {}
+        if self._interrupted or not self._update_status(
+                consts.TaskStatus.RUNNING,
+                [consts.TaskStatus.INIT, consts.TaskStatus.VERIFYING]):
+            self.task.update_status(consts.TaskStatus.ABORTED)
+            return
+        previous_handler = self._handle_interrupt()
+        # The worker processes forked by the validation get the address of
+        # the poller of resource statuses from poller.start(), the ones
+        # forked later inherit it.
+        if self.admin_endpoint:
+            poller.start(self.admin_endpoint)
+        # All the runners and contexts of the task share the same pool of
+        # worker processes, which is forked once all the plugins are loaded.
+        workers.get_pool()
+        aborted = False
+        try:
+            for stage in self._get_stages():
+                if self._is_aborting():
+                    aborted = True
+                    break
+                self._run_stage(stage)
+            else:
+                aborted = self._is_aborting()
+        finally:
+            if previous_handler is not None:
+                signal.signal(signal.SIGINT, previous_handler)
+            workers.shutdown_pool()
+            poller.stop()
+        if aborted or not self._update_status(consts.TaskStatus.FINISHED,
+                                              [consts.TaskStatus.RUNNING]):
+            self.task.update_status(consts.TaskStatus.ABORTED)
+
+    def _get_stages(self):
+        """Splits the benchmarks into stages run one after another.
+
+        Benchmarks with the same "group" make a single stage, which is run
+        at the position of the first of them. Every other benchmark is a
+        stage of its own.
+
+        :returns: list of stages, each is a list of (name, pos, kw) tuples
+        """
+        stages = []
+        groups = {}
         for name in self.config:
-            for n, kw in enumerate(self.config[name]):
-                key = {'name': name, 'pos': n, 'kw': kw}
-                runner = self._get_runner(kw)
-                result = runner.run(name, kw.get("context", {}),
-                                    kw.get("args", {}))
-                self.task.append_results(key, {"raw": result})
-                results[json.dumps(key)] = result
-        self.task.update_status(consts.TaskStatus.FINISHED)
-        return results
+            for pos, kw in enumerate(self.config[name]):
+                group = kw.get("group")
+                if group is None:
+                    stages.append([(name, pos, kw)])
+                elif group in groups:
+                    groups[group].append((name, pos, kw))
+                else:
+                    groups[group] = [(name, pos, kw)]
+                    stages.append(groups[group])
+        return stages
+
+    def _run_stage(self, stage):
+        """Runs the benchmarks of the stage, each in its own thread.
+
+        The first error of the benchmarks is raised once all of them are
+        finished.
+        """
+        if len(stage) == 1:
+            self._run_benchmark(*stage[0])
+            return
+
+        errors = []
+
+        def _run(name, pos, kw):
+            try:
+                self._run_benchmark(name, pos, kw)
+            except Exception as e:
+                LOG.exception(e)
+                errors.append(sys.exc_info())
+
+        threads = [threading.Thread(target=_run, args=benchmark)
+                   for benchmark in stage]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            # join() with timeout, so Ctrl-C is handled while the
+            # benchmarks are running
+            while thread.is_alive():
+                thread.join(ABORT_POLL_INTERVAL)
+        if errors:
+            six.reraise(*errors[0])
+
+    def _run_benchmark(self, name, pos, kw):
+        key = {'name': name, 'pos': pos, 'kw': kw}
+        runner = self._get_runner(kw)
+        runner.result_collector = base_runner.ResultCollector(
+            functools.partial(self._store_results, key))
+        runner.sla_checker = base_sla.SLAChecker(kw.get("sla", {}))
+        finished = threading.Event()
+        watcher = threading.Thread(target=self._watch_abort,
+                                   args=(runner, finished))
+        watcher.daemon = True
+        watcher.start()
+        try:
+            result = runner.run(name, kw.get("context", {}),
+                                kw.get("args", {}))
+        finally:
+            finished.set()
+            watcher.join()
+            workers.release_pool()
+        self._store_results(key, result, getattr(result, "info", None),
+                            runner.sla_checker.results())
+
+    def _update_status(self, status, allowed_statuses):
+        """Updates the status of the task unless it's being aborted.
+
+        The status is checked and updated atomically, so an abort requested
+        meanwhile (see rally.orchestrator.api.abort_task) isn't overwritten.
+
+        :returns: False if the task is being aborted
+        """
+        try:
+            self.task.update_status(status, allowed_statuses=allowed_statuses)
+        except exceptions.TaskInvalidStatus:
+            if self.task.get_status() != consts.TaskStatus.ABORTING:
+                raise
+            return False
+        return True
+
+    def _is_aborting(self):
+        return (self._interrupted or
+                self.task.get_status() == consts.TaskStatus.ABORTING)
+
+    def _watch_abort(self, runner, finished):
+        """Aborts the runner as soon as the task is being aborted."""
+        while not finished.is_set():
+            if self._is_aborting():
+                runner.abort()
+                return
+            finished.wait(ABORT_POLL_INTERVAL)
+
+    def _handle_interrupt(self):
+        """Makes the first Ctrl-C abort the task gracefully.
+
+        :returns: the previous SIGINT handler or None if the handler can't
+                  be set (e.g. not in the main thread)
+        """
+        def handler(signum, frame):
+            LOG.warning(_("Aborting the task, press Ctrl-C again to "
+                          "interrupt it immediately."))
+            signal.signal(signal.SIGINT, previous_handler)
+            self._interrupted = True
+
+        try:
+            previous_handler = signal.signal(signal.SIGINT, handler)
+        except ValueError:
+            return None
+        return previous_handler
+
+    def _store_results(self, key, results, info=None, sla=None):
+        data = {"raw": results}
+        if info:
+            data["info"] = info
+        if sla:
+            data["sla"] = sla
+        with self._results_lock:
+            self.task.append_results(key, data)
 
     @rutils.log_task_wrapper(LOG.info, _("Check cloud."))
     def bind(self, endpoints):
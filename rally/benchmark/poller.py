@@ -0,0 +1,291 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Task-wide poller of resource statuses.
+
+Without the poller every iteration waiting for a resource sends a GET
+request per check interval, so 200 concurrent boots make 200 GET requests
+per second just for polling and distort the API being benchmarked. The
+poller runs in the main process of the task and resolves all the waiters
+of a tenant with a single list request per check interval. Iterations run
+in the worker processes talk to it through a local socket, see wait().
+"""
+
+from multiprocessing import connection
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from novaclient.v1_1 import servers
+from oslo.config import cfg
+
+from rally.benchmark import workers
+from rally import exceptions
+from rally.openstack.common import log as logging
+from rally import osclients
+
+
+LOG = logging.getLogger(__name__)
+
+poller_opts = [
+    cfg.BoolOpt("batch_status_polling",
+                default=True,
+                help="Poll statuses of the resources waited for by the "
+                     "iterations with a single list request per tenant and "
+                     "check interval, instead of a GET request per resource")
+]
+
+CONF = cfg.CONF
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(poller_opts, group=benchmark_group)
+
+# Interval of checking whether the waiting iteration has given up
+SERVE_POLL_INTERVAL = 1.0
+
+# Address of the poller of the task. Worker processes forked later inherit
+# it, the running ones get it from start().
+_ADDRESS = None
+_POLLER = None
+
+
+def _list_servers(clients, tenant_id):
+    return clients.nova().servers.list(
+        search_opts={"all_tenants": 1, "tenant_id": tenant_id})
+
+
+# Functions listing the resources of a tenant by resource kind
+_LISTERS = {
+    "servers": _list_servers
+}
+
+
+def _get_key(resource):
+    """Returns (kind, tenant_id) of the resource or None if not supported."""
+    if not isinstance(resource.manager, servers.ServerManager):
+        return None
+    tenant_id = (getattr(resource, "tenant_id", None) or
+                 getattr(resource.manager.api.client, "tenant_id", None))
+    if tenant_id is None:
+        return None
+    return "servers", tenant_id
+
+
+class _Waiter(object):
+
+    def __init__(self, resource_id, statuses, interval):
+        self.resource_id = resource_id
+        self.statuses = statuses
+        self.interval = interval
+        self.status = None
+        self.event = threading.Event()
+
+    def wake(self, status):
+        self.status = status
+        self.event.set()
+
+
+class StatusPoller(object):
+    """Polls statuses of the resources waited for by all the iterations.
+
+    Waiters are grouped by kind of resource and tenant. Each group is
+    polled by a single list request with the smallest check interval of its
+    waiters, a waiter is woken up as soon as its resource is in one of the
+    statuses it waits for. Resources missing in the list are "DELETED".
+    """
+
+    def __init__(self, endpoint):
+        self._clients = osclients.Clients(endpoint)
+        self._lock = threading.Lock()
+        self._groups = {}
+        self._next_poll = {}
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._tempdir = tempfile.mkdtemp(prefix="rally-poller-")
+        self._listener = connection.Listener(os.path.join(self._tempdir,
+                                                          "socket"))
+        self.address = self._listener.address
+        for target in (self._accept, self._poll):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        """Stops the poller, the iterations waiting for it give up."""
+        self._stopped = True
+        with self._lock:
+            waiters = [w for group in self._groups.values() for w in group]
+        for waiter in waiters:
+            waiter.wake(None)
+        self._wakeup.set()
+        try:
+            # Wakes up the thread blocked in accept()
+            connection.Client(self.address).close()
+        except Exception:
+            pass
+        self._listener.close()
+        shutil.rmtree(self._tempdir, ignore_errors=True)
+
+    def _accept(self):
+        while not self._stopped:
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                continue
+            thread = threading.Thread(target=self._serve, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, conn):
+        """Waits for the resource requested by an iteration."""
+        try:
+            kind, tenant_id, resource_id, statuses, interval = conn.recv()
+        except (EOFError, IOError, ValueError):
+            conn.close()
+            return
+        key = (kind, tenant_id)
+        waiter = _Waiter(resource_id, statuses, interval)
+        with self._lock:
+            if key not in self._groups:
+                self._groups[key] = set()
+                self._next_poll[key] = time.time()
+            else:
+                self._next_poll[key] = min(self._next_poll[key],
+                                           time.time() + interval)
+            self._groups[key].add(waiter)
+        self._wakeup.set()
+        try:
+            while not (waiter.event.wait(SERVE_POLL_INTERVAL) or
+                       self._stopped):
+                # The iteration closes the connection on timeout
+                if conn.poll():
+                    break
+            if waiter.event.is_set():
+                conn.send(waiter.status)
+        except (EOFError, IOError):
+            pass
+        finally:
+            conn.close()
+            with self._lock:
+                group = self._groups.get(key)
+                if group is not None:
+                    group.discard(waiter)
+                    if not group:
+                        del self._groups[key]
+                        del self._next_poll[key]
+
+    def _poll(self):
+        while not self._stopped:
+            self._wakeup.clear()
+            now = time.time()
+            with self._lock:
+                due = [key for key, next_poll in self._next_poll.items()
+                       if next_poll <= now]
+                for key in due:
+                    self._next_poll[key] = now + min(
+                        w.interval for w in self._groups[key])
+            for key in due:
+                self._poll_group(key)
+            with self._lock:
+                wait = min(self._next_poll.values() or [now + 60])
+            self._wakeup.wait(max(wait - time.time(), 0))
+
+    def _poll_group(self, key):
+        kind, tenant_id = key
+        with self._lock:
+            waiters = list(self._groups.get(key, []))
+        if not waiters:
+            return
+        try:
+            resources = _LISTERS[kind](self._clients, tenant_id)
+        except Exception as e:
+            # The iterations fall back to polling the resources one by one
+            LOG.warning("Failed to list %(kind)s of tenant %(tenant)s: "
+                        "%(error)s" % {"kind": kind, "tenant": tenant_id,
+                                       "error": e})
+            for waiter in waiters:
+                waiter.wake(None)
+            return
+        statuses = dict((r.id, r.status.upper()) for r in resources)
+        for waiter in waiters:
+            status = statuses.get(waiter.resource_id, "DELETED")
+            if status in waiter.statuses:
+                waiter.wake(status)
+
+
+def _set_address(address):
+    global _ADDRESS
+    _ADDRESS = address
+
+
+def start(endpoint):
+    """Starts the poller of the task in the current process.
+
+    The worker processes of the task that are already running (e.g. forked
+    by the contexts set up during the validation) get its address too.
+
+    :param endpoint: admin endpoint used to list resources of all tenants
+    """
+    global _POLLER
+    if not CONF.benchmark.batch_status_polling or _POLLER is not None:
+        return
+    _POLLER = StatusPoller(endpoint)
+    _set_address(_POLLER.address)
+    workers.call_all(_set_address, (_POLLER.address,))
+
+
+def stop():
+    """Stops the poller of the task."""
+    global _POLLER
+    if _POLLER is not None:
+        _POLLER.stop()
+        workers.call_all(_set_address, (None,))
+    _POLLER = None
+    _set_address(None)
+
+
+def wait(resource, statuses, timeout, check_interval):
+    """Waits until the poller of the task sees resource in one of statuses.
+
+    The resource isn't updated, the caller is expected to get it once the
+    waiting is over.
+
+    :returns: True if the resource got one of statuses, False if it can't
+              be waited for by the poller, e.g. the poller isn't running
+              or doesn't support such resources
+    :raises TimeoutException: if the resource hasn't got one of statuses
+                              in timeout seconds
+    """
+    if _ADDRESS is None:
+        return False
+    key = _get_key(resource)
+    if key is None:
+        return False
+    try:
+        conn = connection.Client(_ADDRESS)
+    except Exception as e:
+        LOG.debug("Poller isn't available: %s" % e)
+        return False
+    try:
+        conn.send(key + (resource.id, [s.upper() for s in statuses],
+                         check_interval))
+        if not conn.poll(timeout):
+            raise exceptions.TimeoutException()
+        return conn.recv() is not None
+    except (EOFError, IOError):
+        return False
+    finally:
+        conn.close()
@@ -25,14 +25,15 @@ from rally.benchmark.processing import utils
 
 def _process_main_duration(result):
 
-    pie = filter(lambda t: not t["error"], result["result"])
+    raw = utils.measured_results(result["result"])
+    pie = filter(lambda t: not t["error"], raw)
     num_successful_iterations = len(pie)
     stacked_area = map(
         lambda t: {"idle_duration": 0, "duration": 0} if t["error"] else t,
-        result["result"])
+        raw)
     histogram_data = filter(None, map(
         lambda t: t["duration"] if not t["error"] else None,
-        result["result"]))
+        raw))
 
     histograms = []
     if num_successful_iterations > 0:
@@ -46,7 +47,7 @@ def _process_main_duration(result):
         "pie": [
             {"key": "success", "value": len(pie)},
             {"key": "errors",
-             "value": len(result["result"]) - len(pie)}
+             "value": len(raw) - len(pie)}
         ],
         "iter": [
             {
@@ -77,49 +78,40 @@ def _process_atomic(result):
         lst = lst if not key else map(lambda x: x[key], lst)
         return utils.mean(lst)
 
-    # NOTE(boris-42): In our result["result"] we have next structure:
-    #                 {"error": NoneOrDict,
-    #                  "atomic_actions": [
-    #                       {"action": String, "duration": Float},
-    #                       ...
-    #                   ]}
-    #                 Our goal is to get next structure:
-    #                 [{"key": $atomic_actions.action,
-    #                   "values": [[order, $atomic_actions.duration
+    # NOTE(boris-42): Our goal is to get next structure:
+    #                 [{"key": $path_of_atomic_action,
+    #                   "values": [[order, $duration
     #                              if not $error else 0], ...}]
     #
-    #                 Order of actions in "atomic_action" is similiar for
-    #                 all iteration. So we should take first non "error"
-    #                 iteration. And get in atomitc_iter list:
-    #                 [{"key": "action", "values":[]}]
-    stacked_area = []
-    for r in result["result"]:
-        if not r["error"]:
-            for action in r["atomic_actions"]:
-                stacked_area.append({"key": action["action"], "values": []})
-            break
+    #                 Iterations may run different actions, so the paths
+    #                 of the actions of all the successful iterations are
+    #                 taken (see utils.atomic_durations()).
+    raw = utils.measured_results(result["result"])
+    paths = utils.atomic_paths(filter(lambda r: not r["error"], raw))
+    stacked_area = [{"key": path, "values": []} for path in paths]
 
     # NOTE(boris-42): pie is similiar to stacked_area, only difference is in
     #                 structure of values. In case of $error we shouldn't put
     #                 anything in pie. In case of non error we should put just
-    #                 $atomic_actions.duration (without order)
+    #                 the durations of the actions (without order)
     pie = []
     histogram_data = []
     if stacked_area:
         pie = copy.deepcopy(stacked_area)
         histogram_data = copy.deepcopy(stacked_area)
-        for i, data in enumerate(result["result"]):
+        for i, data in enumerate(raw):
             # in case of error put (order, 0.0) to all actions of stacked area
-            if data["error"]:
-                for k in range(len(stacked_area)):
-                    stacked_area[k]["values"].append([i + 1, 0.0])
-                continue
-
-            # in case of non error put real durations to pie and stacked area
-            for j, action in enumerate(data["atomic_actions"]):
-                pie[j]["values"].append(action["duration"])
-                stacked_area[j]["values"].append([i + 1, action["duration"]])
-                histogram_data[j]["values"].append(action["duration"])
+            durations = {} if data["error"] else utils.atomic_durations(data)
+            for j, path in enumerate(paths):
+                if path not in durations:
+                    stacked_area[j]["values"].append([i + 1, 0.0])
+                    continue
+                # in case of non error put real durations to pie and
+                # stacked area
+                duration = durations[path][0]
+                pie[j]["values"].append(duration)
+                stacked_area[j]["values"].append([i + 1, duration])
+                histogram_data[j]["values"].append(duration)
 
     histograms = [[] for atomic_action in range(len(histogram_data))]
     for i, atomic_action in enumerate(histogram_data):
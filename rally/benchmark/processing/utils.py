@@ -13,11 +13,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import json
 import math
 
 from rally import exceptions
 
 
+# Separates names of the nested atomic actions in their paths
+ATOMIC_PATH_SEPARATOR = " > "
+
+
 def mean(values):
     """Find the simple average of a list of values.
 
@@ -65,3 +71,137 @@ def get_durations(raw_data, get_duration, is_successful):
     """
     data = [get_duration(run) for run in raw_data if is_successful(run)]
     return data
+
+
+def measured_results(raw_data):
+    """Returns the results of iterations that aren't part of the warm-up.
+
+    :parameter raw_data: list of iteration results
+
+    :returns: list of iteration results that are taken into account in
+              statistics
+    """
+    return [result for result in raw_data if not result.get("warmup")]
+
+
+def atomic_durations(result):
+    """Returns durations of the atomic actions of an iteration by path.
+
+    The path of an atomic action is the names of the actions it's nested
+    in and its own name joined with ATOMIC_PATH_SEPARATOR. Durations of the
+    actions with the same path (e.g. repeated in a loop) are summed up.
+    Results without the tree of the atomic actions (stored by the older
+    versions) are taken as flat lists of actions.
+
+    :parameter result: iteration result
+
+    :returns: OrderedDict {path: (duration, count)} in order of the first
+              start of the actions
+    """
+    durations = collections.OrderedDict()
+    tree = result.get("atomic_tree")
+    if tree is not None:
+        paths = []
+        for name, parent, duration in zip(tree["action"], tree["parent"],
+                                          tree["duration"]):
+            path = (name if parent < 0 else
+                    paths[parent] + ATOMIC_PATH_SEPARATOR + name)
+            paths.append(path)
+            if duration is not None:
+                total, count = durations.get(path, (0, 0))
+                durations[path] = (total + duration, count + 1)
+    else:
+        for atomic in result.get("atomic_actions", []):
+            total, count = durations.get(atomic["action"], (0, 0))
+            durations[atomic["action"]] = (total + atomic["duration"],
+                                           count + 1)
+    return durations
+
+
+def atomic_actions(result):
+    """Returns the finished atomic actions of an iteration as a flat list.
+
+    Nesting of the actions is dropped, an action repeated in a loop is
+    listed as many times as it ran.
+
+    :parameter result: iteration result
+
+    :returns: list of {"action": name, "duration": duration} dicts in order
+              of the start of the actions
+    """
+    tree = result.get("atomic_tree")
+    if tree is None:
+        return result.get("atomic_actions", [])
+    return [{"action": name, "duration": duration}
+            for name, duration in zip(tree["action"], tree["duration"])
+            if duration is not None]
+
+
+def atomic_paths(raw_data):
+    """Returns paths of the atomic actions of all the iterations.
+
+    :parameter raw_data: list of iteration results
+
+    :returns: list of paths in order of their first appearance
+    """
+    paths = collections.OrderedDict()
+    for result in raw_data:
+        for path in atomic_durations(result):
+            paths[path] = True
+    return paths.keys()
+
+
+def scheduling_lag(result):
+    """Returns how late the iteration was started by the load generator.
+
+    :parameter result: iteration result
+
+    :returns: the actual start time of the iteration minus the intended one
+              or None if the iteration wasn't scheduled (closed-loop runs)
+              or didn't report its start
+    """
+    if "scheduled_start" not in result or "start" not in result:
+        return None
+    return max(result["start"] - result["scheduled_start"], 0)
+
+
+def corrected_duration(result):
+    """Returns the duration of the iteration including its scheduling lag.
+
+    When the load generator of an open-loop run falls behind, iterations
+    are started late, while their durations look as good as before. Real
+    users would have waited for the lag as well, so it's counted in the
+    corrected duration (the correction for "coordinated omission").
+
+    :parameter result: iteration result
+
+    :returns: float value
+    """
+    return result["duration"] + (scheduling_lag(result) or 0)
+
+
+def merge_results(results):
+    """Merges results of benchmarks stored in several chunks.
+
+    Results of a benchmark are stored in the task as several records with
+    the same key while the benchmark is running.
+
+    :parameter results: list of task results, each with "key" and "data"
+
+    :returns: list of dicts with "key" and "data", one per benchmark, in
+              order of their first records
+    """
+    merged = []
+    by_key = {}
+    for result in results:
+        key = json.dumps(result["key"], sort_keys=True)
+        if key not in by_key:
+            by_key[key] = {"key": result["key"], "data": {"raw": []}}
+            merged.append(by_key[key])
+        data = by_key[key]["data"]
+        for name, value in result["data"].items():
+            if name == "raw":
+                data["raw"].extend(value)
+            else:
+                data[name] = value
+    return merged
@@ -0,0 +1,267 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import time
+
+from rally.benchmark.processing import utils as putils
+from rally.benchmark.runners import base
+from rally.benchmark.runners import constant
+from rally.benchmark import workers
+from rally import consts
+from rally.openstack.common import log as logging
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+
+
+def _latency(result, atomic_action=None):
+    """Returns the latency of an iteration as seen by the control loop.
+
+    Failed iterations and iterations that didn't run the atomic action have
+    infinite latency, so they push the p95 of the window over the target.
+
+    :param result: iteration result
+    :param atomic_action: name of the atomic action to take the duration
+                          of, the duration of the whole iteration if None
+    """
+    if result["error"]:
+        return float("inf")
+    if atomic_action is None:
+        return result["duration"]
+    durations = [atomic["duration"]
+                 for atomic in putils.atomic_actions(result)
+                 if atomic["action"] == atomic_action]
+    return sum(durations) if durations else float("inf")
+
+
+class _ConcurrencyController(object):
+    """Additive-increase/multiplicative-decrease concurrency control loop.
+
+    Latencies of the last `window` iterations are kept. After every `window`
+    new results the p95 of the window is compared to the target: the
+    concurrency is multiplied by `decrease_factor` if the target is missed,
+    increased by `increase_step` if the p95 is below the target by more
+    than `headroom` and kept as is otherwise.
+    """
+
+    def __init__(self, target, window, concurrency, min_concurrency,
+                 max_concurrency, increase_step, decrease_factor, headroom):
+        self.target = target
+        self.concurrency = concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.headroom = headroom
+        self.latencies = collections.deque(maxlen=window)
+        self.history = []
+        self._new_results = 0
+        self._successes = 0
+        self._window_start = time.time()
+
+    def add(self, latency):
+        """Takes the latency of a finished iteration into account.
+
+        :returns: True if the concurrency has been changed
+        """
+        self.latencies.append(latency)
+        self._new_results += 1
+        if latency != float("inf"):
+            self._successes += 1
+        if self._new_results < self.latencies.maxlen:
+            return False
+
+        now = time.time()
+        duration = now - self._window_start
+        p95 = putils.percentile(list(self.latencies), 0.95)
+        self.history.append({
+            "concurrency": self.concurrency,
+            "p95": p95 if p95 != float("inf") else None,
+            "throughput": (self._successes / duration
+                           if duration > 0 else 0.0),
+            "target_met": p95 <= self.target
+        })
+        self._new_results = 0
+        self._successes = 0
+        self._window_start = now
+
+        concurrency = self.concurrency
+        if p95 > self.target:
+            concurrency = min(int(concurrency * self.decrease_factor),
+                              concurrency - 1)
+        elif p95 < self.target * (1 - self.headroom):
+            concurrency += self.increase_step
+        concurrency = max(min(concurrency, self.max_concurrency),
+                          self.min_concurrency)
+        changed = concurrency != self.concurrency
+        self.concurrency = concurrency
+        return changed
+
+    def summary(self):
+        """Returns the sustained throughput found by the control loop.
+
+        The sustained throughput is the best throughput of the windows that
+        met the latency target.
+        """
+        good = [w for w in self.history if w["target_met"]]
+        best = max(good, key=lambda w: w["throughput"]) if good else None
+        return {
+            "target_p95": self.target,
+            "windows": self.history,
+            "final_concurrency": self.concurrency,
+            "sustained_throughput": best and best["throughput"],
+            "sustained_concurrency": best and best["concurrency"]
+        }
+
+
+class AdaptiveConcurrencyScenarioRunner(base.ScenarioRunner):
+    """Adjusts concurrency to hold a p95 latency objective.
+
+    This is a closed-loop runner: the scenario is run either a given number
+    of "times" or for "duration" seconds, while the number of concurrently
+    running iterations is adjusted by the control loop to keep the 95th
+    percentile latency at or below "target_p95" seconds. The latency is
+    either the duration of the "atomic_action" (e.g. "nova.boot_server") or
+    of the whole iteration; failed iterations count as missing the target.
+
+    Every "window" results the p95 of the last "window" latencies is
+    checked: the concurrency is multiplied by "decrease_factor" if the
+    target is missed and increased by "increase_step" if the p95 is more
+    than "headroom" below the target. It's kept between "min_concurrency"
+    and "max_concurrency" and starts from "concurrency".
+
+    The p95, throughput and concurrency of every window and the sustained
+    throughput (the best throughput of the windows that met the target)
+    are stored in the runner info, so one run shows what rate the cloud
+    can sustain within the objective.
+    """
+
+    __execution_type__ = consts.RunnerType.ADAPTIVE
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "target_p95": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "atomic_action": {
+                "type": "string"
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "duration": {
+                "type": "number",
+                "minimum": 0
+            },
+            "window": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "min_concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "max_concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "increase_step": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "decrease_factor": {
+                "type": "number",
+                "minimum": 0,
+                "maximum": 1,
+                "exclusiveMaximum": True
+            },
+            "headroom": {
+                "type": "number",
+                "minimum": 0,
+                "maximum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            }
+        },
+        "oneOf": [
+            {"required": ["times"]},
+            {"required": ["duration"]}
+        ],
+        "required": ["type", "target_p95"],
+        "additionalProperties": False
+    }
+
+    def _get_controller(self):
+        min_concurrency = self.config.get("min_concurrency", 1)
+        max_concurrency = max(self.config.get("max_concurrency", 64),
+                              min_concurrency)
+        concurrency = self.config.get("concurrency", min_concurrency)
+        return _ConcurrencyController(
+            target=self.config["target_p95"],
+            window=self.config.get("window", 10),
+            concurrency=max(min(concurrency, max_concurrency),
+                            min_concurrency),
+            min_concurrency=min_concurrency,
+            max_concurrency=max_concurrency,
+            increase_step=self.config.get("increase_step", 1),
+            decrease_factor=self.config.get("decrease_factor", 0.7),
+            headroom=self.config.get("headroom", 0.1))
+
+    def _iter_scenario_args(self, cls, method, context, args):
+        if "times" in self.config:
+            return constant.ConstantScenarioRunner._iter_scenario_args(
+                cls, method, context, args, self.config["times"])
+        return constant.ConstantForDurationScenarioRunner._iter_scenario_args(
+            cls, method, context, args, self.config["duration"])
+
+    def _run_scenario(self, cls, method, context, args):
+        timeout = self.config.get("timeout", 600)
+        atomic_action = self.config.get("atomic_action")
+        controller = self._get_controller()
+
+        # The pool is grown only when the concurrency is raised, running
+        # iterations aren't interrupted when it's lowered.
+        workers.get_pool(controller.concurrency)
+        iter_args = self._iter_scenario_args(cls, method, context, args)
+        for result in self._run_iterations(iter_args,
+                                           lambda: controller.concurrency,
+                                           timeout):
+            self._send_result(result)
+            if controller.add(_latency(result, atomic_action)):
+                window = controller.history[-1]
+                LOG.info("Adaptive: p95 %(p95)s s at concurrency "
+                         "%(concurrency)s, throughput %(throughput).2f "
+                         "iter/s" % window)
+                LOG.info("Adaptive: concurrency is set to %d"
+                         % controller.concurrency)
+                workers.get_pool(controller.concurrency)
+
+        return self._collected_results(info=controller.summary())
@@ -14,8 +14,12 @@
 #    under the License.
 
 import abc
+import collections
 import copy
+import multiprocessing
 import random
+import threading
+import time
 
 import jsonschema
 from oslo.config import cfg
@@ -23,6 +27,7 @@ from oslo.config import cfg
 from rally.benchmark.context import base as base_ctx
 from rally.benchmark.scenarios import base
 from rally.benchmark import utils
+from rally.benchmark import workers
 from rally import consts
 from rally import exceptions
 from rally.openstack.common import log as logging
@@ -32,30 +37,85 @@ from rally import utils as rutils
 
 LOG = logging.getLogger(__name__)
 
+runner_opts = [
+    cfg.IntOpt("result_chunk_size",
+               default=1000,
+               help="Number of iteration results that are collected in "
+                    "memory before they are stored in the database"),
+    cfg.IntOpt("abort_grace_period",
+               default=60,
+               help="Seconds given to the running iterations of an aborted "
+                    "task to finish before they are cancelled")
+]
 
-def _get_scenario_context(context):
+CONF = cfg.CONF
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(runner_opts, group=benchmark_group)
+
+
+def _user_context(context, user):
     scenario_ctx = {}
     for key, value in context.iteritems():
         if key != "users":
             scenario_ctx[key] = value
         else:
-            scenario_ctx["user"] = random.choice(value)
+            scenario_ctx["user"] = value[user]
     return scenario_ctx
 
 
+# Keys of the benchmark contexts shared with the worker processes, by id of
+# the context dict
+_SHARED_CONTEXTS = {}
+
+
+class _SharedScenarioContext(collections.namedtuple("_SharedScenarioContext",
+                                                    ["key", "user"])):
+    """Reference to a scenario context shared with the worker processes.
+
+    It's sent to the workers with every iteration instead of the context
+    itself, so the users and tenants aren't pickled again and again.
+    """
+
+    __slots__ = ()
+
+    def resolve(self):
+        return _user_context(workers.get_shared(self.key), self.user)
+
+
+def _get_scenario_context(context, user=None):
+    """Returns the context of a single iteration.
+
+    :param context: benchmark context
+    :param user: index of the user to run the iteration with, a random
+                 user is picked by default
+    :returns: context dict with a single "user" or a reference to it if the
+              benchmark context is shared with the workers
+    """
+    users = context.get("users")
+    if users and user is None:
+        user = random.randrange(len(users))
+    if id(context) in _SHARED_CONTEXTS:
+        return _SharedScenarioContext(_SHARED_CONTEXTS[id(context)], user)
+    return _user_context(context, user)
+
+
 def _run_scenario_once(args):
     iteration, cls, method_name, context, kwargs = args
+    if isinstance(context, _SharedScenarioContext):
+        context = context.resolve()
 
     LOG.info("Task %(task)s | ITER: %(iteration)s START" %
              {"task": context["task"]["uuid"], "iteration": iteration})
 
     scenario = cls(
             context=context,
-            admin_clients=osclients.Clients(context["admin"]["endpoint"]),
-            clients=osclients.Clients(context["user"]["endpoint"]))
+            admin_clients=osclients.cached_clients(
+                context["admin"]["endpoint"]),
+            clients=osclients.cached_clients(context["user"]["endpoint"]))
 
     error = []
     scenario_output = {}
+    cpu_start = rutils.thread_time()
     try:
         with rutils.Timer() as timer:
             scenario_output = getattr(scenario,
@@ -64,6 +124,10 @@ def _run_scenario_once(args):
         error = utils.format_exc(e)
         if cfg.CONF.debug:
             LOG.exception(e)
+        if osclients.is_unauthorized(e):
+            # The cached token was rejected, the next iterations get a new one
+            osclients.evict_token(context["user"]["endpoint"])
+            osclients.evict_token(context["admin"]["endpoint"])
     finally:
         status = "Error %s: %s" % tuple(error[0:2]) if error else "OK"
         LOG.info("Task %(task)s | ITER: %(iteration)s END: %(status)s" %
@@ -72,9 +136,62 @@ def _run_scenario_once(args):
 
         return {"duration": timer.duration() - scenario.idle_duration(),
                 "idle_duration": scenario.idle_duration(),
+                "cpu_duration": rutils.thread_time() - cpu_start,
+                "start": timer.start,
+                "finish": timer.finish,
                 "error": error,
                 "scenario_output": scenario_output,
-                "atomic_actions": scenario.atomic_actions()}
+                "atomic_tree": scenario.atomic_actions_tree()}
+
+
+def _run_scheduled_scenario_once(args):
+    """Runs the iteration of an open-loop runner.
+
+    The intended start time of the iteration is kept in its result, so the
+    scheduling lag (the actual start minus the intended one) is known.
+    """
+    scheduled_start, scenario_args = args
+    result = _run_scenario_once(scenario_args)
+    result["scheduled_start"] = scheduled_start
+    return result
+
+
+def _failed_iteration_result(exc, duration=0):
+    """Returns result of an iteration that didn't return anything."""
+    return {"duration": duration, "idle_duration": 0,
+            "error": utils.format_exc(exc)}
+
+
+def _timed_out_iteration_result(timeout):
+    """Returns result of an iteration cancelled after the timeout.
+
+    Timed out iterations are marked, so they can be told apart from the
+    iterations failed by the scenario itself.
+    """
+    result = _failed_iteration_result(multiprocessing.TimeoutError(),
+                                      duration=timeout)
+    result["timed_out"] = True
+    return result
+
+
+def _get_iteration_result(async_result, deadline, timeout):
+    """Waits for the result of an iteration started in the worker pool.
+
+    The iteration that isn't finished by the deadline is cancelled: the
+    worker process running it is killed and replaced by a new one.
+
+    :param async_result: AsyncResult of _run_scenario_once() call
+    :param deadline: time after which the iteration is considered failed
+    :param timeout: iteration timeout, it's reported as the duration of
+                    the timed out iteration
+    """
+    try:
+        return async_result.get(max(deadline - time.time(), 0))
+    except multiprocessing.TimeoutError:
+        async_result.cancel()
+        return _timed_out_iteration_result(timeout)
+    except Exception as e:
+        return _failed_iteration_result(e)
 
 
 class ScenarioRunnerResult(list):
@@ -92,6 +209,18 @@ class ScenarioRunnerResult(list):
                 "idle_duration": {
                     "type": "number"
                 },
+                "scheduled_start": {
+                    "type": "number"
+                },
+                "start": {
+                    "type": "number"
+                },
+                "finish": {
+                    "type": "number"
+                },
+                "cpu_duration": {
+                    "type": "number"
+                },
                 "scenario_output": {
                     "type": "object",
                     "properties": {
@@ -107,31 +236,97 @@ class ScenarioRunnerResult(list):
                     },
                     "additionalProperties": False
                 },
-                "atomic_actions": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "action": {"type": "string"},
-                            "duration": {"type": "number"}
+                "atomic_tree": {
+                    "type": "object",
+                    "properties": {
+                        "action": {
+                            "type": "array",
+                            "items": {"type": "string"}
                         },
-                        "additionalProperties": False
-                    }
+                        "parent": {
+                            "type": "array",
+                            "items": {"type": "integer"}
+                        },
+                        "start": {
+                            "type": "array",
+                            "items": {"type": "number"}
+                        },
+                        "duration": {
+                            "type": "array",
+                            "items": {"type": ["number", "null"]}
+                        }
+                    },
+                    "required": ["action", "parent", "start", "duration"],
+                    "additionalProperties": False
                 },
                 "error": {
                     "type": "array",
                     "items": {
                         "type": "string"
                     }
+                },
+                "timed_out": {
+                    "type": "boolean"
+                },
+                "warmup": {
+                    "type": "boolean"
+                },
+                "scenario": {
+                    "type": "string"
                 }
             },
             "additionalProperties": False
         }
     }
 
-    def __init__(self, result_list):
+    def __init__(self, result_list, info=None):
+        """Validates the results of iterations.
+
+        :param result_list: list of results of all the iterations
+        :param info: dict with runner specific summary of the whole run
+        """
         super(ScenarioRunnerResult, self).__init__(result_list)
         jsonschema.validate(result_list, self.RESULT_SCHEMA)
+        self.info = info or {}
+
+
+class ResultCollector(object):
+    """Collects results of iterations as soon as they are finished.
+
+    Every `chunk_size` results are validated and passed to the consumer
+    (e.g. stored in the database), so memory usage doesn't grow with the
+    number of iterations. Without the consumer all the results are kept
+    in memory.
+    """
+
+    def __init__(self, consumer=None, chunk_size=None):
+        """Initializes the collector.
+
+        :param consumer: function called with every full chunk of results
+        :param chunk_size: number of results in a chunk
+        """
+        self.consumer = consumer
+        self.chunk_size = chunk_size or CONF.benchmark.result_chunk_size
+        self.count = 0
+        self._chunk = []
+
+    def append(self, result):
+        self._chunk.append(result)
+        self.count += 1
+        if self.consumer and len(self._chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Passes the collected results to the consumer."""
+        chunk, self._chunk = self._chunk, []
+        if chunk:
+            jsonschema.validate(chunk, ScenarioRunnerResult.RESULT_SCHEMA)
+            self.consumer(chunk)
+
+    def pop(self):
+        """Returns the results that weren't passed to the consumer yet."""
+        chunk, self._chunk = self._chunk, []
+        return chunk
 
 
 class ScenarioRunner(object):
@@ -146,6 +341,29 @@ class ScenarioRunner(object):
 
     CONFIG_SCHEMA = {}
 
+    # NOTE: Warm-up is accepted by all the runners, so it's validated
+    #       separately from their CONFIG_SCHEMA.
+    WARMUP_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "iterations": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "duration": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            }
+        },
+        "oneOf": [
+            {"required": ["iterations"]},
+            {"required": ["duration"]}
+        ],
+        "additionalProperties": False
+    }
+
     def __init__(self, task, endpoints, config):
         self.task = task
         self.endpoints = endpoints
@@ -154,6 +372,16 @@ class ScenarioRunner(object):
         #                a single admin endpoint here.
         self.admin_user = endpoints[0]
         self.config = config
+        self.result_collector = ResultCollector()
+        self.sla_checker = None
+        self.aborted = threading.Event()
+        self.warmup = config.get("warmup", {})
+        self.start_time = None
+        # Ident of the thread running the benchmark, only the jobs
+        # submitted by it are cancelled on abort
+        self._owner = None
+        self._grace_timer = None
+        self._grace_lock = threading.Lock()
 
     @staticmethod
     def _get_cls(runner_type):
@@ -172,7 +400,147 @@ class ScenarioRunner(object):
         """Validates runner's part of task config."""
         runner = ScenarioRunner._get_cls(config.get("type",
                                                     consts.RunnerType.SERIAL))
+        config = dict(config)
+        if "warmup" in config:
+            jsonschema.validate(config.pop("warmup"),
+                                ScenarioRunner.WARMUP_SCHEMA)
         jsonschema.validate(config, runner.CONFIG_SCHEMA)
+        runner._validate_config(config)
+
+    @classmethod
+    def _validate_config(cls, config):
+        """Validates the runner config beyond its schema, if needed.
+
+        :raises RallyException: if the config is invalid
+        """
+
+    def _run_iterations(self, iter_args, concurrency, timeout,
+                        func=None, tag=None):
+        """Runs scenario iterations in the task-wide worker pool.
+
+        :param iter_args: iterable of arguments for func
+        :param concurrency: max number of simultaneously running iterations
+                            or a function returning it, in the latter case
+                            the caller is responsible for sizing the pool
+        :param timeout: seconds after which an iteration is considered failed
+        :param func: function running a single iteration in a worker,
+                     _run_scenario_once() by default
+        :param tag: function returning dict of the keys to add to the result
+                    of the iteration that has timed out or failed to run,
+                    it's called with the arguments of the iteration
+
+        :returns: generator of iteration results in order of completion
+        """
+        pool = workers.get_pool(None if callable(concurrency)
+                                else concurrency)
+        iter_args = self._until_aborted(iter_args)
+        for async_result in pool.imap_unordered(func or _run_scenario_once,
+                                                iter_args,
+                                                concurrency=concurrency,
+                                                timeout=timeout):
+            try:
+                result = async_result.get(0)
+            except Exception as e:
+                if isinstance(e, multiprocessing.TimeoutError):
+                    result = _timed_out_iteration_result(timeout)
+                else:
+                    result = _failed_iteration_result(e)
+                if tag:
+                    result.update(tag(async_result.args[0]))
+            yield result
+
+    def _until_aborted(self, iterable):
+        """Yields elements of iterable until the runner is aborted."""
+        for item in iterable:
+            if self.aborted.is_set():
+                break
+            yield item
+
+    def abort(self):
+        """Stops starting new iterations.
+
+        The running iterations are given `abort_grace_period` seconds to
+        finish, then they are cancelled. Results of all the finished
+        iterations are returned by the runner as usual.
+        """
+        if self.aborted.is_set():
+            return
+        LOG.warning("Aborting the benchmark, waiting %d seconds for the "
+                    "running iterations to finish."
+                    % CONF.benchmark.abort_grace_period)
+        self.aborted.set()
+        with self._grace_lock:
+            # Jobs are cancelled only while the iterations are running, the
+            # jobs of the context cleanup are never cancelled
+            if self._owner is None:
+                return
+            self._grace_timer = threading.Timer(
+                CONF.benchmark.abort_grace_period, workers.cancel_jobs,
+                args=(self._owner,))
+            self._grace_timer.daemon = True
+            self._grace_timer.start()
+
+    def _stop_grace_timer(self):
+        """Stops cancelling the jobs once the iterations are finished."""
+        with self._grace_lock:
+            self._owner = None
+            if self._grace_timer:
+                self._grace_timer.cancel()
+
+    def _send_scheduled_result(self, async_result, scheduled_start, timeout):
+        """Sends the result of _run_scheduled_scenario_once() call.
+
+        The iteration times out `timeout` seconds after its intended start,
+        so the iterations delayed by the load generator aren't given more
+        time.
+        """
+        result = _get_iteration_result(async_result,
+                                       scheduled_start + timeout, timeout)
+        result.setdefault("scheduled_start", scheduled_start)
+        self._send_result(result)
+
+    def _is_warmup(self, result):
+        """Checks whether the iteration belongs to the warm-up phase.
+
+        Warm-up is either the given number of the first finished iterations
+        or the iterations started in the given number of seconds since the
+        start of the benchmark (when the start of the iteration isn't
+        recorded, the time it's finished is used).
+        """
+        if "iterations" in self.warmup:
+            return self.result_collector.count < self.warmup["iterations"]
+        if "duration" in self.warmup:
+            started = result["start"] if "start" in result else time.time()
+            return started - self.start_time < self.warmup["duration"]
+        return False
+
+    def _send_result(self, result):
+        """Passes the result of a finished iteration to the collector.
+
+        The result is also checked against the SLA of the benchmark, the
+        benchmark is stopped as soon as the SLA is clearly violated.
+        Warm-up iterations are marked and aren't checked against the SLA.
+        """
+        if self._is_warmup(result):
+            result["warmup"] = True
+            self.result_collector.append(result)
+            return
+        self.result_collector.append(result)
+        if (self.sla_checker and self.sla_checker.add_iteration(result) and
+                not self.aborted.is_set()):
+            LOG.warning("SLA is violated, stopping the benchmark: %s"
+                        % "; ".join(r["detail"]
+                                    for r in self.sla_checker.results()
+                                    if not r["success"]))
+            self.abort()
+
+    def _collected_results(self, info=None):
+        """Returns the results that weren't stored by the collector yet.
+
+        Runners that send the results of iterations with _send_result()
+        return this from _run_scenario().
+        """
+        return ScenarioRunnerResult(self.result_collector.pop(), info=info)
 
     @abc.abstractmethod
     def _run_scenario(self, cls, method_name, context, args):
@@ -184,9 +552,26 @@ class ScenarioRunner(object):
                         information, that was created before benchmark started.
         :param args: Arguments to call the scenario method with
 
-        :returns: List of results fore each single scenario iteration,
-                  where each result is a dictionary
+        :returns: ScenarioRunnerResult with results of the iterations
+                  (each result is a dictionary) that weren't sent to the
+                  result collector
+        """
+
+    def _start_scenario(self, cls, method_name, context, args):
+        """Runs _run_scenario() once the context is set up.
+
+        The context is shared with the worker processes for the time of the
+        run, so the iterations refer to it instead of carrying a copy.
         """
+        self.start_time = time.time()
+        with self._grace_lock:
+            self._owner = threading.current_thread().ident
+        _SHARED_CONTEXTS[id(context)] = workers.share(context)
+        try:
+            return self._run_scenario(cls, method_name, context, args)
+        finally:
+            self._stop_grace_timer()
+            workers.unshare(_SHARED_CONTEXTS.pop(id(context)))
 
     def run(self, name, context, args):
         cls_name, method_name = name.split(".", 1)
@@ -207,9 +592,9 @@ class ScenarioRunner(object):
             "config": scenario_context
         }
 
-        results = base_ctx.ContextManager.run(context_obj, self._run_scenario,
-                                              cls, method_name, context_obj,
-                                              args)
+        results = base_ctx.ContextManager.run(context_obj,
+                                              self._start_scenario, cls,
+                                              method_name, context_obj, args)
 
         if not isinstance(results, ScenarioRunnerResult):
             name = self.__execution_type__
@@ -14,12 +14,10 @@
 #    under the License.
 
 
-import collections
-import multiprocessing
+import itertools
 import time
 
 from rally.benchmark.runners import base
-from rally.benchmark import utils
 from rally import consts
 from rally.openstack.common import log as logging
 from rally import utils as rutils
@@ -79,25 +77,12 @@ class ConstantScenarioRunner(base.ScenarioRunner):
         # NOTE(msdubov): If not specified, perform single scenario run.
         times = self.config.get("times", 1)
 
-        pool = multiprocessing.Pool(concurrency)
-        iter_result = pool.imap(base._run_scenario_once,
-                                self._iter_scenario_args(cls, method, context,
-                                                         args, times))
+        iter_args = self._iter_scenario_args(cls, method, context, args,
+                                             times)
+        for result in self._run_iterations(iter_args, concurrency, timeout):
+            self._send_result(result)
 
-        results = []
-
-        for i in range(times):
-            try:
-                result = iter_result.next(timeout)
-            except multiprocessing.TimeoutError as e:
-                result = {"duration": timeout, "idle_duration": 0,
-                          "error": utils.format_exc(e)}
-            results.append(result)
-
-        pool.close()
-        pool.join()
-
-        return base.ScenarioRunnerResult(results)
+        return self._collected_results()
 
 
 class ConstantForDurationScenarioRunner(base.ScenarioRunner):
@@ -140,10 +125,13 @@ class ConstantForDurationScenarioRunner(base.ScenarioRunner):
     }
 
     @staticmethod
-    def _iter_scenario_args(cls, method, ctx, args):
-        def _scenario_args(i):
-            return (i, cls, method, base._get_scenario_context(ctx), args)
-        return _scenario_args
+    def _iter_scenario_args(cls, method, ctx, args, duration):
+        start = time.time()
+        for i in itertools.count():
+            # The first iteration is always started, even if duration is 0
+            if i and time.time() - start >= duration:
+                break
+            yield (i, cls, method, base._get_scenario_context(ctx), args)
 
     def _run_scenario(self, cls, method, context, args):
 
@@ -151,28 +139,9 @@ class ConstantForDurationScenarioRunner(base.ScenarioRunner):
         concurrency = self.config.get("concurrency", 1)
         duration = self.config.get("duration")
 
-        pool = multiprocessing.Pool(concurrency)
-
-        run_args = utils.infinite_run_args_generator(
-                    self._iter_scenario_args(cls, method, context, args))
-        iter_result = pool.imap(base._run_scenario_once, run_args)
-
-        results_queue = collections.deque([], maxlen=concurrency)
-        start = time.time()
-        while True:
-            try:
-                result = iter_result.next(timeout)
-            except multiprocessing.TimeoutError as e:
-                result = {"duration": timeout, "idle_duration": 0,
-                          "error": utils.format_exc(e)}
-            results_queue.append(result)
-
-            if time.time() - start > duration:
-                break
-
-        results = list(results_queue)
-
-        pool.terminate()
-        pool.join()
+        iter_args = self._iter_scenario_args(cls, method, context, args,
+                                             duration)
+        for result in self._run_iterations(iter_args, concurrency, timeout):
+            self._send_result(result)
 
-        return base.ScenarioRunnerResult(results)
+        return self._collected_results()
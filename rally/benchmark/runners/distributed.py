@@ -0,0 +1,296 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from rally.benchmark import agent
+from rally.benchmark.runners import base
+from rally.benchmark.runners import threaded
+from rally import consts
+from rally.deploy.serverprovider.providers import existing
+from rally import exceptions
+from rally.openstack.common import log as logging
+from rally import sshutils
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+
+AGENT_COMMAND = "%s -m rally.benchmark.agent"
+CLOCK_COMMAND = "%s -c 'import time; print(repr(time.time()))'"
+
+# Number of samples used to estimate the clock offset of an agent host.
+CLOCK_SAMPLES = 3
+
+# Seconds given to agents to get ready before the synchronized start.
+START_DELAY = 2.0
+
+# Interval of checking whether the runner is aborted while the agents run.
+POLL_INTERVAL = 1.0
+
+# The agent is aborted by creating this file on its host.
+ABORT_FILE = "/tmp/rally-agent-%s.abort"
+
+
+class LocalTransport(object):
+    """Runs agents on the local host.
+
+    It has the same execute() interface as sshutils.SSH, so agents can be
+    run and tested without any remote host.
+    """
+
+    host = "localhost"
+
+    def execute(self, cmd, stdin=None, timeout=None):
+        process = subprocess.Popen(cmd, shell=True, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate(stdin)
+        return process.returncode, stdout, stderr
+
+
+def _clock_offset(transport, python):
+    """Estimates how much the clock of the agent host is ahead of ours.
+
+    The sample with the shortest round trip is used, its error is at most
+    a half of the round trip.
+    """
+    samples = []
+    for i in range(CLOCK_SAMPLES):
+        sent = time.time()
+        status, stdout, stderr = transport.execute(CLOCK_COMMAND % python)
+        received = time.time()
+        if status:
+            raise exceptions.AgentFailure(host=transport.host,
+                                          reason=stderr.strip())
+        remote = float(stdout.strip().splitlines()[-1])
+        samples.append((received - sent, remote - (sent + received) / 2.0))
+    return min(samples)[1]
+
+
+def _run_agent(transport, python, job):
+    """Runs the job by the agent and returns the results of iterations."""
+    status, stdout, stderr = transport.execute(AGENT_COMMAND % python,
+                                               stdin=agent.encode_job(job),
+                                               timeout=0)
+    if status:
+        raise exceptions.AgentFailure(host=transport.host,
+                                      reason=stderr.strip())
+    try:
+        return json.loads(stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError) as e:
+        raise exceptions.AgentFailure(host=transport.host, reason=str(e))
+
+
+class DistributedScenarioRunner(base.ScenarioRunner):
+    """Spreads iterations across several load generator hosts.
+
+    An agent (rally.benchmark.agent) is started on every host over SSH and
+    runs its share of iterations: the iterations, the "concurrency" or the
+    rate ("rps") are evenly partitioned between the agents. Rally has to
+    be installed on the hosts.
+
+    Hosts are given with "hosts" - a list of credentials in the same format
+    as for the ExistingServers server provider. Alternatively several
+    agents may be run on the local host with "local_agents". The python
+    interpreter used on the hosts may be set with "python".
+
+    The clock offset of every host is estimated before the run, all the
+    agents start at the same moment and the start times of the iterations
+    are converted to the clock of the Rally host.
+
+    When the runner is aborted, so are the agents: they stop starting new
+    iterations and cancel the running ones after the grace period.
+    """
+
+    __execution_type__ = consts.RunnerType.DISTRIBUTED
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "rps": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            },
+            "hosts": {
+                "type": "array",
+                "minItems": 1,
+                "items": existing.ExistingServers.CREDENTIALS_SCHEMA
+            },
+            "local_agents": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "python": {
+                "type": "string"
+            }
+        },
+        "oneOf": [
+            {"required": ["hosts"]},
+            {"required": ["local_agents"]}
+        ],
+        "not": {"required": ["concurrency", "rps"]},
+        "required": ["type"],
+        "additionalProperties": False
+    }
+
+    def _get_agents(self):
+        """Returns list of (transport, python interpreter) pairs."""
+        if "local_agents" in self.config:
+            python = self.config.get("python", sys.executable)
+            return [(LocalTransport(), python)
+                    for i in range(self.config["local_agents"])]
+        python = self.config.get("python", "python")
+        return [(sshutils.SSH(host["user"], host["host"],
+                              port=host.get("port", 22),
+                              pkey=host.get("key"),
+                              password=host.get("password")), python)
+                for host in self.config["hosts"]]
+
+    def _run_scenario(self, cls, method, context, args):
+        timeout = self.config.get("timeout", 600)
+        times = self.config.get("times", 1)
+        agents = self._get_agents()[:times]
+        n = len(agents)
+
+        jobs = []
+        abort_file = ABORT_FILE % uuid.uuid4()
+        grace_period = base.CONF.benchmark.abort_grace_period
+        concurrency = threaded._split(self.config.get("concurrency", 1), n)
+        for i in range(n):
+            jobs.append({"cls": cls, "method": method, "context": context,
+                         "args": args, "iterations": range(i, times, n),
+                         "timeout": timeout,
+                         "concurrency": max(concurrency[i], 1),
+                         "rps": self.config.get("rps", 0) / float(n),
+                         "abort_file": abort_file,
+                         "abort_grace_period": grace_period})
+
+        offsets = [None] * n
+        errors = [None] * n
+
+        def _sync(i):
+            transport, python = agents[i]
+            try:
+                offsets[i] = _clock_offset(transport, python)
+            except Exception as e:
+                errors[i] = e
+
+        self._run_in_threads(_sync, n)
+
+        start_at = time.time() + START_DELAY
+        results = [[] for i in range(n)]
+
+        def _run(i):
+            if errors[i] or self.aborted.is_set():
+                return
+            transport, python = agents[i]
+            jobs[i]["start_at"] = start_at + offsets[i]
+            LOG.info("Starting agent on %(host)s, clock offset %(offset).3f"
+                     % {"host": transport.host, "offset": offsets[i]})
+            try:
+                results[i] = _run_agent(transport, python, jobs[i])
+            except Exception as e:
+                errors[i] = e
+
+        finished = threading.Event()
+        # New transports, so the connections of the running agents aren't
+        # shared with the aborting threads
+        self._run_in_threads(
+            _run, n, on_abort=lambda: self._abort_agents(
+                self._get_agents()[:n], abort_file, finished))
+        finished.set()
+
+        for i in range(n):
+            if errors[i]:
+                LOG.error("Load generator agent failed: %s" % errors[i])
+                for iteration in jobs[i]["iterations"]:
+                    self._send_result(
+                        base._failed_iteration_result(errors[i]))
+                continue
+            for result in results[i]:
+                for key in ("start", "finish", "scheduled_start"):
+                    if key in result:
+                        result[key] -= offsets[i]
+                self._send_result(result)
+
+        return self._collected_results()
+
+    def _run_in_threads(self, func, n, on_abort=None):
+        """Calls func(i) for i in range(n) in threads and waits for them.
+
+        :param on_abort: function called once if the runner is aborted
+                         while the threads are running
+        """
+        threads = [threading.Thread(target=func, args=(i,)) for i in range(n)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                if on_abort and self.aborted.is_set():
+                    on_abort()
+                    on_abort = None
+                thread.join(POLL_INTERVAL)
+
+    @staticmethod
+    def _abort_agents(agents, abort_file, finished):
+        """Creates the abort file on the hosts of the agents.
+
+        The file is created in the background and removed once the agents
+        are finished, failures are only logged.
+        """
+        def _execute(transport, cmd):
+            try:
+                status, stdout, stderr = transport.execute(cmd)
+            except Exception as e:
+                status, stderr = 1, str(e)
+            if status:
+                LOG.warning("Failed to run '%(cmd)s' on %(host)s: %(error)s"
+                            % {"cmd": cmd, "host": transport.host,
+                               "error": stderr.strip()})
+
+        def _abort(transport):
+            _execute(transport, "touch %s" % abort_file)
+            finished.wait()
+            _execute(transport, "rm -f %s" % abort_file)
+
+        LOG.warning("Aborting the load generator agents.")
+        for transport, python in agents:
+            thread = threading.Thread(target=_abort, args=(transport,))
+            thread.daemon = True
+            thread.start()
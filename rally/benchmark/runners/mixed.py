@@ -0,0 +1,206 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import collections
+import copy
+import itertools
+import random
+import time
+
+from rally.benchmark.runners import base
+from rally.benchmark.scenarios import base as base_scenario
+from rally import consts
+from rally import utils as rutils
+
+
+def _get_scenario(name):
+    """Returns (class, method name) of the scenario "<Class>.<method>"."""
+    cls_name, method_name = name.split(".", 1)
+    return base_scenario.Scenario.get_by_name(cls_name), method_name
+
+
+def _run_mixed_scenario_once(args):
+    """Runs an iteration and marks its result with the scenario name."""
+    name, iteration_args = args
+    result = base._run_scenario_once(iteration_args)
+    result["scenario"] = name
+    return result
+
+
+class _WeightedChoice(object):
+    """Picks items at random with probabilities proportional to weights."""
+
+    def __init__(self, items, weights):
+        self.items = items
+        self._bounds = []
+        total = 0
+        for weight in weights:
+            total += weight
+            self._bounds.append(total)
+        self.total = total
+
+    def pick(self):
+        return self.items[bisect.bisect_right(self._bounds,
+                                              random.random() * self.total)]
+
+
+class MixedScenarioRunner(base.ScenarioRunner):
+    """Runs a weighted mix of scenarios within a single benchmark.
+
+    Every iteration runs one scenario picked at random in proportion to
+    its weight. The scenario of the benchmark itself has "weight" (1 by
+    default) and is run with the benchmark args, the other "scenarios" are
+    given by name, weight and args, e.g.:
+
+        NovaServers.boot_and_delete_server:
+          - args: {...}
+            runner:
+              type: "mixed"
+              times: 100
+              concurrency: 10
+              weight: 60
+              scenarios:
+                - name: "KeystoneBasic.create_user"
+                  weight: 30
+                - name: "GlanceImages.create_and_delete_image"
+                  weight: 10
+                  args: {...}
+
+    The iterations are run either a given number of "times" or for
+    "duration" seconds, at most "concurrency" at a time. All the scenarios
+    share the context of the benchmark, which is extended with the default
+    contexts of the other scenarios. Results of the iterations are marked
+    with the name of the scenario, so statistics are reported per scenario.
+    """
+
+    __execution_type__ = consts.RunnerType.MIXED
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "weight": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "scenarios": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {
+                            "type": "string"
+                        },
+                        "weight": {
+                            "type": "number",
+                            "minimum": 0,
+                            "exclusiveMinimum": True
+                        },
+                        "args": {
+                            "type": "object"
+                        }
+                    },
+                    "required": ["name", "weight"],
+                    "additionalProperties": False
+                },
+                "minItems": 1
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "duration": {
+                "type": "number",
+                "minimum": 0
+            },
+            "concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            }
+        },
+        "oneOf": [
+            {"required": ["times"]},
+            {"required": ["duration"]}
+        ],
+        "required": ["type", "scenarios"],
+        "additionalProperties": False
+    }
+
+    def run(self, name, context, args):
+        cls, method_name = _get_scenario(name)
+        defaults = getattr(cls, method_name).context
+        context = dict(context)
+        for scenario in self.config["scenarios"]:
+            other_cls, other_method = _get_scenario(scenario["name"])
+            for key, value in getattr(other_cls, other_method).context.items():
+                if key not in context and key not in defaults:
+                    context[key] = copy.deepcopy(value)
+        return super(MixedScenarioRunner, self).run(name, context, args)
+
+    def _iterations(self):
+        if "times" in self.config:
+            return xrange(self.config["times"])
+        start = time.time()
+        duration = self.config["duration"]
+        # The first iteration is always started, even if duration is 0
+        return itertools.takewhile(
+            lambda i: not i or time.time() - start < duration,
+            itertools.count())
+
+    def _get_mix(self, cls, method_name, args):
+        """Returns _WeightedChoice of (name, class, method, args) tuples."""
+        items = [("%s.%s" % (cls.__name__, method_name),
+                  cls, method_name, args)]
+        weights = [self.config.get("weight", 1)]
+        for scenario in self.config["scenarios"]:
+            other_cls, other_method = _get_scenario(scenario["name"])
+            items.append((scenario["name"], other_cls, other_method,
+                          scenario.get("args", {})))
+            weights.append(scenario["weight"])
+        return _WeightedChoice(items, weights)
+
+    def _run_scenario(self, cls, method_name, context, args):
+        timeout = self.config.get("timeout", 600)
+        concurrency = self.config.get("concurrency", 1)
+        mix = self._get_mix(cls, method_name, args)
+        picked = collections.Counter()
+
+        def _iter_args():
+            for i in self._iterations():
+                name, scenario_cls, scenario_method, scenario_args = (
+                    mix.pick())
+                picked[name] += 1
+                yield (name, (i, scenario_cls, scenario_method,
+                              base._get_scenario_context(context),
+                              scenario_args))
+
+        # Results of the iterations that have timed out or failed to run
+        # are marked with the scenario too
+        for result in self._run_iterations(
+                _iter_args(), concurrency, timeout,
+                func=_run_mixed_scenario_once,
+                tag=lambda args: {"scenario": args[0]}):
+            self._send_result(result)
+
+        return self._collected_results(info={"iterations": dict(picked)})
@@ -13,11 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import multiprocessing
+import collections
 import time
 
 from rally.benchmark.runners import base
-from rally.benchmark import utils
+from rally.benchmark import workers
 from rally import consts
 from rally import utils as rutils
 
@@ -35,6 +35,11 @@ class PeriodicScenarioRunner(base.ScenarioRunner):
     An example of a periodic scenario is booting 1 VM every 2 seconds. This
     execution type is thus very helpful in understanding the maximal load that
     a certain cloud can handle.
+
+    Iterations are scheduled at fixed moments (the i-th one "period" * i
+    seconds after the start), so the load generator falling behind doesn't
+    shift the whole schedule. The intended start time ("scheduled_start")
+    is stored in the result of every iteration along with the actual one.
     """
 
     __execution_type__ = consts.RunnerType.PERIODIC
@@ -68,33 +73,38 @@ class PeriodicScenarioRunner(base.ScenarioRunner):
         period = self.config["period"]
         timeout = self.config.get("timeout", 600)
 
-        async_results = []
-
-        pools = []
-        for i in range(times):
-            pool = multiprocessing.Pool(1)
-            scenario_args = ((i, cls, method_name,
-                              base._get_scenario_context(context), args),)
-            async_result = pool.apply_async(base._run_scenario_once,
-                                            scenario_args)
-            async_results.append(async_result)
-
-            pool.close()
-            pools.append(pool)
-
-            if i < times - 1:
-                time.sleep(period)
-
-        results = []
-        for async_result in async_results:
-            try:
-                result = async_result.get(timeout=timeout)
-            except multiprocessing.TimeoutError as e:
-                result = {"duration": timeout, "idle_duration": 0,
-                          "error": utils.format_exc(e)}
-            results.append(result)
-
-        for pool in pools:
-            pool.join()
-
-        return base.ScenarioRunnerResult(results)
+        pending = collections.deque()
+        running = []
+
+        start = time.time()
+        for i in self._until_aborted(range(times)):
+            scheduled_start = start + i * period
+            delay = scheduled_start - time.time()
+            if delay > 0:
+                self.aborted.wait(delay)
+                if self.aborted.is_set():
+                    break
+
+            # Every iteration should be started right away, so the pool is
+            # grown if all the workers are busy with previous iterations.
+            running = [r for r in running if not r.ready()]
+            pool = workers.get_pool(len(running) + 1)
+
+            scenario_args = (i, cls, method_name,
+                             base._get_scenario_context(context), args)
+            async_result = pool.apply_async(base._run_scheduled_scenario_once,
+                                            ((scheduled_start,
+                                              scenario_args),))
+            pending.append((async_result, scheduled_start))
+            running.append(async_result)
+
+            # Results of the finished iterations are collected right away
+            while pending and pending[0][0].ready():
+                self._send_scheduled_result(*pending.popleft(),
+                                            timeout=timeout)
+
+        for async_result, scheduled_start in pending:
+            self._send_scheduled_result(async_result, scheduled_start,
+                                        timeout)
+
+        return self._collected_results()
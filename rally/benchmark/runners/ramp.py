@@ -0,0 +1,197 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+from rally.benchmark.processing import utils as putils
+from rally.benchmark.runners import base
+from rally.benchmark.runners import constant
+from rally import consts
+from rally.openstack.common import log as logging
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+
+
+def _concurrency_steps(config):
+    """Returns the list of concurrency levels of the ramp."""
+    if "steps" in config:
+        return config["steps"]
+    steps = []
+    concurrency = config.get("start", 1)
+    max_concurrency = config.get("max_concurrency", 64)
+    factor = config.get("factor", 2)
+    while concurrency <= max_concurrency:
+        steps.append(concurrency)
+        concurrency = max(int(concurrency * factor), concurrency + 1)
+    return steps
+
+
+def _step_stats(concurrency, results, duration):
+    """Computes the summary of a single step of the ramp.
+
+    :param concurrency: concurrency of the step
+    :param results: list of iteration results of the step
+    :param duration: wall time of the step in seconds
+    :returns: dict with throughput, p95 duration and error rate of the step
+    """
+    durations = [r["duration"] for r in results if not r["error"]]
+    errors = len(results) - len(durations)
+    return {
+        "concurrency": concurrency,
+        "iterations": len(results),
+        "duration": duration,
+        "throughput": len(durations) / duration if duration > 0 else 0.0,
+        "p95": putils.percentile(durations, 0.95),
+        "error_rate": float(errors) / len(results) if results else 0.0
+    }
+
+
+class StepRampScenarioRunner(base.ScenarioRunner):
+    """Raises concurrency in steps until the cloud under test saturates.
+
+    Each step runs the scenario with a fixed concurrency either a given
+    number of "times" or for "step_duration" seconds. Concurrency levels are
+    given either explicitly as a list of "steps" or as a geometric sequence
+    defined by "start", "factor" and "max_concurrency" (1, 2, 4, ... 64 by
+    default).
+
+    After each step its throughput (successful iterations per second), p95
+    duration and error rate are computed, the warm-up iterations are left
+    out. The ramp is stopped as soon as the throughput grows by less than
+    "plateau_threshold" (relative to the best previous step) or the error
+    rate exceeds "max_error_rate".
+
+    All the steps are run within the same context, so it's set up and
+    cleaned up only once. Results of all the iterations are collected in
+    order of steps; the summary of each step, the knee point (concurrency of
+    the last step that still increased the throughput) and the reason why
+    the ramp was stopped are stored in the runner info.
+    """
+
+    __execution_type__ = consts.RunnerType.STEP_RAMP
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "steps": {
+                "type": "array",
+                "minItems": 1,
+                "items": {"type": "integer", "minimum": 1}
+            },
+            "start": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "factor": {
+                "type": "number",
+                "minimum": 1,
+                "exclusiveMinimum": True
+            },
+            "max_concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "step_duration": {
+                "type": "number",
+                "minimum": 0
+            },
+            "plateau_threshold": {
+                "type": "number",
+                "minimum": 0
+            },
+            "max_error_rate": {
+                "type": "number",
+                "minimum": 0,
+                "maximum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            }
+        },
+        "oneOf": [
+            {"required": ["times"]},
+            {"required": ["step_duration"]}
+        ],
+        "required": ["type"],
+        "additionalProperties": False
+    }
+
+    def _iter_step_args(self, cls, method, context, args):
+        if "times" in self.config:
+            return constant.ConstantScenarioRunner._iter_scenario_args(
+                cls, method, context, args, self.config["times"])
+        return constant.ConstantForDurationScenarioRunner._iter_scenario_args(
+            cls, method, context, args, self.config["step_duration"])
+
+    def _run_scenario(self, cls, method, context, args):
+        timeout = self.config.get("timeout", 600)
+        plateau_threshold = self.config.get("plateau_threshold", 0.1)
+        max_error_rate = self.config.get("max_error_rate", 0.1)
+
+        steps = []
+        knee = None
+        stop_reason = "max_concurrency"
+        for concurrency in _concurrency_steps(self.config):
+            iter_args = self._iter_step_args(cls, method, context, args)
+            start = time.time()
+            step_results = list(self._run_iterations(iter_args, concurrency,
+                                                     timeout))
+            end = time.time()
+            # Warm-up iterations are marked by _send_result(), they aren't
+            # taken into account in the stats of the step
+            for result in step_results:
+                self._send_result(result)
+            measured = putils.measured_results(step_results)
+            starts = [r["start"] for r in measured if "start" in r]
+            if len(measured) < len(step_results) and starts:
+                # The step is measured since its first measured iteration
+                start = max(start, min(starts))
+            stats = _step_stats(concurrency, measured, end - start)
+            LOG.info("Step-ramp: concurrency %(concurrency)s, throughput "
+                     "%(throughput).2f iter/s, p95 %(p95)s s, error rate "
+                     "%(error_rate).2f" % stats)
+            steps.append(stats)
+
+            if self.aborted.is_set():
+                stop_reason = "aborted"
+                break
+            if not measured:
+                # The whole step is a part of the warm-up
+                continue
+            if stats["error_rate"] > max_error_rate:
+                stop_reason = "errors"
+                break
+            if knee is not None and (stats["throughput"] <
+                                     knee["throughput"] *
+                                     (1 + plateau_threshold)):
+                stop_reason = "plateau"
+                break
+            knee = stats
+
+        info = {"steps": steps,
+                "knee": knee and knee["concurrency"],
+                "stop_reason": stop_reason}
+        return self._collected_results(info=info)
@@ -0,0 +1,321 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import itertools
+import math
+import threading
+import time
+
+from rally.benchmark.runners import base
+from rally.benchmark import workers
+from rally import consts
+from rally import utils as rutils
+
+
+# Interval of checking for overdue iterations and the abort while waiting
+# for a free slot
+POLL_INTERVAL = 1.0
+
+
+def _schedule_pieces(schedule):
+    """Converts rate schedule to a list of linear pieces.
+
+    :param schedule: list of rate profiles from the runner config
+    :returns: list of (start rate, end rate, duration) tuples
+    """
+    pieces = []
+    for profile in schedule:
+        if profile["type"] == "constant":
+            pieces.append((profile["rps"], profile["rps"],
+                           profile["duration"]))
+        elif profile["type"] == "linear":
+            pieces.append((profile["start"], profile["end"],
+                           profile["duration"]))
+        elif profile["type"] == "step":
+            rate = profile["start"]
+            while rate <= profile["end"]:
+                pieces.append((rate, rate, profile["step_duration"]))
+                rate += profile["step"]
+        elif profile["type"] == "spike":
+            base_rate = profile["rps"]
+            spike_start = min(profile["spike_start"], profile["duration"])
+            spike_end = min(spike_start + profile["spike_duration"],
+                            profile["duration"])
+            pieces.extend([(base_rate, base_rate, spike_start),
+                           (profile["peak"], profile["peak"],
+                            spike_end - spike_start),
+                           (base_rate, base_rate,
+                            profile["duration"] - spike_end)])
+    return [piece for piece in pieces if piece[2] > 0]
+
+
+def _arrival_times(pieces):
+    """Generates arrival times of iterations for the given rate schedule.
+
+    The k-th iteration (starting from 0) arrives at the moment when the
+    integral of the rate over time reaches k, so the rate is followed
+    precisely even if it changes during the run.
+
+    :param pieces: list of (start rate, end rate, duration) tuples
+    :returns: generator of offsets in seconds from the start of the run
+    """
+    offset = 0.0
+    arrived = 0.0
+    k = 0
+    for r0, r1, duration in pieces:
+        # Number of arrivals at t seconds since the start of the piece is
+        # a * t^2 + b * t
+        a = (r1 - r0) / (2.0 * duration) if duration != float("inf") else 0
+        b = float(r0)
+        while True:
+            c = k - arrived
+            if c <= 0:
+                t = 0.0
+            else:
+                d = b * b + 4 * a * c
+                if d < 0 or b + math.sqrt(d) <= 0:
+                    break
+                t = 2 * c / (b + math.sqrt(d))
+            if t >= duration:
+                break
+            yield offset + t
+            k += 1
+        offset += duration
+        arrived += (r0 + r1) / 2.0 * duration
+
+
+class RPSScenarioRunner(base.ScenarioRunner):
+    """Scenario runner that starts iterations at a given rate.
+
+    This is an open-loop runner: iterations are started at the moments
+    defined by the rate schedule, no matter how long the previous iterations
+    take. So unlike the periodic runner it doesn't drift as load grows.
+
+    The rate is specified either as a constant number of requests per second
+    ("rps" with "times" and/or "duration") or as a "schedule" - a list of
+    rate profiles that are applied one after another:
+
+        constant: {"type": "constant", "rps": 5, "duration": 60}
+        linear:   {"type": "linear", "start": 1, "end": 10, "duration": 60}
+        step:     {"type": "step", "start": 1, "end": 10, "step": 3,
+                   "step_duration": 20}
+        spike:    {"type": "spike", "rps": 2, "peak": 20, "duration": 60,
+                   "spike_start": 30, "spike_duration": 5}
+
+    The intended ("scheduled_start") and the actual ("start") start time is
+    stored in the result of every iteration.
+    """
+
+    __execution_type__ = consts.RunnerType.RPS
+
+    PROFILES_SCHEMA = [
+        {
+            "type": "object",
+            "properties": {
+                "type": {"enum": ["constant"]},
+                "rps": {"type": "number", "minimum": 0},
+                "duration": {"type": "number", "minimum": 0}
+            },
+            "required": ["type", "rps", "duration"],
+            "additionalProperties": False
+        },
+        {
+            "type": "object",
+            "properties": {
+                "type": {"enum": ["linear"]},
+                "start": {"type": "number", "minimum": 0},
+                "end": {"type": "number", "minimum": 0},
+                "duration": {"type": "number", "minimum": 0}
+            },
+            "required": ["type", "start", "end", "duration"],
+            "additionalProperties": False
+        },
+        {
+            "type": "object",
+            "properties": {
+                "type": {"enum": ["step"]},
+                "start": {"type": "number", "minimum": 0},
+                "end": {"type": "number", "minimum": 0},
+                "step": {"type": "number", "minimum": 0,
+                         "exclusiveMinimum": True},
+                "step_duration": {"type": "number", "minimum": 0}
+            },
+            "required": ["type", "start", "end", "step", "step_duration"],
+            "additionalProperties": False
+        },
+        {
+            "type": "object",
+            "properties": {
+                "type": {"enum": ["spike"]},
+                "rps": {"type": "number", "minimum": 0},
+                "peak": {"type": "number", "minimum": 0},
+                "duration": {"type": "number", "minimum": 0},
+                "spike_start": {"type": "number", "minimum": 0},
+                "spike_duration": {"type": "number", "minimum": 0}
+            },
+            "required": ["type", "rps", "peak", "duration", "spike_start",
+                         "spike_duration"],
+            "additionalProperties": False
+        }
+    ]
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "rps": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "duration": {
+                "type": "number",
+                "minimum": 0
+            },
+            "schedule": {
+                "type": "array",
+                "minItems": 1,
+                "items": {"oneOf": PROFILES_SCHEMA}
+            },
+            "max_concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            }
+        },
+        "anyOf": [
+            {"required": ["rps", "times"]},
+            {"required": ["rps", "duration"]},
+            {"required": ["schedule"]}
+        ],
+        "not": {"required": ["rps", "schedule"]},
+        "required": ["type"],
+        "additionalProperties": False
+    }
+
+    def _get_schedule(self):
+        if "schedule" in self.config:
+            return _schedule_pieces(self.config["schedule"])
+        rps = self.config["rps"]
+        return [(rps, rps, self.config.get("duration", float("inf")))]
+
+    def _run_scenario(self, cls, method_name, context, args):
+        offsets = _arrival_times(self._get_schedule())
+        if "times" in self.config:
+            offsets = itertools.islice(offsets, self.config["times"])
+
+        arrivals = ((offset, (i, cls, method_name,
+                              base._get_scenario_context(context), args))
+                    for i, offset in enumerate(offsets))
+        self._run_arrivals(arrivals)
+        return self._collected_results()
+
+    def _run_arrivals(self, arrivals):
+        """Starts iterations at the given moments.
+
+        Results of the iterations are sent to the result collector.
+
+        :param arrivals: iterable of (offset, scenario_args) tuples, where
+                         offset is the number of seconds since the start of
+                         the run and scenario_args are the arguments for
+                         _run_scenario_once()
+        """
+        timeout = self.config.get("timeout", 600)
+        max_concurrency = self.config.get("max_concurrency")
+
+        # Iterations are started on time as long as there are less than
+        # max_concurrency of them running, otherwise their start is delayed.
+        slots = callback = None
+        freed = threading.Event()
+        if max_concurrency:
+            slots = threading.BoundedSemaphore(max_concurrency)
+
+            def callback(async_result):
+                slots.release()
+                freed.set()
+
+        pending = collections.deque()
+        running = []
+        start = time.time()
+        for offset, scenario_args in self._until_aborted(arrivals):
+            scheduled_start = start + offset
+            delay = scheduled_start - time.time()
+            if delay > 0:
+                self.aborted.wait(delay)
+                if self.aborted.is_set():
+                    break
+            if slots and not self._acquire_slot(slots, freed, pending,
+                                                timeout):
+                break
+
+            # The pool is grown if all the workers are busy with previous
+            # iterations, so the new one isn't queued.
+            running = [r for r in running if not r.ready()]
+            pool = workers.get_pool(len(running) + 1)
+
+            async_result = pool.apply_async(
+                base._run_scheduled_scenario_once,
+                ((scheduled_start, scenario_args),), callback=callback)
+            pending.append((async_result, scheduled_start))
+            running.append(async_result)
+
+            # Results of the finished iterations are collected right away
+            while pending and pending[0][0].ready():
+                self._send_scheduled_result(*pending.popleft(),
+                                            timeout=timeout)
+
+        for async_result, scheduled_start in pending:
+            self._send_scheduled_result(async_result, scheduled_start,
+                                        timeout)
+
+    def _acquire_slot(self, slots, freed, pending, timeout):
+        """Waits for a free slot to start the next iteration.
+
+        The running iterations that are overdue are cancelled meanwhile,
+        so the hung ones release their slots.
+
+        :param freed: event set every time a slot is released
+        :param pending: (async_result, scheduled_start) pairs of the started
+                        iterations
+        :returns: True if the slot is acquired, False if the runner is
+                  aborted
+        """
+        while True:
+            freed.clear()
+            if slots.acquire(False):
+                return True
+            if self.aborted.is_set():
+                return False
+            now = time.time()
+            wait = POLL_INTERVAL
+            for async_result, scheduled_start in pending:
+                if async_result.ready():
+                    continue
+                if scheduled_start + timeout <= now:
+                    async_result.cancel()
+                else:
+                    wait = min(wait, scheduled_start + timeout - now)
+            freed.wait(wait)
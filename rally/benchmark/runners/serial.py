@@ -50,12 +50,10 @@ class SerialScenarioRunner(base.ScenarioRunner):
     def _run_scenario(self, cls, method_name, context, args):
         times = self.config.get('times', 1)
 
-        results = []
-
-        for i in range(times):
+        for i in self._until_aborted(range(times)):
             run_args = (i, cls, method_name,
                         base._get_scenario_context(context), args)
             result = base._run_scenario_once(run_args)
-            results.append(result)
+            self._send_result(result)
 
-        return base.ScenarioRunnerResult(results)
+        return self._collected_results()
@@ -0,0 +1,478 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+from multiprocessing import connection
+import os
+import Queue
+import shutil
+import tempfile
+import threading
+import time
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import constant
+from rally.benchmark import workers
+from rally import consts
+from rally.openstack.common import log as logging
+from rally import utils as rutils
+
+
+LOG = logging.getLogger(__name__)
+
+# Interval for checking of timed out iterations by the worker process.
+POLL_INTERVAL = 1.0
+
+# CPU utilization of a worker process above which the load generator itself
+# is likely to be the bottleneck.
+CPU_SATURATION = 0.9
+
+
+def _split(total, parts):
+    """Splits total into the given number of nearly equal parts."""
+    return [total // parts + (1 if i < total % parts else 0)
+            for i in range(parts)]
+
+
+def _run_batch(iter_args, threads, timeout, send, aborted):
+    """Runs a batch of iterations in threads of the current process.
+
+    The iterations are run by `threads` threads at most. An iteration that
+    exceeds the timeout is reported as failed and its thread is replaced by
+    a new one, so the hung iteration doesn't decrease the concurrency.
+    Once the batch is aborted no more iterations are started, the batch is
+    over as soon as the running ones are finished.
+
+    :param iter_args: list of _run_scenario_once() arguments
+    :param threads: max number of threads
+    :param timeout: iteration timeout
+    :param send: function called with ("start", index) message when an
+                 iteration is started and with ("result", index, result)
+                 message when it's finished, index is the position of the
+                 iteration in iter_args
+    :param aborted: threading.Event set when the batch is aborted
+    :returns: utilization of the current process
+    """
+    threads = min(threads, len(iter_args))
+    pending = Queue.Queue()
+    for item in enumerate(iter_args):
+        pending.put(item)
+    done = Queue.Queue()
+    started = {}
+    busy = []
+
+    start_time = time.time()
+    start_cpu = os.times()
+
+    # Threads running each iteration, a thread replaced because of a hung
+    # iteration is retired and doesn't take any more iterations
+    runners = {}
+    retired = set()
+
+    def _thread():
+        thread = threading.current_thread()
+        while thread not in retired and not aborted.is_set():
+            try:
+                index, scenario_args = pending.get_nowait()
+            except Queue.Empty:
+                break
+            runners[index] = thread
+            started[index] = time.time()
+            send(("start", index))
+            result = base._run_scenario_once(scenario_args)
+            busy.append(time.time() - started[index])
+            done.put((index, result))
+
+    def _start_thread():
+        thread = threading.Thread(target=_thread)
+        thread.daemon = True
+        thread.start()
+
+    for i in range(threads):
+        _start_thread()
+
+    reported = set()
+    while len(reported) < len(iter_args):
+        if aborted.is_set() and reported.issuperset(started.keys()):
+            break
+        try:
+            index, result = done.get(timeout=POLL_INTERVAL)
+            if index not in reported:
+                reported.add(index)
+                send(("result", index, result))
+        except Queue.Empty:
+            pass
+        now = time.time()
+        for index, start in started.items():
+            if index not in reported and now - start >= timeout:
+                reported.add(index)
+                send(("result", index,
+                      base._timed_out_iteration_result(timeout)))
+                retired.add(runners[index])
+                if not aborted.is_set():
+                    _start_thread()
+
+    wall_time = time.time() - start_time
+    end_cpu = os.times()
+    cpu_time = (end_cpu[0] - start_cpu[0]) + (end_cpu[1] - start_cpu[1])
+    return {
+        "pid": os.getpid(),
+        "threads": threads,
+        "iterations": len(reported),
+        "wall_time": wall_time,
+        "cpu_time": cpu_time,
+        "cpu_utilization": cpu_time / wall_time if wall_time else 0.0,
+        "threads_utilization": (sum(busy) / (wall_time * threads)
+                                if wall_time and threads else 0.0)
+    }
+
+
+def _run_scenario_in_threads(args):
+    """Runs a batch of iterations in threads of a worker process.
+
+    The iterations are run by _run_batch(), their progress is streamed to
+    the _BatchListener of the runner, so the results of the finished
+    iterations aren't lost if the worker process is killed. The batch is
+    aborted by any message of the listener.
+
+    :param args: tuple of (list of _run_scenario_once() arguments,
+                 number of threads, iteration timeout, address of the
+                 _BatchListener, index of the batch)
+    :returns: utilization of the worker process
+    """
+    iter_args, threads, timeout, address, batch = args
+    conn = connection.Client(address)
+    conn.send(batch)
+    aborted = threading.Event()
+
+    def _listen():
+        while True:
+            try:
+                conn.recv()
+            except (EOFError, IOError):
+                break
+            aborted.set()
+        # The listener is gone, nobody waits for the results
+        aborted.set()
+
+    send_lock = threading.Lock()
+
+    def _send(message):
+        # Iterations started by the threads racing with the abort are
+        # reported after the batch is over, they are dropped
+        with send_lock:
+            if conn.closed:
+                return
+            try:
+                conn.send(message)
+            except (IOError, OSError):
+                aborted.set()
+
+    listener = threading.Thread(target=_listen)
+    listener.daemon = True
+    listener.start()
+    try:
+        utilization = _run_batch(iter_args, threads, timeout, _send, aborted)
+        _send(("done",))
+        # The connection is closed by the listener once it has received
+        # everything
+        listener.join()
+    finally:
+        with send_lock:
+            conn.close()
+    return utilization
+
+
+class _BatchListener(object):
+    """Receives the progress of the batches run by the worker processes.
+
+    Every batch connects to the listener and sends its index followed by
+    the messages of _run_batch(). They are put to the `events` queue as
+    (batch, message) tuples, ("closed",) message is put once the batch
+    is disconnected.
+    """
+
+    def __init__(self):
+        self.events = Queue.Queue()
+        self.connected = set()
+        self._conns = {}
+        self._lock = threading.Lock()
+        self._aborted = False
+        self._stopped = False
+        self._tempdir = tempfile.mkdtemp(prefix="rally-threads-")
+        self._listener = connection.Listener(os.path.join(self._tempdir,
+                                                          "socket"))
+        self.address = self._listener.address
+        thread = threading.Thread(target=self._accept)
+        thread.daemon = True
+        thread.start()
+
+    def abort(self):
+        """Aborts the connected batches and the ones connected later."""
+        with self._lock:
+            if self._aborted:
+                return
+            self._aborted = True
+            for conn in self._conns.values():
+                self._send_abort(conn)
+
+    def stop(self):
+        self._stopped = True
+        try:
+            # Wakes up the thread blocked in accept()
+            connection.Client(self.address).close()
+        except Exception:
+            pass
+        self._listener.close()
+        shutil.rmtree(self._tempdir, ignore_errors=True)
+
+    @staticmethod
+    def _send_abort(conn):
+        try:
+            conn.send(("abort",))
+        except (IOError, OSError):
+            pass
+
+    def _accept(self):
+        while not self._stopped:
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                continue
+            thread = threading.Thread(target=self._read, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def _read(self, conn):
+        try:
+            batch = conn.recv()
+        except (EOFError, IOError):
+            conn.close()
+            return
+        with self._lock:
+            self._conns[batch] = conn
+            self.connected.add(batch)
+            if self._aborted:
+                self._send_abort(conn)
+        try:
+            while True:
+                message = conn.recv()
+                if message[0] == "done":
+                    break
+                self.events.put((batch, message))
+        except (EOFError, IOError):
+            pass
+        finally:
+            with self._lock:
+                del self._conns[batch]
+                conn.close()
+            self.events.put((batch, ("closed",)))
+
+
+class ThreadedScenarioRunner(base.ScenarioRunner):
+    """Creates constant load running iterations in threads.
+
+    Like the constant runner it executes a scenario the specified number of
+    times with the specified concurrency, but the concurrent iterations are
+    run by threads of a few worker processes instead of a process per
+    iteration. Scenarios spend almost all the time waiting for responses
+    of the cloud, so a single load generator is able to simulate thousands
+    of concurrent users this way.
+
+    The concurrency is evenly divided between the "processes" (1 by
+    default) and so are the iterations.
+
+    Utilization of every worker process (share of a CPU core used by it and
+    share of time its threads were busy with iterations) is stored in the
+    runner info.
+    """
+
+    __execution_type__ = consts.RunnerType.CONSTANT_THREADS
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "processes": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            }
+        },
+        "required": ["type"],
+        "additionalProperties": False
+    }
+
+    def _get_threads(self):
+        """Returns the list of numbers of threads of each worker process."""
+        concurrency = self.config.get("concurrency", 1)
+        processes = min(self.config.get("processes", 1), concurrency)
+        return _split(concurrency, processes)
+
+    def _receive_results(self, listener, async_results):
+        """Sends the results of the iterations as soon as they are received.
+
+        The batches are aborted as soon as the runner is. A batch is over
+        when it's disconnected from the listener or its job has failed
+        before connecting.
+
+        :returns: tuple of (list of sets of the started iterations, list of
+                  sets of the reported iterations) by batch
+        """
+        started = [set() for r in async_results]
+        reported = [set() for r in async_results]
+        closed = set()
+        while len(closed) < len(async_results):
+            if self.aborted.is_set():
+                listener.abort()
+            try:
+                batch, message = listener.events.get(timeout=POLL_INTERVAL)
+            except Queue.Empty:
+                for batch, async_result in enumerate(async_results):
+                    if (async_result.ready() and
+                            batch not in listener.connected):
+                        closed.add(batch)
+                continue
+            if message[0] == "start":
+                started[batch].add(message[1])
+            elif message[0] == "result":
+                reported[batch].add(message[1])
+                self._send_result(message[2])
+            elif message[0] == "closed":
+                closed.add(batch)
+        return started, reported
+
+    def _run_scenario(self, cls, method, context, args):
+        timeout = self.config.get("timeout", 600)
+        times = self.config.get("times", 1)
+        threads = self._get_threads()[:times]
+        processes = len(threads)
+
+        iter_args = list(constant.ConstantScenarioRunner._iter_scenario_args(
+            cls, method, context, args, times))
+        listener = _BatchListener()
+        try:
+            jobs = [(iter_args[i::processes], threads[i], timeout,
+                     listener.address, i) for i in range(processes)]
+            pool = workers.get_pool(processes)
+            async_results = [pool.apply_async(_run_scenario_in_threads,
+                                              (job,))
+                             for job in jobs]
+            started, reported = self._receive_results(listener,
+                                                      async_results)
+        finally:
+            listener.stop()
+
+        utilization = []
+        for batch, async_result in enumerate(async_results):
+            while not async_result.ready():
+                async_result.wait(POLL_INTERVAL)
+            try:
+                job_utilization = async_result.get(0)
+            except Exception as e:
+                # The worker process died or was killed after the abort,
+                # the iterations it was running are lost.
+                for index in range(len(jobs[batch][0])):
+                    if index in reported[batch]:
+                        continue
+                    if index not in started[batch]:
+                        if not self.aborted.is_set():
+                            self._send_result(
+                                base._failed_iteration_result(e))
+                    elif isinstance(e, multiprocessing.TimeoutError):
+                        self._send_result(
+                            base._timed_out_iteration_result(timeout))
+                    else:
+                        self._send_result(base._failed_iteration_result(e))
+                continue
+            utilization.append(job_utilization)
+            if job_utilization["cpu_utilization"] > CPU_SATURATION:
+                LOG.warning("Worker process %(pid)s used %(cpu).0f%% of CPU, "
+                            "the load generator may be the bottleneck." %
+                            {"pid": job_utilization["pid"],
+                             "cpu": job_utilization["cpu_utilization"] * 100})
+
+        return self._collected_results(info={"workers": utilization})
+
+
+class HybridScenarioRunner(ThreadedScenarioRunner):
+    """Creates constant load running iterations in processes by threads.
+
+    The load is fanned out to "processes" worker processes (one per CPU
+    core by default) each running "threads" threads, so all the cores of
+    the load generator are used for client side work like JSON parsing and
+    TLS, while memory usage stays flat. Alternatively the total
+    "concurrency" may be specified, then it's evenly divided between the
+    processes.
+
+    Utilization of every worker process is stored in the runner info and a
+    warning is logged if a worker process is close to saturating its core.
+    """
+
+    __execution_type__ = consts.RunnerType.HYBRID
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "times": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "processes": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "threads": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            }
+        },
+        "not": {"required": ["concurrency", "threads"]},
+        "required": ["type"],
+        "additionalProperties": False
+    }
+
+    def _get_threads(self):
+        processes = self.config.get("processes", multiprocessing.cpu_count())
+        if "concurrency" in self.config:
+            concurrency = self.config["concurrency"]
+            return _split(concurrency, min(processes, concurrency))
+        return [self.config.get("threads", 1)] * processes
@@ -0,0 +1,176 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+
+import jsonschema
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import rps
+from rally import consts
+from rally import exceptions
+from rally import utils as rutils
+
+
+ARRIVAL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "time": {"type": "number"},
+        "args": {"type": "object"},
+        "user": {"type": "integer", "minimum": 0}
+    },
+    "required": ["time"],
+    "additionalProperties": False
+}
+
+
+def _task_results_arrivals(results):
+    """Returns arrivals of the first benchmark of `rally task results`."""
+    arrivals = []
+    for result in results[0]["result"] if results else []:
+        start = result.get("scheduled_start", result.get("start"))
+        if start is not None:
+            arrivals.append({"time": start})
+    return arrivals
+
+
+def _parse_trace(data):
+    """Parses the arrival trace.
+
+    The trace is either a text with a timestamp (in seconds) per line,
+    where empty lines and lines starting with "#" are skipped, or JSON:
+
+      * a list of timestamps;
+      * a list of {"time": timestamp, "args": {...}, "user": index} dicts,
+        where "args" update the scenario args of the arrival and "user" is
+        the index of the user to run the iteration with;
+      * the output of `rally task results`, start times of the iterations
+        of its first benchmark are used.
+
+    :param data: content of the trace file
+    :returns: list of arrival dicts sorted by time
+    :raises ValueError: if the trace is malformed
+    """
+    try:
+        trace = json.loads(data)
+    except ValueError:
+        trace = [float(line.split()[0]) for line in data.splitlines()
+                 if line.strip() and not line.lstrip().startswith("#")]
+    if not isinstance(trace, list):
+        raise ValueError("list of arrivals is expected")
+    if trace and isinstance(trace[0], dict) and "result" in trace[0]:
+        trace = _task_results_arrivals(trace)
+
+    arrivals = []
+    for arrival in trace:
+        if isinstance(arrival, bool):
+            raise ValueError("%r is not a timestamp" % arrival)
+        if isinstance(arrival, (int, float)):
+            arrival = {"time": arrival}
+        try:
+            jsonschema.validate(arrival, ARRIVAL_SCHEMA)
+        except jsonschema.ValidationError as e:
+            raise ValueError(e.message)
+        arrivals.append(arrival)
+    return sorted(arrivals, key=lambda a: a["time"])
+
+
+def _load_trace(path):
+    """Reads and parses the arrival trace file."""
+    try:
+        with open(os.path.expanduser(path)) as trace_file:
+            return _parse_trace(trace_file.read())
+    except (IOError, ValueError) as e:
+        raise exceptions.InvalidTrace(path=path, reason=e)
+
+
+class TraceScenarioRunner(rps.RPSScenarioRunner):
+    """Scenario runner that replays a recorded timeline of arrivals.
+
+    Like the rps runner this is an open-loop runner, but the moments to
+    start iterations at are read from the "trace" file, e.g. exported from
+    API logs or taken from the results of a previous task (see
+    _parse_trace() for the supported formats). Every arrival may override
+    scenario args and pick the user (by index) to run the iteration with.
+
+    Arrival times are replayed relative to the first arrival. Intervals
+    between them are multiplied by "time_scale", so 0.5 replays the trace
+    twice as fast.
+    """
+
+    __execution_type__ = consts.RunnerType.TRACE
+
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "$schema": rutils.JSON_SCHEMA,
+        "properties": {
+            "type": {
+                "type": "string"
+            },
+            "trace": {
+                "type": "string"
+            },
+            "time_scale": {
+                "type": "number",
+                "minimum": 0,
+                "exclusiveMinimum": True
+            },
+            "max_concurrency": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "minimum": 1
+            }
+        },
+        "required": ["type", "trace"],
+        "additionalProperties": False
+    }
+
+    @staticmethod
+    def _get_scenario_context(context, user=None):
+        if user is not None:
+            user %= len(context["users"])
+        return base._get_scenario_context(context, user)
+
+    @classmethod
+    def _validate_config(cls, config):
+        # A bad trace fails the validation of the task, not the benchmark
+        # after its contexts are set up
+        _load_trace(config["trace"])
+
+    def _run_scenario(self, cls, method_name, context, args):
+        trace = _load_trace(self.config["trace"])
+        time_scale = self.config.get("time_scale", 1)
+        first = trace[0]["time"] if trace else 0
+
+        def _arrivals():
+            for i, arrival in enumerate(trace):
+                scenario_args = dict(args)
+                scenario_args.update(arrival.get("args", {}))
+                yield ((arrival["time"] - first) * time_scale,
+                       (i, cls, method_name,
+                        self._get_scenario_context(context,
+                                                   arrival.get("user")),
+                        scenario_args))
+
+        self._run_arrivals(_arrivals())
+
+        info = {"arrivals": len(trace),
+                "duration": (trace[-1]["time"] - first) * time_scale
+                if trace else 0}
+        return self._collected_results(info=info)
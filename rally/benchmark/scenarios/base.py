@@ -13,11 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import itertools
 import random
 import string
+import sys
+import threading
 import time
 
+import six
+
 from rally import consts
 from rally import exceptions
 from rally import utils
@@ -50,7 +55,19 @@ class Scenario(object):
         self._admin_clients = admin_clients
         self._clients = clients
         self._idle_duration = 0
-        self._atomic_actions = []
+        # Atomic actions are recorded in order of their start as parallel
+        # arrays (so no dict is allocated per action): name, index of the
+        # parent action (-1 for the top-level ones), start offset from the
+        # creation of the scenario and duration.
+        self._atomic_origin = utils.monotonic()
+        self._atomic_names = []
+        self._atomic_parents = []
+        self._atomic_starts = []
+        self._atomic_durations = []
+        self._atomic_lock = threading.Lock()
+        # Indices of the atomic actions running in each thread, see
+        # _running_atomic_actions()
+        self._atomic_local = threading.local()
 
     # TODO(amaretskiy): consider about prefix part of benchmark uuid
     @classmethod
@@ -94,20 +111,31 @@ class Scenario(object):
         return benchmark_scenarios_flattened
 
     @staticmethod
-    def _validate_helper(validators, clients, args, task):
+    def _validate_helper(validators, clients, args, task, context=None):
         for validator in validators:
-            result = validator(clients=clients, task=task, **args)
+            # The context is passed under a reserved name, so it doesn't
+            # collide with the scenario args
+            result = validator(clients=clients, task=task,
+                               task_context=context or {}, **args)
             if not result.is_valid:
                 raise exceptions.InvalidScenarioArgument(message=result.msg)
 
     @staticmethod
-    def validate(name, args, admin=None, users=None, task=None):
-        """Semantic check of benchmark arguments."""
+    def validate(name, args, admin=None, users=None, task=None,
+                 context=None):
+        """Semantic check of benchmark arguments.
+
+        :param context: config of the benchmark context, it's merged with
+                        the default context of the scenario
+        """
         validators = Scenario.meta(name, "validators", default=[])
 
         if not validators:
             return
 
+        scenario_context = dict(Scenario.meta(name, "context", default={}))
+        scenario_context.update(context or {})
+
         admin_validators = [v for v in validators
                             if v.permission == consts.EndpointPermission.ADMIN]
         user_validators = [v for v in validators
@@ -116,10 +144,12 @@ class Scenario(object):
         # NOTE(boris-42): Potential bug, what if we don't have "admin" client
         #                 and scenario have "admin" validators.
         if admin:
-            Scenario._validate_helper(admin_validators, admin, args, task)
+            Scenario._validate_helper(admin_validators, admin, args, task,
+                                      scenario_context)
         if users:
             for user in users:
-                Scenario._validate_helper(user_validators, user, args, task)
+                Scenario._validate_helper(user_validators, user, args, task,
+                                          scenario_context)
 
     @staticmethod
     def meta(cls, attr_name, method_name=None, default=None):
@@ -169,6 +199,8 @@ class Scenario(object):
         The exact time is chosen uniformly randomly from the interval
         [min_sleep; max_sleep). The method also updates the idle_duration
         variable to take into account the overall time spent on sleeping.
+        Inside run_parallel() only the sleeps of the call thread that slept
+        the most are taken into account, as the calls sleep at the same time.
 
         :param min_sleep: Minimum sleep time in seconds (non-negative)
         :param max_sleep: Maximum sleep time in seconds (non-negative)
@@ -179,17 +211,164 @@ class Scenario(object):
 
         sleep_time = random.uniform(min_sleep, max_sleep)
         time.sleep(sleep_time)
-        self._idle_duration += sleep_time
+        self._add_idle_duration(sleep_time)
+
+    def _add_idle_duration(self, duration):
+        if hasattr(self._atomic_local, "idle_duration"):
+            # A thread of run_parallel(), see there
+            self._atomic_local.idle_duration += duration
+        else:
+            with self._atomic_lock:
+                self._idle_duration += duration
 
     def idle_duration(self):
         """Returns duration of all sleep_between."""
         return self._idle_duration
 
+    def _running_atomic_actions(self):
+        """Returns indices of the atomic actions running in this thread.
+
+        The last one is the parent of the actions started now.
+        """
+        running = getattr(self._atomic_local, "running", None)
+        if running is None:
+            running = self._atomic_local.running = []
+        return running
+
+    def _start_atomic_action(self, name):
+        """Starts the atomic action nested in the running one.
+
+        :returns: index of the action to pass to _finish_atomic_action()
+        """
+        running = self._running_atomic_actions()
+        with self._atomic_lock:
+            index = len(self._atomic_names)
+            self._atomic_names.append(name)
+            self._atomic_parents.append(running[-1] if running else -1)
+            self._atomic_starts.append(utils.monotonic() -
+                                       self._atomic_origin)
+            self._atomic_durations.append(None)
+        running.append(index)
+        return index
+
+    def _finish_atomic_action(self, index, duration=None):
+        """Finishes the atomic action started by _start_atomic_action().
+
+        :param duration: duration of the action, by default it's the time
+                         passed since the start of the action
+        """
+        if duration is None:
+            duration = (utils.monotonic() - self._atomic_origin -
+                        self._atomic_starts[index])
+        self._atomic_durations[index] = duration
+        running = self._running_atomic_actions()
+        if running and running[-1] == index:
+            running.pop()
+        elif index in running:
+            running.remove(index)
+
     def _add_atomic_actions(self, name, duration):
-        """Adds the duration of an atomic action by its 'name'."""
-        self._atomic_actions.append(
-            {'action': name, 'duration': duration})
+        """Adds the duration of an atomic action by its 'name'.
+
+        The action is recorded as the one that has just finished.
+        """
+        running = self._running_atomic_actions()
+        with self._atomic_lock:
+            self._atomic_names.append(name)
+            self._atomic_parents.append(running[-1] if running else -1)
+            self._atomic_starts.append(utils.monotonic() -
+                                       self._atomic_origin - duration)
+            self._atomic_durations.append(duration)
+
+    def run_parallel(self, calls, name=None, concurrency=None):
+        """Runs the calls at the same time, each in its own thread.
+
+        It's the way to fan out inside a single iteration, e.g. to boot
+        several servers or to create a volume while a server is booting:
+
+            self.run_parallel(
+                [functools.partial(self._boot_server, name, image, flavor),
+                 functools.partial(self._create_volume, size)],
+                name="boot_with_volume")
+
+        The atomic actions of the calls are recorded as usual, nested in the
+        atomic action `name`. Its duration is the critical path of the
+        calls, i.e. the duration of the longest one.
+
+        :param calls: list of functions without arguments
+        :param name: name of the atomic action of all the calls, if None the
+                     actions of the calls are nested in the running one
+        :param concurrency: max number of calls run at the same time, all
+                            of them by default
+        :returns: list of the results of calls in their order
+        :raises: the exception of the first failed call, once all the
+                 calls are finished
+        """
+        running = self._running_atomic_actions()
+        index = None
+        if name is not None:
+            index = self._start_atomic_action(name)
+        parent = running[-1:]
+        pending = collections.deque(enumerate(calls))
+        lock = threading.Lock()
+        results = [None] * len(calls)
+        errors = []
+        idle_durations = []
+
+        def _run():
+            self._atomic_local.running = list(parent)
+            # Sleeps of the threads overlap, so each of them counts its own
+            self._atomic_local.idle_duration = 0
+            try:
+                while True:
+                    with lock:
+                        if not pending:
+                            return
+                        i, call = pending.popleft()
+                    try:
+                        results[i] = call()
+                    except Exception:
+                        errors.append((i, sys.exc_info()))
+            finally:
+                idle_durations.append(self._atomic_local.idle_duration)
+
+        threads = [threading.Thread(target=_run)
+                   for _ in range(min(concurrency or len(calls), len(calls)))]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if index is not None:
+                self._finish_atomic_action(index)
+            if idle_durations:
+                self._add_idle_duration(max(idle_durations))
+        if errors:
+            six.reraise(*min(errors)[1])
+        return results
 
     def atomic_actions(self):
-        """Returns the content of each atomic action."""
-        return self._atomic_actions
+        """Returns the finished atomic actions as a flat list.
+
+        :returns: list of {"action": name, "duration": duration} dicts in
+                  order of the start of the actions
+        """
+        return [{"action": name, "duration": duration}
+                for name, duration in zip(self._atomic_names,
+                                          self._atomic_durations)
+                if duration is not None]
+
+    def atomic_actions_tree(self):
+        """Returns the atomic actions with their nesting.
+
+        :returns: dict of parallel lists, the i-th action is described by
+                  its name ("action"), index of the parent action or -1
+                  ("parent"), start offset in seconds from the creation of
+                  the scenario ("start") and "duration" (None for the
+                  actions that aren't finished)
+        """
+        return {"action": self._atomic_names,
+                "parent": self._atomic_parents,
+                "start": self._atomic_starts,
+                "duration": self._atomic_durations}
@@ -80,7 +80,8 @@ class CinderScenario(base.Scenario):
             is_ready=bench_utils.resource_is("available"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.cinder_volume_create_timeout,
-            check_interval=CONF.benchmark.cinder_volume_create_poll_interval
+            check_interval=CONF.benchmark.cinder_volume_create_poll_interval,
+            transition="cinder.create_volume"
         )
         return volume
 
@@ -97,5 +98,6 @@ class CinderScenario(base.Scenario):
             volume,
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.cinder_volume_delete_timeout,
-            check_interval=CONF.benchmark.cinder_volume_delete_poll_interval
+            check_interval=CONF.benchmark.cinder_volume_delete_poll_interval,
+            transition="cinder.delete_volume"
         )
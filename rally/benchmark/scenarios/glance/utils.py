@@ -97,7 +97,8 @@ class GlanceScenario(base.Scenario):
             is_ready=bench_utils.resource_is("active"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.glance_image_create_timeout,
-            check_interval=CONF.benchmark.glance_image_create_poll_interval)
+            check_interval=CONF.benchmark.glance_image_create_poll_interval,
+            transition="glance.create_image")
 
         if "data" in kw:
             kw["data"].close()
@@ -117,4 +118,5 @@ class GlanceScenario(base.Scenario):
             image,
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.glance_image_delete_timeout,
-            check_interval=CONF.benchmark.glance_image_delete_poll_interval)
+            check_interval=CONF.benchmark.glance_image_delete_poll_interval,
+            transition="glance.delete_image")
@@ -16,6 +16,7 @@
 import jsonschema
 import random
 
+from rally.benchmark.context import resource_pool
 from rally.benchmark.scenarios import base
 from rally.benchmark.scenarios.cinder import utils as cinder_utils
 from rally.benchmark.scenarios.nova import utils
@@ -145,6 +146,19 @@ class NovaServers(utils.NovaScenario,
                           block_device_mapping=block_device_mapping,
                           **kwargs)
 
+    @valid.add_validator(valid.required_context("resource_pool",
+                                                ["servers"]))
+    @base.scenario()
+    def reboot_pooled_server(self, soft=True):
+        """Tests rebooting of a server from the resource pool.
+
+        Servers are booted by the "resource_pool" context before the run,
+        so the iterations measure just the reboot.
+        """
+        with resource_pool.checkout(self.context(), "servers") as server_id:
+            server = self.clients("nova").servers.get(server_id)
+            self._reboot_server(server, soft=soft)
+
     def _bind_actions(self):
         actions = ['hard_reboot', 'soft_reboot', 'stop_start',
                    'rescue_unrescue']
@@ -13,9 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from oslo.config import cfg
+import functools
 import time
 
+from oslo.config import cfg
+
 from rally.benchmark.scenarios import base
 from rally.benchmark.scenarios import utils as scenario_utils
 from rally.benchmark import utils as bench_utils
@@ -54,6 +56,13 @@ for action, prepoll, timeout, poll in option_names_and_defaults:
         )
     ])
 
+nova_benchmark_opts.append(
+    cfg.IntOpt("nova_servers_boot_wait_concurrency",
+               default=10,
+               help="Max number of servers booted by one iteration that "
+                    "are waited for at the same time")
+)
+
 CONF = cfg.CONF
 benchmark_group = cfg.OptGroup(name='benchmark',
                                title='benchmark options')
@@ -98,7 +107,8 @@ class NovaScenario(base.Scenario):
             is_ready=bench_utils.resource_is("ACTIVE"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_boot_timeout,
-            check_interval=CONF.benchmark.nova_server_boot_poll_interval
+            check_interval=CONF.benchmark.nova_server_boot_poll_interval,
+            transition="nova.boot_server"
         )
         return server
 
@@ -119,7 +129,8 @@ class NovaScenario(base.Scenario):
             server, is_ready=bench_utils.resource_is("ACTIVE"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_reboot_timeout,
-            check_interval=CONF.benchmark.nova_server_reboot_poll_interval
+            check_interval=CONF.benchmark.nova_server_reboot_poll_interval,
+            transition="nova.reboot_server"
         )
 
     @scenario_utils.atomic_action_timer('nova.start_server')
@@ -136,7 +147,8 @@ class NovaScenario(base.Scenario):
             server, is_ready=bench_utils.resource_is("ACTIVE"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_start_timeout,
-            check_interval=CONF.benchmark.nova_server_start_poll_interval
+            check_interval=CONF.benchmark.nova_server_start_poll_interval,
+            transition="nova.start_server"
         )
 
     @scenario_utils.atomic_action_timer('nova.stop_server')
@@ -153,7 +165,8 @@ class NovaScenario(base.Scenario):
             server, is_ready=bench_utils.resource_is("SHUTOFF"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_stop_timeout,
-            check_interval=CONF.benchmark.nova_server_stop_poll_interval
+            check_interval=CONF.benchmark.nova_server_stop_poll_interval,
+            transition="nova.stop_server"
         )
 
     @scenario_utils.atomic_action_timer('nova.rescue_server')
@@ -171,7 +184,8 @@ class NovaScenario(base.Scenario):
             server, is_ready=bench_utils.resource_is("RESCUE"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_rescue_timeout,
-            check_interval=CONF.benchmark.nova_server_rescue_poll_interval
+            check_interval=CONF.benchmark.nova_server_rescue_poll_interval,
+            transition="nova.rescue_server"
         )
 
     @scenario_utils.atomic_action_timer('nova.unrescue_server')
@@ -188,7 +202,8 @@ class NovaScenario(base.Scenario):
             server, is_ready=bench_utils.resource_is("ACTIVE"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_unrescue_timeout,
-            check_interval=CONF.benchmark.nova_server_unrescue_poll_interval
+            check_interval=CONF.benchmark.nova_server_unrescue_poll_interval,
+            transition="nova.unrescue_server"
         )
 
     @scenario_utils.atomic_action_timer('nova.suspend_server')
@@ -206,7 +221,8 @@ class NovaScenario(base.Scenario):
             server, is_ready=bench_utils.resource_is("SUSPENDED"),
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_suspend_timeout,
-            check_interval=CONF.benchmark.nova_server_suspend_poll_interval
+            check_interval=CONF.benchmark.nova_server_suspend_poll_interval,
+            transition="nova.suspend_server"
         )
 
     @scenario_utils.atomic_action_timer('nova.delete_server')
@@ -222,7 +238,8 @@ class NovaScenario(base.Scenario):
             server,
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_delete_timeout,
-            check_interval=CONF.benchmark.nova_server_delete_poll_interval
+            check_interval=CONF.benchmark.nova_server_delete_poll_interval,
+            transition="nova.delete_server"
         )
 
     @scenario_utils.atomic_action_timer('nova.delete_all_servers')
@@ -246,7 +263,8 @@ class NovaScenario(base.Scenario):
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_image_delete_timeout,
             check_interval=
-                CONF.benchmark.nova_server_image_delete_poll_interval
+                CONF.benchmark.nova_server_image_delete_poll_interval,
+            transition="nova.delete_image"
         )
 
     @scenario_utils.atomic_action_timer('nova.create_image')
@@ -269,7 +287,8 @@ class NovaScenario(base.Scenario):
             update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_image_create_timeout,
             check_interval=
-                CONF.benchmark.nova_server_image_create_poll_interval
+                CONF.benchmark.nova_server_image_create_poll_interval,
+            transition="nova.create_image"
         )
         return image
 
@@ -302,12 +321,16 @@ class NovaScenario(base.Scenario):
         servers = filter(lambda server: server.name.startswith(name_prefix),
                          self.clients("nova").servers.list())
         time.sleep(CONF.benchmark.nova_server_boot_prepoll_delay)
-        servers = [bench_utils.wait_for(
+        # The servers are waited for at the same time, so the booting of
+        # all of them takes as long as of the slowest one.
+        servers = self.run_parallel([functools.partial(
+            bench_utils.wait_for,
             server,
             is_ready=bench_utils.resource_is("ACTIVE"),
-            update_resource=bench_utils.
-            get_from_manager(),
+            update_resource=bench_utils.get_from_manager(),
             timeout=CONF.benchmark.nova_server_boot_timeout,
-            check_interval=CONF.benchmark.nova_server_boot_poll_interval
-        ) for server in servers]
+            check_interval=CONF.benchmark.nova_server_boot_poll_interval,
+            transition="nova.boot_server"
+        ) for server in servers],
+            concurrency=CONF.benchmark.nova_servers_boot_wait_concurrency)
         return servers
@@ -131,14 +131,17 @@ class ActionBuilder(object):
 def atomic_action_timer(name):
     """Decorates methods of the Scenario class requiring a measure of execution
      time. This provides duration in seconds of each atomic action.
+
+    Atomic actions started by the decorated method are nested in its one.
     """
     def wrap(func):
         @functools.wraps(func)
         def func_atomic_actions(self, *args, **kwargs):
-            with utils.Timer() as timer:
-                f = func(self, *args, **kwargs)
-            self._add_atomic_actions(name, timer.duration())
-            return f
+            index = self._start_atomic_action(name)
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self._finish_atomic_action(index)
         return func_atomic_actions
     return wrap
 
@@ -164,6 +167,12 @@ class AtomicAction(utils.Timer):
         self.scenario_instance = scenario_instance
         self.name = name
 
+    def __enter__(self):
+        super(AtomicAction, self).__enter__()
+        self._index = self.scenario_instance._start_atomic_action(self.name)
+        return self
+
     def __exit__(self, type, value, tb):
         super(AtomicAction, self).__exit__(type, value, tb)
-        self.scenario_instance._add_atomic_actions(self.name, self.duration())
+        self.scenario_instance._finish_atomic_action(self._index,
+                                                     self.duration())
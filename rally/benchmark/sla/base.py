@@ -0,0 +1,213 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""SLA (Service-level agreement) criteria of benchmarks.
+
+The criteria are specified in the "sla" section of a benchmark config, e.g.:
+
+    "sla": {
+        "max_failure_percent": 10,
+        "max_avg_duration": 5.0,
+        "max_p95_per_atomic_action": {"nova.boot_server": 30}
+    }
+
+They are evaluated on the fly as the results of iterations come in. The
+benchmark is stopped early once a criterion is violated after at least
+"min_iterations" iterations (unless "stop_on_violation" is false).
+"""
+
+import abc
+import bisect
+
+import jsonschema
+import six
+
+from rally.benchmark.processing import utils as putils
+from rally import utils
+
+
+@six.add_metaclass(abc.ABCMeta)
+class SLA(object):
+    """Factory for criteria classes."""
+
+    OPTION_NAME = None
+    CONFIG_SCHEMA = {}
+
+    def __init__(self, criterion_value):
+        self.criterion_value = criterion_value
+        self.success = True
+
+    @staticmethod
+    def get_by_name(name):
+        """Returns SLA class by the name of its option."""
+        for sla in utils.itersubclasses(SLA):
+            if name == sla.OPTION_NAME:
+                return sla
+        return None
+
+    @staticmethod
+    def validate(config):
+        properties = dict((c.OPTION_NAME, c.CONFIG_SCHEMA)
+                          for c in utils.itersubclasses(SLA)
+                          if c.OPTION_NAME)
+        properties.update(SLAChecker.CONFIG_SCHEMA)
+        schema = {
+            "type": "object",
+            "properties": properties,
+            "additionalProperties": False,
+        }
+        jsonschema.validate(config, schema)
+
+    @abc.abstractmethod
+    def add_iteration(self, result):
+        """Takes the result of the next iteration into account.
+
+        :returns: True if the criterion is still met
+        """
+
+    @abc.abstractmethod
+    def details(self):
+        """Returns human readable state of the criterion."""
+
+    def result(self):
+        return {"criterion": self.OPTION_NAME,
+                "success": self.success,
+                "detail": self.details()}
+
+
+class FailureRate(SLA):
+    """Failure rate in percents."""
+
+    OPTION_NAME = "max_failure_percent"
+    CONFIG_SCHEMA = {"type": "number", "minimum": 0.0, "maximum": 100.0}
+
+    def __init__(self, criterion_value):
+        super(FailureRate, self).__init__(criterion_value)
+        self.total = 0
+        self.errors = 0
+
+    def _rate(self):
+        return self.errors * 100.0 / self.total if self.total else 0.0
+
+    def add_iteration(self, result):
+        self.total += 1
+        if result["error"]:
+            self.errors += 1
+        self.success = self._rate() <= self.criterion_value
+        return self.success
+
+    def details(self):
+        return ("Failure rate %.1f%% (max %s%%)"
+                % (self._rate(), self.criterion_value))
+
+
+class MaxAverageDuration(SLA):
+    """Maximum average duration of successful iterations in seconds."""
+
+    OPTION_NAME = "max_avg_duration"
+    CONFIG_SCHEMA = {"type": "number", "minimum": 0.0,
+                     "exclusiveMinimum": True}
+
+    def __init__(self, criterion_value):
+        super(MaxAverageDuration, self).__init__(criterion_value)
+        self.count = 0
+        self.total_duration = 0.0
+
+    def _avg(self):
+        return self.total_duration / self.count if self.count else 0.0
+
+    def add_iteration(self, result):
+        if not result["error"]:
+            self.count += 1
+            self.total_duration += result["duration"]
+        self.success = self._avg() <= self.criterion_value
+        return self.success
+
+    def details(self):
+        return ("Average duration %.3fs (max %ss)"
+                % (self._avg(), self.criterion_value))
+
+
+class MaxPercentileAtomicAction(SLA):
+    """Maximum 95th percentile of the durations of atomic actions."""
+
+    OPTION_NAME = "max_p95_per_atomic_action"
+    CONFIG_SCHEMA = {
+        "type": "object",
+        "patternProperties": {
+            ".*": {"type": "number", "minimum": 0.0, "exclusiveMinimum": True}
+        }
+    }
+
+    def __init__(self, criterion_value):
+        super(MaxPercentileAtomicAction, self).__init__(criterion_value)
+        # Durations are kept sorted, so the percentile is cheap to compute
+        # after every iteration.
+        self.durations = dict((action, []) for action in criterion_value)
+
+    def _p95(self, action):
+        return putils.percentile(self.durations[action], 0.95)
+
+    def add_iteration(self, result):
+        if result["error"]:
+            return self.success
+        for atomic in putils.atomic_actions(result):
+            if atomic["action"] in self.durations:
+                bisect.insort(self.durations[atomic["action"]],
+                              atomic["duration"])
+        self.success = all(self._p95(action) <= limit
+                           for action, limit in self.criterion_value.items()
+                           if self.durations[action])
+        return self.success
+
+    def details(self):
+        return "; ".join("%s p95 %s (max %ss)"
+                         % (action,
+                            "%.3fs" % self._p95(action)
+                            if self.durations[action] else "n/a", limit)
+                         for action, limit in
+                         sorted(self.criterion_value.items()))
+
+
+class SLAChecker(object):
+    """Evaluates all the criteria of a benchmark."""
+
+    CONFIG_SCHEMA = {
+        "min_iterations": {"type": "integer", "minimum": 1},
+        "stop_on_violation": {"type": "boolean"}
+    }
+
+    def __init__(self, config):
+        self.min_iterations = config.get("min_iterations", 10)
+        self.stop_on_violation = config.get("stop_on_violation", True)
+        self.criteria = [SLA.get_by_name(name)(value)
+                         for name, value in sorted(config.items())
+                         if name not in self.CONFIG_SCHEMA]
+        self.iterations = 0
+
+    def add_iteration(self, result):
+        """Takes the result of the next iteration into account.
+
+        :returns: True if the benchmark should be stopped, i.e. some of the
+                  criteria are clearly violated
+        """
+        self.iterations += 1
+        success = all([sla.add_iteration(result) for sla in self.criteria])
+        return (not success and self.stop_on_violation and
+                self.iterations >= self.min_iterations)
+
+    def results(self):
+        """Returns list of results of all the criteria."""
+        return [sla.result() for sla in self.criteria]
@@ -13,18 +13,57 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import itertools
 import logging
-import multiprocessing
+import random
+import threading
 import time
 import traceback
 
 from novaclient.v1_1 import servers
+from oslo.config import cfg
+
+from rally.benchmark import poller
+from rally.benchmark.processing import utils as putils
+from rally.benchmark import workers
 from rally import exceptions
 
 
 LOG = logging.getLogger(__name__)
 
+polling_opts = [
+    cfg.StrOpt("poll_strategy",
+               default="fixed",
+               choices=["fixed", "backoff", "learned"],
+               help="Intervals between checks of a resource status: "
+                    "'fixed' check interval, exponential 'backoff' with "
+                    "jitter or 'learned' from the durations of the same "
+                    "transition observed earlier in the run"),
+    cfg.FloatOpt("poll_min_interval",
+                 default=0.2,
+                 help="Min interval between checks of a resource status "
+                      "for the 'backoff' and 'learned' poll strategies"),
+    cfg.FloatOpt("poll_max_interval",
+                 default=10.0,
+                 help="Max interval between checks of a resource status "
+                      "for the 'backoff' and 'learned' poll strategies")
+]
+
+CONF = cfg.CONF
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(polling_opts, group=benchmark_group)
+
+# Number of observed durations of a transition required by the 'learned'
+# poll strategy, and the max number of them kept
+MIN_TRANSITION_SAMPLES = 5
+MAX_TRANSITION_SAMPLES = 100
+
+# Durations of the transitions observed in this process, by their names
+_transitions = collections.defaultdict(
+    lambda: collections.deque(maxlen=MAX_TRANSITION_SAMPLES))
+_transitions_lock = threading.Lock()
+
 
 def chunks(data, step):
     """Split collection into chunks.
@@ -40,7 +79,12 @@ def chunks(data, step):
 
 
 def resource_is(status):
-    return lambda resource: resource.status.upper() == status.upper()
+    def _resource_is(resource):
+        return resource.status.upper() == status.upper()
+
+    # Used to wait for the resource by the task-wide poller, see wait_for()
+    _resource_is.status = status
+    return _resource_is
 
 
 def get_from_manager(error_statuses=None):
@@ -70,6 +114,7 @@ def get_from_manager(error_statuses=None):
 
         return res
 
+    _get_from_manager.error_statuses = error_statuses
     return _get_from_manager
 
 
@@ -80,7 +125,7 @@ def manager_list_size(sizes):
 
 
 def wait_for(resource, is_ready, update_resource=None, timeout=60,
-             check_interval=1):
+             check_interval=1, transition=None):
     """Waits for the given resource to come into the desired state.
 
     Uses the readiness check function passed as a parameter and (optionally)
@@ -94,26 +139,35 @@ def wait_for(resource, is_ready, update_resource=None, timeout=60,
     :param timeout: Timeout in seconds after which a TimeoutException will be
                     raised
     :param check_interval: Interval in seconds between the two consecutive
-                           readiness checks
+                           readiness checks, see poll_intervals()
+    :param transition: Name of the awaited transition, see poll_intervals()
 
     :returns: The "ready" resource object
     """
 
     start = time.time()
+    if hasattr(is_ready, "status") and hasattr(update_resource,
+                                               "error_statuses"):
+        # Wait for the resource by the task-wide poller first, so it's got
+        # only once it's ready, failed or deleted.
+        poller.wait(resource, [is_ready.status, "DELETED"] +
+                    update_resource.error_statuses, timeout, check_interval)
+    intervals = poll_intervals(check_interval, transition)
     while True:
         # NOTE(boden): mitigate 1st iteration waits by updating immediately
         if update_resource:
             resource = update_resource(resource)
         if is_ready(resource):
             break
-        time.sleep(check_interval)
+        time.sleep(next(intervals))
         if time.time() - start > timeout:
             raise exceptions.TimeoutException()
+    _record_transition(transition, time.time() - start)
     return resource
 
 
 def wait_for_delete(resource, update_resource=None, timeout=60,
-                    check_interval=1):
+                    check_interval=1, transition=None):
     """Wait for the full deletion of resource.
 
     :param update_resource: Function that should take the resource object
@@ -124,17 +178,107 @@ def wait_for_delete(resource, update_resource=None, timeout=60,
     :param timeout: Timeout in seconds after which a TimeoutException will be
                     raised
     :param check_interval: Interval in seconds between the two consecutive
-                           readiness checks
+                           readiness checks, see poll_intervals()
+    :param transition: Name of the awaited transition, see poll_intervals()
     """
     start = time.time()
+    if hasattr(update_resource, "error_statuses"):
+        poller.wait(resource, ["DELETED"] + update_resource.error_statuses,
+                    timeout, check_interval)
+    intervals = poll_intervals(check_interval, transition)
     while True:
         try:
             resource = update_resource(resource)
         except exceptions.GetResourceNotFound:
             break
-        time.sleep(check_interval)
+        time.sleep(next(intervals))
         if time.time() - start > timeout:
             raise exceptions.TimeoutException()
+    _record_transition(transition, time.time() - start)
+
+
+def _record_transition(transition, duration):
+    if transition:
+        with _transitions_lock:
+            _transitions[transition].append(duration)
+
+
+def _fixed_intervals(check_interval, transition=None):
+    return itertools.repeat(check_interval)
+
+
+def _backoff_intervals(check_interval, transition=None):
+    """Exponential backoff with jitter.
+
+    The first interval is poll_min_interval, so fast transitions are
+    caught early. Every next one is doubled up to poll_max_interval, and
+    randomized by up to a half, so the concurrent iterations don't poll
+    all at the same time.
+    """
+    return _backoff(CONF.benchmark.poll_min_interval)
+
+
+def _backoff(interval):
+    while True:
+        yield interval * random.uniform(0.5, 1)
+        interval = min(interval * 2, CONF.benchmark.poll_max_interval)
+
+
+def _learned_intervals(check_interval, transition=None):
+    """Intervals derived from the durations of the same transition.
+
+    The resource is checked rarely until the shortest (5th percentile)
+    duration observed earlier in this process, then densely, every tenth
+    of the spread of durations, until the longest (95th percentile) one,
+    and with exponential backoff starting from the dense interval after
+    that. The backoff is used until enough durations are observed.
+    """
+    with _transitions_lock:
+        durations = list(_transitions.get(transition, []))
+    if len(durations) < MIN_TRANSITION_SAMPLES:
+        for interval in _backoff_intervals(check_interval):
+            yield interval
+        return
+
+    low = putils.percentile(durations, 0.05)
+    high = putils.percentile(durations, 0.95)
+    dense = max(CONF.benchmark.poll_min_interval,
+                min(check_interval, (high - low) / 10.0))
+    max_interval = CONF.benchmark.poll_max_interval
+    elapsed = 0
+    while elapsed < low - dense:
+        interval = min(low - dense - elapsed, max_interval)
+        elapsed += interval
+        yield interval
+    while elapsed < high:
+        elapsed += dense
+        yield dense
+    for interval in _backoff(min(dense * 2, max_interval)):
+        yield interval
+
+
+_POLL_STRATEGIES = {
+    "fixed": _fixed_intervals,
+    "backoff": _backoff_intervals,
+    "learned": _learned_intervals
+}
+
+
+def poll_intervals(check_interval, transition=None):
+    """Returns iterator over intervals between checks of a resource.
+
+    The intervals are chosen by the poll_strategy option.
+
+    :param check_interval: interval of the 'fixed' poll strategy
+    :param transition: name of the awaited transition of the resource,
+                       e.g. "nova.boot_server", the 'learned' poll strategy
+                       falls back to 'backoff' without it
+    """
+    if CONF.benchmark.poll_min_interval > CONF.benchmark.poll_max_interval:
+        raise exceptions.InvalidArgumentsException(
+            message="poll_min_interval <= poll_max_interval")
+    strategy = _POLL_STRATEGIES[CONF.benchmark.poll_strategy]
+    return strategy(check_interval, transition)
 
 
 def format_exc(exc):
@@ -152,19 +296,18 @@ def run_concurrent_helper(args):
 
 
 def run_concurrent(concurrent, cls, fn, fn_args):
-    """Run given function using pool of threads.
+    """Run given function using the task-wide pool of workers.
 
-    :param concurrent: number of threads in the pool
+    :param concurrent: max number of simultaneously running calls
     :param cls: class to be called in the pool
     :param fn: class method to be called in the pool
     :param fn_args: list of arguments for function fn() in the pool
-    :returns: iterator from Pool.imap()
+    :returns: iterator over results of calls in order of fn_args
     """
 
-    pool = multiprocessing.Pool(concurrent)
-    iterator = pool.imap(run_concurrent_helper,
-                         [(cls, fn, args) for args in fn_args])
-    pool.close()
-    pool.join()
+    pool = workers.get_pool(concurrent)
+    results = pool.map(run_concurrent_helper,
+                       [(cls, fn, args) for args in fn_args],
+                       concurrency=concurrent)
 
-    return iterator
+    return iter(results)
@@ -271,6 +271,8 @@ def required_parameters(params):
     :param params: list of required parameters
     """
     def required_parameters_validator(**kwargs):
+        # The context of the benchmark isn't a parameter of the scenario
+        kwargs.pop("task_context", None)
         missing = set(params) - set(kwargs)
         if missing:
             message = _("%s parameters are not defined in "
@@ -278,3 +280,24 @@ def required_parameters(params):
             return ValidationResult(False, message)
         return ValidationResult()
     return required_parameters_validator
+
+
+def required_context(name, keys=None):
+    """Returns validator for a context required by the scenario
+
+    :param name: name of the context
+    :param keys: list of the keys required in the config of the context
+    """
+    def required_context_validator(**kwargs):
+        context = kwargs.get("task_context", {})
+        if name not in context:
+            message = _("The scenario requires the '%s' context") % name
+            return ValidationResult(False, message)
+        missing = set(keys or []) - set(context[name])
+        if missing:
+            message = (_("%(keys)s are not defined in the '%(name)s' "
+                         "context") % {"keys": ", ".join(sorted(missing)),
+                                       "name": name})
+            return ValidationResult(False, message)
+        return ValidationResult()
+    return required_context_validator
@@ -0,0 +1,530 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Task-wide pool of pre-forked worker processes.
+
+All scenario runners and contexts of a task share a single pool of long-lived
+worker processes instead of forking a new multiprocessing.Pool for every
+benchmark (or even for every iteration). The pool is started by the benchmark
+engine, grows on demand and is torn down when the task is finished.
+"""
+
+import atexit
+import collections
+import cPickle as pickle
+import itertools
+import multiprocessing
+import Queue
+import signal
+import threading
+import time
+
+from oslo.config import cfg
+
+from rally import exceptions
+from rally.openstack.common import log as logging
+
+
+LOG = logging.getLogger(__name__)
+
+workers_opts = [
+    cfg.IntOpt("max_concurrency",
+               default=0,
+               help="Max number of iterations run at the same time by all "
+                    "the benchmarks of a task, 0 means no limit")
+]
+
+CONF = cfg.CONF
+benchmark_group = cfg.OptGroup(name="benchmark", title="benchmark options")
+CONF.register_opts(workers_opts, group=benchmark_group)
+
+# Interval for polling of completed jobs: Queue.get() without timeout can't
+# be interrupted by Ctrl-C in python 2.
+POLL_INTERVAL = 1.0
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+# Number of worker processes required by the benchmarks, by ident of the
+# thread running the benchmark
+_DEMAND = {}
+
+# Data shared with the worker processes, e.g. benchmark contexts. Workers
+# forked later inherit it, the running ones receive it through the job pipe.
+_SHARED = {}
+_shared_keys = itertools.count()
+
+
+def _install_shared(key, value):
+    _SHARED[key] = value
+
+
+def _remove_shared(key):
+    _SHARED.pop(key, None)
+
+
+def _worker_loop(jobs, results):
+    """Main loop of a worker process.
+
+    :param jobs: read end of the pipe with (job_id, func, args) tuples,
+                 jobs with None job_id are internal calls without a result
+    :param results: write end of the pipe for (job_id, success, value) tuples
+    """
+    # Ctrl-C is handled by the parent, e.g. the task is aborted gracefully
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            job = jobs.recv()
+        except (EOFError, IOError):
+            break
+        if job is None:
+            break
+
+        job_id, func, args = job
+        if job_id is None:
+            func(*args)
+            continue
+        try:
+            result = (job_id, True, func(*args))
+        except Exception as e:
+            result = (job_id, False, e)
+
+        try:
+            # Check that the parent is able to unpickle the result,
+            # otherwise its listener thread would crash.
+            pickle.loads(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            result = (job_id, False,
+                      exceptions.WorkerJobFailure(reason=str(e)))
+        results.send(result)
+
+
+class AsyncResult(object):
+    """Result of a job submitted to the WorkerPool."""
+
+    def __init__(self, job_id, args=(), callback=None, pool=None):
+        self.job_id = job_id
+        # Arguments of the job, so the callers are able to tell which
+        # job has failed
+        self.args = args
+        # Jobs are cancelled by the thread that has submitted them
+        self.owner = threading.current_thread().ident
+        self._callback = callback
+        self._pool = pool
+        # Time the job was sent to a worker process, None while it's pending
+        self.dispatched = None
+        self._event = threading.Event()
+        self._success = None
+        self._value = None
+
+    def ready(self):
+        return self._event.is_set()
+
+    def successful(self):
+        if not self.ready():
+            raise ValueError("%r is not ready" % self)
+        return self._success
+
+    def wait(self, timeout=None):
+        self._event.wait(timeout)
+
+    def get(self, timeout=None):
+        """Returns the job result or re-raises the exception raised by job.
+
+        :raises multiprocessing.TimeoutError: if the result isn't ready
+                                              in timeout seconds
+        """
+        self.wait(timeout)
+        if not self.ready():
+            raise multiprocessing.TimeoutError()
+        if self._success:
+            return self._value
+        raise self._value
+
+    def cancel(self):
+        """Cancels the job if it isn't finished yet.
+
+        The worker process running the job is killed and replaced by a new
+        one. The job fails with multiprocessing.TimeoutError.
+        """
+        if self._pool is not None and not self.ready():
+            self._pool._cancel(self)
+
+    def _set(self, success, value):
+        self._success = success
+        self._value = value
+        self._event.set()
+        if self._callback:
+            self._callback(self)
+
+
+class _Worker(object):
+    """Parent side handle of a single worker process.
+
+    Jobs and calls are written to the pipe of the worker by a sender thread
+    in order, so the pool lock is never held while a write is blocked by a
+    busy worker that doesn't read the pipe (e.g. a large shared context).
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.job = None
+        jobs_r, self.jobs = multiprocessing.Pipe(duplex=False)
+        self.results, results_w = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(target=_worker_loop,
+                                               args=(jobs_r, results_w))
+        self.process.daemon = True
+        self.process.start()
+        jobs_r.close()
+        results_w.close()
+        self._outbox = Queue.Queue()
+        self.listener = threading.Thread(target=self._listen)
+        self.listener.daemon = True
+        self.listener.start()
+        self.sender = threading.Thread(target=self._send)
+        self.sender.daemon = True
+        self.sender.start()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def send(self, job):
+        self.job = job[0]
+        self._outbox.put(job)
+
+    def call(self, func, args=()):
+        """Calls func(*args) in the worker process before its next job."""
+        self._outbox.put((None, func, args))
+
+    def stop(self):
+        self._outbox.put(None)
+
+    def _send(self):
+        while True:
+            item = self._outbox.get()
+            try:
+                self.jobs.send(item)
+            except (IOError, OSError):
+                # The worker process is gone, its listener handles that
+                break
+            if item is None:
+                break
+
+    def _listen(self):
+        while True:
+            try:
+                job_id, success, value = self.results.recv()
+            except (EOFError, IOError):
+                self.pool._worker_lost(self)
+                break
+            self.pool._job_done(self, job_id, success, value)
+
+
+class WorkerPool(object):
+    """Pool of long-lived worker processes.
+
+    Unlike multiprocessing.Pool it can be resized without restarting the
+    already running workers, so it can be shared by all the benchmarks of
+    the task.
+    """
+
+    def __init__(self, size=1):
+        self._lock = threading.RLock()
+        self._job_ids = itertools.count()
+        self._workers = []
+        self._pending = collections.deque()
+        self._results = {}
+        self._closed = False
+        self.resize(size)
+
+    @property
+    def size(self):
+        return len(self._workers)
+
+    def resize(self, size):
+        """Sets the number of worker processes.
+
+        New workers are forked right away, extra idle workers are stopped
+        (busy workers are never interrupted).
+        """
+        with self._lock:
+            while len(self._workers) < size:
+                self._workers.append(_Worker(self))
+            for worker in [w for w in self._workers if w.job is None]:
+                if len(self._workers) <= max(size, 1):
+                    break
+                self._workers.remove(worker)
+                worker.stop()
+            self._dispatch()
+
+    def apply_async(self, func, args=(), callback=None):
+        """Schedules func(*args) to be called in a worker process.
+
+        :param callback: function that is called with the AsyncResult object
+                         as soon as the job is finished
+        :returns: AsyncResult object
+        """
+        with self._lock:
+            if self._closed:
+                raise exceptions.WorkerPoolClosed()
+            job_id = next(self._job_ids)
+            result = AsyncResult(job_id, args=args, callback=callback,
+                                 pool=self)
+            self._results[job_id] = result
+            self._pending.append((job_id, func, args))
+            self._dispatch()
+        return result
+
+    def imap_unordered(self, func, iterable, concurrency=None, timeout=None):
+        """Runs func(args) for each args from iterable.
+
+        At most `concurrency` jobs are running at the same time, the next
+        element of iterable is consumed only when one of them is finished.
+        `concurrency` may also be a function returning the current limit, so
+        it can be changed while the jobs are running.
+
+        :param timeout: seconds after which the job is cancelled, so
+                        result.get() raises TimeoutError, they are counted
+                        since the job is sent to a worker process
+        :returns: generator of AsyncResult objects in order of their
+                  completion
+        """
+        limit = concurrency if callable(concurrency) else (
+            lambda: concurrency or self.size)
+        done = Queue.Queue()
+        running = set()
+        iterator = iter(iterable)
+        exhausted = False
+
+        while True:
+            while not exhausted and len(running) < limit():
+                try:
+                    args = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                running.add(self.apply_async(func, (args,),
+                                             callback=done.put))
+
+            if not running:
+                break
+
+            deadlines = [r.dispatched + timeout for r in running
+                         if timeout and r.dispatched is not None]
+            wait = POLL_INTERVAL
+            if deadlines:
+                wait = max(min(min(deadlines) - time.time(), wait), 0)
+            try:
+                result = done.get(timeout=wait)
+            except Queue.Empty:
+                now = time.time()
+                for result in list(running):
+                    if (timeout and result.dispatched is not None and
+                            result.dispatched + timeout <= now):
+                        running.remove(result)
+                        result.cancel()
+                        yield result
+                continue
+            if result in running:
+                running.remove(result)
+                yield result
+
+    def map(self, func, iterable, concurrency=None):
+        """Returns list of func(args) for each args from iterable."""
+        results = list(self.imap_unordered(func, iterable, concurrency))
+        results.sort(key=lambda r: r.job_id)
+        return [r.get() for r in results]
+
+    def shutdown(self, timeout=5):
+        """Stops all the workers, running jobs are killed after timeout."""
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+            self._pending.clear()
+        for worker in workers:
+            worker.stop()
+        deadline = time.time() + timeout
+        for worker in workers:
+            worker.process.join(max(deadline - time.time(), 0))
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+
+    def _dispatch(self):
+        for worker in self._workers:
+            if not self._pending:
+                break
+            if worker.job is None:
+                job = self._pending.popleft()
+                self._results[job[0]].dispatched = time.time()
+                worker.send(job)
+
+    def _job_done(self, worker, job_id, success, value):
+        with self._lock:
+            worker.job = None
+            result = self._results.pop(job_id, None)
+            if worker not in self._workers:
+                worker.stop()
+            self._dispatch()
+        if result:
+            result._set(success, value)
+
+    def call_all(self, func, args=()):
+        """Calls func(*args) once in every worker process.
+
+        The call is queued before the next job of every worker, this method
+        doesn't wait for the workers to receive it.
+        """
+        with self._lock:
+            for worker in self._workers:
+                worker.call(func, args)
+
+    def cancel_all(self, owner=None):
+        """Cancels all the pending and running jobs.
+
+        :param owner: ident of the thread to cancel the jobs of, the jobs of
+                      all the threads are cancelled by default
+        """
+        with self._lock:
+            results = [r for r in self._results.values()
+                       if owner is None or r.owner == owner]
+        for result in results:
+            result.cancel()
+
+    def _cancel(self, result):
+        with self._lock:
+            if self._results.pop(result.job_id, None) is None:
+                # The job has just finished
+                return
+            for job in self._pending:
+                if job[0] == result.job_id:
+                    self._pending.remove(job)
+                    break
+            for i, worker in enumerate(self._workers):
+                if worker.job == result.job_id:
+                    LOG.warning("Killing worker process %s running the "
+                                "timed out job." % worker.pid)
+                    worker.job = None
+                    self._workers[i] = _Worker(self)
+                    worker.process.terminate()
+                    self._dispatch()
+                    break
+        result._set(False, multiprocessing.TimeoutError())
+
+    def _worker_lost(self, worker):
+        with self._lock:
+            job_id, worker.job = worker.job, None
+            result = self._results.pop(job_id, None)
+            if not self._closed and worker in self._workers:
+                LOG.warning("Worker process %s died unexpectedly, "
+                            "restarting it." % worker.pid)
+                self._workers[self._workers.index(worker)] = _Worker(self)
+                self._dispatch()
+        if result:
+            result._set(False, exceptions.WorkerJobFailure(
+                reason="worker process %s died" % worker.pid))
+
+
+def get_pool(size=None):
+    """Returns the task-wide worker pool, starting it if needed.
+
+    Benchmarks run at the same time (each in its own thread) share the
+    pool, so it's grown to the sum of the sizes required by all of them,
+    but not above `max_concurrency`. The pool is never shrunk by this
+    function.
+
+    :param size: number of worker processes required by the benchmark run
+                 in the current thread
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if size:
+            ident = threading.current_thread().ident
+            _DEMAND[ident] = max(_DEMAND.get(ident, 0), size)
+        required = sum(_DEMAND.values())
+        if CONF.benchmark.max_concurrency:
+            required = min(required, CONF.benchmark.max_concurrency)
+        if _POOL is None:
+            _POOL = WorkerPool(required or 1)
+        elif _POOL.size < required:
+            _POOL.resize(required)
+        return _POOL
+
+
+def release_pool():
+    """Drops the worker processes required by the current thread.
+
+    It's called when the benchmark run in the current thread is finished,
+    so the workers can be used by the other benchmarks.
+    """
+    with _POOL_LOCK:
+        _DEMAND.pop(threading.current_thread().ident, None)
+
+
+def share(value):
+    """Makes value available to all the jobs of the task-wide worker pool.
+
+    The value is sent to every worker process once instead of being
+    pickled with the arguments of every job.
+
+    :returns: key to pass to get_shared() in jobs and to unshare()
+    """
+    key = next(_shared_keys)
+    _SHARED[key] = value
+    if _POOL is not None:
+        _POOL.call_all(_install_shared, (key, value))
+    return key
+
+
+def get_shared(key):
+    """Returns the value shared by share() with the given key."""
+    return _SHARED[key]
+
+
+def unshare(key):
+    """Removes the shared value from the parent and worker processes."""
+    _remove_shared(key)
+    if _POOL is not None:
+        _POOL.call_all(_remove_shared, (key,))
+
+
+def call_all(func, args=()):
+    """Calls func(*args) in every worker process of the task-wide pool.
+
+    Workers forked later don't get the call, they inherit the state of the
+    parent process instead.
+    """
+    if _POOL is not None:
+        _POOL.call_all(func, args)
+
+
+def cancel_jobs(owner=None):
+    """Cancels the jobs of the task-wide worker pool.
+
+    :param owner: ident of the thread to cancel the jobs of, all the jobs
+                  are cancelled by default
+    """
+    if _POOL is not None:
+        _POOL.cancel_all(owner)
+
+
+@atexit.register
+def shutdown_pool():
+    """Stops the task-wide worker pool."""
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown()
+        _POOL = None
+    _DEMAND.clear()
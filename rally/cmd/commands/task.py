@@ -17,6 +17,7 @@
 
 from __future__ import print_function
 
+import collections
 import json
 import os
 import pprint
@@ -74,7 +75,11 @@ class TaskCommands(object):
     @cliutils.args('--uuid', type=str, dest='task_id', help='UUID of task')
     @envutils.with_default_task_id
     def abort(self, task_id=None):
-        """Force abort task
+        """Abort running task
+
+        New iterations aren't started, the running ones are given a grace
+        period to finish. Results collected so far are kept and contexts
+        are cleaned up.
 
         :param task_id: Task uuid
         """
@@ -108,55 +113,87 @@ class TaskCommands(object):
         Prints detailed information of task.
         """
         def _print_iterations_data(raw):
-            headers = ['iteration', "full duration"]
-            float_cols = ['full duration']
-            for i in range(0, len(raw)):
-                if raw[i]['atomic_actions']:
-                    for (c, a) in enumerate(raw[i]['atomic_actions'], 1):
-                        action = str(c) + "-" + a['action']
-                        headers.append(action)
-                        float_cols.append(action)
-                    break
+            paths = utils.atomic_paths(raw)
+            headers = ['iteration', "full duration"] + paths
+            float_cols = ['full duration'] + paths
             table_rows = []
             formatters = dict(zip(float_cols,
                                   [cliutils.pretty_float_formatter(col, 3)
                                    for col in float_cols]))
             for (c, r) in enumerate(raw, 1):
-                dlist = [c]
-                d = []
-                if r['atomic_actions']:
-                    for l in r['atomic_actions']:
-                        d.append(l['duration'])
-                    dlist.append(sum(d))
-                    dlist = dlist + d
-                    table_rows.append(rutils.Struct(**dict(zip(headers,
-                                                               dlist))))
+                durations = utils.atomic_durations(r)
+                if durations:
+                    # Full duration is the one of the top-level actions
+                    full = sum(d for path, (d, count) in durations.items()
+                               if utils.ATOMIC_PATH_SEPARATOR not in path)
+                    data = [c, full] + [durations[path][0]
+                                        if path in durations else None
+                                        for path in paths]
                 else:
-                    data = dlist + ["N/A" for i in range(1, len(headers))]
-                    table_rows.append(rutils.Struct(**dict(zip(headers,
-                                                               data))))
+                    data = [c] + [None for i in range(1, len(headers))]
+                table_rows.append(rutils.Struct(**dict(zip(headers, data))))
             common_cliutils.print_list(table_rows,
                                        fields=headers,
                                        formatters=formatters)
             print()
 
         def _get_atomic_action_durations(raw):
-            atomic_actions_names = []
+            """Returns durations, iteration and repeat counts of actions.
+
+            Iterations may run different actions (e.g. in a mixed
+            workload), so the actions of all of them are collected.
+            Durations of the actions are aggregated by their path, the
+            iteration count of an action is the number of iterations of the
+            scenarios that run it, the repeat count is the max number of
+            times it ran in one iteration.
+            """
+            iterations = collections.Counter(r.get("scenario") for r in raw)
+            durations = collections.OrderedDict()
+            scenarios = {}
+            repeats = {}
             for r in raw:
-                if 'atomic_actions' in r:
-                    for a in r['atomic_actions']:
-                        atomic_actions_names.append(a["action"])
-                    break
+                for path, (duration, count) in (
+                        utils.atomic_durations(r).items()):
+                    durations.setdefault(path, []).append(duration)
+                    scenarios.setdefault(path, set()).add(r.get("scenario"))
+                    repeats[path] = max(repeats.get(path, 1), count)
+            counts = dict((path, sum(iterations[s] for s in scenarios[path]))
+                          for path in durations)
+            return durations, counts, repeats
+
+        def _get_scenario_durations(raw):
             result = {}
-            for atomic_action in atomic_actions_names:
-                result[atomic_action] = utils.get_durations(
-                    raw,
-                    lambda r: next(a["duration"] for a in r["atomic_actions"]
-                                   if a["action"] == atomic_action),
-                    lambda r: any((a["action"] == atomic_action)
-                                  for a in r["atomic_actions"]))
+            for r in raw:
+                if "scenario" in r:
+                    durations = result.setdefault(r["scenario"], [])
+                    durations.append(None if r["error"] else r["duration"])
             return result
 
+        def _stats_row(action, durations, count, repeats=1):
+            durations = [d for d in durations if d is not None]
+            if durations:
+                data = [action,
+                        min(durations),
+                        utils.mean(durations),
+                        max(durations),
+                        utils.percentile(durations, 0.90),
+                        utils.percentile(durations, 0.95),
+                        "%.1f%%" % (len(durations) * 100.0 / count),
+                        count, repeats]
+            else:
+                data = [action, None, None, None, None, None, 0, count,
+                        repeats]
+            return rutils.Struct(**dict(zip(table_cols, data)))
+
+        table_cols = ["action", "min (sec)", "avg (sec)", "max (sec)",
+                      "90 percentile", "95 percentile", "success", "count",
+                      "repeats"]
+        float_cols = ["min (sec)", "avg (sec)", "max (sec)",
+                      "90 percentile", "95 percentile"]
+        formatters = dict(zip(float_cols,
+                              [cliutils.pretty_float_formatter(col, 3)
+                               for col in float_cols]))
+
         if task_id == "last":
             task = db.task_get_detailed_last()
             task_id = task.uuid
@@ -186,7 +223,7 @@ class TaskCommands(object):
                 print(yaml.safe_load(verification[2]))
             return
 
-        for result in task["results"]:
+        for result in utils.merge_results(task["results"]):
             key = result["key"]
             print("-" * 80)
             print()
@@ -195,42 +232,76 @@ class TaskCommands(object):
             print("args values:")
             pprint.pprint(key["kw"])
 
-            raw = result["data"]["raw"]
-            table_cols = ["action", "min (sec)", "avg (sec)", "max (sec)",
-                          "90 percentile", "95 percentile", "success",
-                          "count"]
-            float_cols = ["min (sec)", "avg (sec)", "max (sec)",
-                          "90 percentile", "95 percentile"]
-            formatters = dict(zip(float_cols,
-                                  [cliutils.pretty_float_formatter(col, 3)
-                                   for col in float_cols]))
+            raw = utils.measured_results(result["data"]["raw"])
+            warmup = len(result["data"]["raw"]) - len(raw)
             table_rows = []
 
-            action_durations = _get_atomic_action_durations(raw)
-            actions_list = action_durations.keys()
+            action_durations, action_counts, action_repeats = (
+                _get_atomic_action_durations(raw))
+            actions_list = list(action_durations)
             action_durations["total"] = utils.get_durations(
                         raw, lambda x: x["duration"], lambda r: not r["error"])
             actions_list.append("total")
+            if any("scheduled_start" in r for r in raw):
+                action_durations["total (corrected)"] = utils.get_durations(
+                    raw, utils.corrected_duration, lambda r: not r["error"])
+                actions_list.append("total (corrected)")
             for action in actions_list:
-                durations = action_durations[action]
-                if durations:
-                    data = [action,
-                            min(durations),
-                            utils.mean(durations),
-                            max(durations),
-                            utils.percentile(durations, 0.90),
-                            utils.percentile(durations, 0.95),
-                            "%.1f%%" % (len(durations) * 100.0 / len(raw)),
-                            len(raw)]
-                else:
-                    data = [action, None, None, None, None, None, 0, len(raw)]
-                table_rows.append(rutils.Struct(**dict(zip(table_cols, data))))
+                table_rows.append(_stats_row(
+                    action, action_durations[action],
+                    action_counts.get(action, len(raw)),
+                    action_repeats.get(action, 1)))
 
             common_cliutils.print_list(table_rows, fields=table_cols,
                                        formatters=formatters)
 
+            scenario_durations = _get_scenario_durations(raw)
+            if scenario_durations:
+                print(_("\nScenarios of the mixed workload:"))
+                common_cliutils.print_list(
+                    [_stats_row(name, durations, len(durations))
+                     for name, durations in
+                     sorted(scenario_durations.items())],
+                    fields=table_cols, formatters=formatters)
+
+            timed_out = len([r for r in raw if r.get("timed_out")])
+            if timed_out:
+                print(_("%(timed_out)d of %(count)d iterations timed out "
+                        "and were cancelled.")
+                      % {"timed_out": timed_out, "count": len(raw)})
+
+            lags = filter(lambda lag: lag is not None,
+                          map(utils.scheduling_lag, raw))
+            if lags:
+                print(_("Scheduling lag (actual minus intended start): "
+                        "avg %(avg).3f sec, max %(max).3f sec. Corrected "
+                        "durations include it.")
+                      % {"avg": utils.mean(lags), "max": max(lags)})
+
+            cpu_durations = [r["cpu_duration"] for r in raw
+                             if "cpu_duration" in r]
+            if cpu_durations:
+                print(_("Client CPU time per iteration: avg %(avg).3f sec, "
+                        "max %(max).3f sec.")
+                      % {"avg": utils.mean(cpu_durations),
+                         "max": max(cpu_durations)})
+
+            if warmup:
+                print(_("%d warm-up iterations are excluded from the "
+                        "statistics.") % warmup)
+
             if iterations_data:
-                _print_iterations_data(raw)
+                _print_iterations_data(result["data"]["raw"])
+
+            if result["data"].get("info"):
+                print("\nRunner info:")
+                pprint.pprint(result["data"]["info"])
+
+            if result["data"].get("sla"):
+                print("\nSLA:")
+                common_cliutils.print_list(
+                    [rutils.Struct(**sla) for sla in result["data"]["sla"]],
+                    fields=["criterion", "success", "detail"])
 
             # NOTE(hughsaunders): ssrs=scenario specific results
             ssrs = []
@@ -293,7 +364,8 @@ class TaskCommands(object):
         :param pretty: Pretty print (pprint) or not (json)
         """
         results = map(lambda x: {"key": x["key"], 'result': x['data']['raw']},
-                      db.task_result_get_all_by_uuid(task_id))
+                      utils.merge_results(
+                          db.task_result_get_all_by_uuid(task_id)))
 
         if results:
             if not pretty or pretty == 'json':
@@ -327,7 +399,8 @@ class TaskCommands(object):
     @envutils.with_default_task_id
     def plot2html(self, task_id=None, out=None, open_it=False):
         results = map(lambda x: {"key": x["key"], 'result': x['data']['raw']},
-                      db.task_result_get_all_by_uuid(task_id))
+                      utils.merge_results(
+                          db.task_result_get_all_by_uuid(task_id)))
 
         output_file = out or ("%s.html" % task_id)
         with open(output_file, "w+") as f:
@@ -336,6 +409,32 @@ class TaskCommands(object):
         if open_it:
             webbrowser.open_new_tab("file://" + os.path.realpath(output_file))
 
+    @cliutils.args('--uuid', type=str, dest='task_id', help='uuid of task')
+    @cliutils.args('--json', dest='tojson', action='store_true',
+                   help='output in json format')
+    @envutils.with_default_task_id
+    def sla_check(self, task_id=None, tojson=False):
+        """Check if the task passed the SLA of its benchmarks.
+
+        :param task_id: Task uuid
+        :param tojson: Print the results in json format
+        :returns: 0 if the SLA of all the benchmarks is met, 1 otherwise
+        """
+        rows = []
+        for result in utils.merge_results(
+                db.task_result_get_all_by_uuid(task_id)):
+            for sla in result["data"].get("sla", []):
+                rows.append(dict(sla, benchmark=result["key"]["name"],
+                                 pos=result["key"]["pos"]))
+
+        if tojson:
+            print(json.dumps(rows))
+        else:
+            common_cliutils.print_list(
+                [rutils.Struct(**row) for row in rows],
+                fields=["benchmark", "pos", "criterion", "success", "detail"])
+        return 0 if all(row["success"] for row in rows) else 1
+
     @cliutils.args('--force', action='store_true', help='force delete')
     @cliutils.args('--uuid', type=str, dest='task_id', nargs="*",
                    metavar="TASK_ID",
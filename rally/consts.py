@@ -43,8 +43,10 @@ class _TaskStatus(utils.ImmutableMixin, utils.EnumMixin):
     VERIFYING = "verifying"
     SETTING_UP = "setting up"
     RUNNING = "running"
+    ABORTING = "aborting"
     CLEANING_UP = "cleaning up"
     FINISHED = "finished"
+    ABORTED = "aborted"
     FAILED = "failed"
 
 
@@ -72,6 +74,14 @@ class _RunnerType(utils.ImmutableMixin, utils.EnumMixin):
     CONSTANT = "constant"
     CONSTANT_FOR_DURATION = "constant_for_duration"
     PERIODIC = "periodic"
+    RPS = "rps"
+    STEP_RAMP = "step_ramp"
+    CONSTANT_THREADS = "constant_threads"
+    HYBRID = "hybrid"
+    DISTRIBUTED = "distributed"
+    ADAPTIVE = "adaptive"
+    TRACE = "trace"
+    MIXED = "mixed"
 
 
 TaskStatus = _TaskStatus()
@@ -115,6 +115,23 @@ def task_update(uuid, values):
     return IMPL.task_update(uuid, values)
 
 
+def task_update_status(uuid, status, allowed_statuses):
+    """Update the status of the task if its current status is allowed.
+
+    The check and the update are atomic, so concurrent updates of the
+    status (e.g. an abort of the running task) aren't lost.
+
+    :param uuid: UUID of the task.
+    :param status: new status of the task.
+    :param allowed_statuses: list of statuses the task may be updated from.
+    :raises: :class:`rally.exceptions.TaskNotFound` if the task does not exist.
+    :raises: :class:`rally.exceptions.TaskInvalidStatus` if the status
+             of the task is not one of the allowed statuses.
+    :returns: new updated task dict with data on the task.
+    """
+    return IMPL.task_update_status(uuid, status, allowed_statuses)
+
+
 def task_list(status=None):
     """Get a list of tasks.
 
@@ -131,6 +131,20 @@ class Connection(object):
             task.update(values)
         return task
 
+    def task_update_status(self, uuid, status, allowed_statuses):
+        session = get_session()
+        with session.begin():
+            count = self.model_query(models.Task, session=session).\
+                        filter_by(uuid=uuid).\
+                        filter(models.Task.status.in_(allowed_statuses)).\
+                        update({"status": status}, synchronize_session=False)
+            if not count:
+                task = self._task_get(uuid, session=session)
+                raise exceptions.TaskInvalidStatus(
+                    uuid=uuid, actual=task.status,
+                    require=", ".join(allowed_statuses))
+        return self._task_get(uuid)
+
     def task_list(self, status=None):
         query = self.model_query(models.Task)
         if status is not None:
@@ -168,6 +182,7 @@ class Connection(object):
     def task_result_get_all_by_uuid(self, uuid):
         return self.model_query(models.TaskResult).\
                     filter_by(task_uuid=uuid).\
+                    order_by(models.TaskResult.id).\
                     all()
 
     def _deployment_get(self, uuid, session=None):
@@ -172,7 +172,8 @@ class TaskResult(BASE, RallyBase):
 
     task_uuid = sa.Column(sa.String(36), sa.ForeignKey('tasks.uuid'))
     task = sa.orm.relationship(Task,
-                               backref=sa.orm.backref('results'),
+                               backref=sa.orm.backref('results',
+                                                      order_by=id),
                                foreign_keys=task_uuid,
                                primaryjoin='TaskResult.task_uuid == Task.uuid')
 
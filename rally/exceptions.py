@@ -237,3 +237,28 @@ class NoNodesFound(RallyException):
 
 class UnknownRelease(RallyException):
     msg_fmt = _("Unknown release '%(release)s'")
+
+
+class WorkerPoolClosed(RallyException):
+    msg_fmt = _("Worker pool is already shut down.")
+
+
+class WorkerJobFailure(RallyException):
+    msg_fmt = _("Job failed in the worker process: %(reason)s")
+
+
+class AgentFailure(RallyException):
+    msg_fmt = _("Load generator agent on %(host)s failed: %(reason)s")
+
+
+class InvalidTrace(InvalidArgumentsException):
+    msg_fmt = _("Invalid arrival trace %(path)s: %(reason)s")
+
+
+class InsecureTokenStore(RallyException):
+    msg_fmt = _("Keystone token store %(path)s is insecure: %(reason)s")
+
+
+class ResourcePoolExhausted(RallyException):
+    msg_fmt = _("No %(kind)s of tenant %(tenant)s are available in the "
+                "resource pool.")
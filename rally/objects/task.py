@@ -42,8 +42,23 @@ class Task(object):
     def _update(self, values):
         self.task = db.task_update(self.task['uuid'], values)
 
-    def update_status(self, status):
-        self._update({'status': status})
+    def update_status(self, status, allowed_statuses=None):
+        """Updates the status of the task.
+
+        :param allowed_statuses: if given, the status is updated only if
+                                 the current one is one of them, otherwise
+                                 TaskInvalidStatus is raised
+        """
+        if allowed_statuses is None:
+            self._update({'status': status})
+        else:
+            self.task = db.task_update_status(self.task['uuid'], status,
+                                              allowed_statuses)
+
+    def get_status(self):
+        """Returns the current status of the task stored in the DB."""
+        self.task = db.task_get(self.task['uuid'])
+        return self.task['status']
 
     def update_verification_log(self, log):
         self._update({'verification_log': json.dumps(log)})
@@ -112,8 +112,24 @@ def start_task(deploy_uuid, config, task=None):
 
 
 def abort_task(task_uuid):
-    """Abort running task."""
-    raise NotImplementedError()
+    """Abort running task.
+
+    The benchmark engine running the task notices the new status of the
+    task, stops starting new iterations and gives the running ones a grace
+    period to finish. Results of the finished iterations are stored and
+    contexts are cleaned up as usual, then the task gets the "aborted"
+    status.
+
+    :param task_uuid: The UUID of the task.
+    :raises: :class:`rally.exceptions.TaskInvalidStatus` when the task
+             isn't running
+    """
+    objects.Task.get(task_uuid).update_status(
+        consts.TaskStatus.ABORTING,
+        allowed_statuses=[consts.TaskStatus.INIT,
+                          consts.TaskStatus.VERIFYING,
+                          consts.TaskStatus.SETTING_UP,
+                          consts.TaskStatus.RUNNING])
 
 
 def delete_task(task_uuid, force=False):
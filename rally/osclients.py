@@ -23,10 +23,13 @@ from keystoneclient.v2_0 import client as keystone
 from neutronclient.neutron import client as neutron
 from novaclient import client as nova
 from muranoclient import client as mclient
+import os
 from oslo.config import cfg
+import threading
 import urlparse
 
 from rally import exceptions
+from rally import tokenstore
 
 
 CONF = cfg.CONF
@@ -36,12 +39,109 @@ CONF.register_opts([
     cfg.BoolOpt("https_insecure", default=False,
                 help="Use SSL for all OpenStack API interfaces"),
     cfg.StrOpt("https_cacert", default=None,
-               help="Path to CA server cetrificate for SSL")
+               help="Path to CA server cetrificate for SSL"),
+    cfg.IntOpt("openstack_client_token_stale_duration", default=120,
+               help="Cached clients are recreated if their keystone token "
+                    "expires in less than this number of seconds"),
+    cfg.StrOpt("keystone_token_store",
+               default="~/.rally/keystone-tokens.sqlite",
+               help="Path to the sqlite database with keystone tokens "
+                    "shared by all the Rally processes of the user. It "
+                    "must not be accessible by other users. Set to an "
+                    "empty string to authenticate every client")
 ])
 
+# Clients are cached per process: their connections can't be shared with
+# the forked worker processes.
+_CACHE = {"pid": None, "clients": {}, "token_store": None}
+_CACHE_LOCK = threading.RLock()
 
-# NOTE(boris-42): super dirty hack to fix nova python client 2.17 thread safe
-nova._adapter_pool = lambda x: nova.adapters.HTTPAdapter()
+
+def _process_cache():
+    if _CACHE["pid"] != os.getpid():
+        _CACHE.update({"pid": os.getpid(), "clients": {}})
+    return _CACHE
+
+
+def get_token_store():
+    """Returns the keystone token store or None if it's disabled."""
+    if not CONF.keystone_token_store:
+        return None
+    path = os.path.expanduser(CONF.keystone_token_store)
+    with _CACHE_LOCK:
+        store = _CACHE["token_store"]
+        if store is None or store.path != path:
+            stale_duration = CONF.openstack_client_token_stale_duration
+            store = tokenstore.TokenStore(path, stale_duration=stale_duration)
+            _CACHE["token_store"] = store
+        return store
+
+
+def is_unauthorized(exc):
+    """Checks if the exception is a 401 response of any OpenStack client."""
+    if isinstance(exc, keystone_exceptions.Unauthorized):
+        return True
+    return 401 in (getattr(exc, "code", None),
+                   getattr(exc, "http_status", None),
+                   getattr(exc, "status_code", None))
+
+
+def evict_token(endpoint):
+    """Forgets the keystone token of the endpoint.
+
+    The cached clients of the endpoint and its token in the token store are
+    dropped, so the next clients authenticate again. It's called when the
+    token is rejected, e.g. keystone was redeployed meanwhile.
+    """
+    with _CACHE_LOCK:
+        _process_cache()["clients"].pop(_clients_key(endpoint), None)
+    store = get_token_store()
+    if store is not None:
+        store.evict(tokenstore.endpoint_key(endpoint))
+
+
+def forget_tokens(endpoints):
+    """Removes the tokens of the endpoints from the token store.
+
+    It's called when the users of the endpoints are deleted. Expired tokens
+    of all the endpoints are removed too, so the store doesn't grow with
+    every task.
+    """
+    store = get_token_store()
+    if store is not None:
+        store.prune([tokenstore.endpoint_key(e) for e in endpoints])
+
+
+def _clients_key(endpoint):
+    return tuple(sorted(endpoint.to_dict(include_permission=True).items()))
+
+
+def cached_clients(endpoint):
+    """Returns Clients for the endpoint cached in this process.
+
+    Cached clients are reused by all the iterations run by the process, so
+    they don't authenticate in keystone again and again. Clients are
+    recreated when their keystone token is about to expire.
+    """
+    key = _clients_key(endpoint)
+    with _CACHE_LOCK:
+        clients = _process_cache()["clients"].get(key)
+        if clients is None or clients.token_expires_soon():
+            clients = Clients(endpoint)
+            _CACHE["clients"][key] = clients
+        return clients
+
+
+def forget_clients(endpoints):
+    """Drops the cached clients of the endpoints in this process.
+
+    It's called when the users of the endpoints are deleted, so the cache
+    doesn't keep the clients of all the users ever created.
+    """
+    with _CACHE_LOCK:
+        clients = _process_cache()["clients"]
+        for endpoint in endpoints:
+            clients.pop(_clients_key(endpoint), None)
 
 
 class Clients(object):
@@ -55,6 +155,14 @@ class Clients(object):
         """Remove all cached client handles."""
         self.cache = {}
 
+    def token_expires_soon(self):
+        """Checks if the token of the cached keystone client expires soon."""
+        client = self.cache.get("keystone")
+        if not client or not client.auth_ref:
+            return False
+        return client.auth_ref.will_expire_soon(
+            CONF.openstack_client_token_stale_duration)
+
     def memoize(name):
         """Cache client handles."""
         def decorate(func):
@@ -71,7 +179,12 @@ class Clients(object):
 
     @memoize('keystone')
     def keystone(self):
-        """Return keystone client."""
+        """Return keystone client.
+
+        The token and the service catalog are taken from the token store
+        shared by the Rally processes, keystone is asked for a new token
+        only if there is no valid one in the store.
+        """
         new_kw = {
             "timeout": CONF.openstack_client_http_timeout,
             "insecure": CONF.https_insecure, "cacert": CONF.https_cacert
@@ -88,8 +201,24 @@ class Clients(object):
                 )
             else:
                 kw["endpoint"] = kw["auth_url"]
-        client = keystone.Client(**kw)
-        client.authenticate()
+
+        store = get_token_store()
+        if store is None:
+            client = keystone.Client(**kw)
+            client.authenticate()
+            return client
+
+        key = tokenstore.endpoint_key(self.endpoint)
+        auth_ref = store.get(key)
+        if auth_ref is not None:
+            return keystone.Client(auth_ref=auth_ref, **kw)
+        try:
+            client = keystone.Client(**kw)
+            client.authenticate()
+        except Exception:
+            store.release(key)
+            raise
+        store.put(key, client.auth_ref)
         return client
 
     def verified_keystone(self):
@@ -113,7 +242,11 @@ class Clients(object):
 
     @memoize('nova')
     def nova(self, version='2'):
-        """Returns nova client."""
+        """Returns nova client.
+
+        The client keeps its HTTP connections alive, so they are reused by
+        all the iterations sharing the cached client.
+        """
         client = nova.Client(version,
                              self.endpoint.username,
                              self.endpoint.password,
@@ -124,7 +257,8 @@ class Clients(object):
                              http_log_debug=CONF.debug,
                              timeout=CONF.openstack_client_http_timeout,
                              insecure=CONF.https_insecure,
-                             cacert=CONF.https_cacert)
+                             cacert=CONF.https_cacert,
+                             connection_pool=True)
         return client
 
     @memoize('neutron')
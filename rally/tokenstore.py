@@ -0,0 +1,206 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextlib
+import errno
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+import time
+
+from keystoneclient import access
+
+from rally import exceptions
+
+
+# Seconds a process waits for the database locked by another process.
+LOCK_TIMEOUT = 30
+
+# Interval of checking whether the token being obtained by another process
+# is already in the store.
+POLL_INTERVAL = 0.1
+
+
+def endpoint_key(endpoint):
+    """Returns the key of tokens of the endpoint in the store.
+
+    The password is a part of the key, so tokens are never shared by
+    endpoints with different passwords, but it isn't kept in the store.
+    """
+    data = json.dumps(endpoint.to_dict(include_permission=True),
+                      sort_keys=True)
+    return hashlib.sha1(data).hexdigest()
+
+
+def _check_private(path, fd):
+    """Checks that nobody but the current user can access the file."""
+    st = os.fstat(fd)
+    if st.st_uid != os.getuid():
+        raise exceptions.InsecureTokenStore(path=path,
+                                            reason="owned by another user")
+    if st.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise exceptions.InsecureTokenStore(
+            path=path, reason="accessible by other users")
+
+
+def _open_private(path):
+    """Creates the database file or checks the existing one.
+
+    The file and its directory, if it doesn't exist, are created accessible
+    only by the current user. An existing file is rejected if it's a
+    symlink or it's owned or accessible by anybody else, so other users
+    can't read the tokens or plant their own ones.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(directory):
+        os.makedirs(directory, 0o700)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY |
+                     os.O_NOFOLLOW, 0o600)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError as e:
+            if e.errno == errno.ELOOP:
+                raise exceptions.InsecureTokenStore(path=path,
+                                                    reason="symlink")
+            raise
+    try:
+        _check_private(path, fd)
+    finally:
+        os.close(fd)
+
+
+class TokenStore(object):
+    """Keystone tokens shared by all the processes of the user.
+
+    Tokens (keystone auth_ref with the service catalog) are kept in a
+    sqlite database. A process that doesn't find a valid token for the
+    endpoint claims its refreshing, authenticates and puts the new token to
+    the store. Meanwhile the other processes either keep using the old
+    token, if it hasn't expired yet, or wait for the new one, so only one
+    process authenticates every user. Tokens are refreshed before they
+    expire, when they are valid for less than `stale_duration` seconds.
+    """
+
+    def __init__(self, path, stale_duration=120, wait=10.0):
+        self.path = path
+        self.stale_duration = stale_duration
+        self.wait = wait
+        _open_private(path)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS tokens "
+                         "(key TEXT PRIMARY KEY, auth_ref TEXT, "
+                         "claimed_until REAL NOT NULL DEFAULT 0)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats "
+                         "(name TEXT PRIMARY KEY, value INTEGER)")
+            conn.executemany("INSERT OR IGNORE INTO stats VALUES (?, 0)",
+                             [("hits",), ("misses",)])
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, conn, name):
+        conn.execute("UPDATE stats SET value = value + 1 WHERE name = ?",
+                     (name,))
+
+    def _claim(self, conn, key):
+        now = time.time()
+        conn.execute("INSERT OR IGNORE INTO tokens (key) VALUES (?)", (key,))
+        return conn.execute("UPDATE tokens SET claimed_until = ? "
+                            "WHERE key = ? AND claimed_until < ?",
+                            (now + self.wait, key, now)).rowcount == 1
+
+    def get(self, key):
+        """Returns the valid token of the key.
+
+        :returns: auth_ref dict or None if the caller has to authenticate
+                  and put() the token
+        """
+        deadline = time.time() + self.wait
+        while True:
+            with self._connect() as conn:
+                row = conn.execute("SELECT auth_ref FROM tokens WHERE key = ?",
+                                   (key,)).fetchone()
+                auth_ref = row and row[0] and json.loads(row[0])
+                if auth_ref:
+                    auth_ref = access.AccessInfo.factory(**auth_ref)
+                    if not auth_ref.will_expire_soon(self.stale_duration):
+                        self._count(conn, "hits")
+                        return auth_ref
+                    if not auth_ref.will_expire_soon(0):
+                        # The token is still valid, so it's used until the
+                        # process which has claimed it refreshes it.
+                        if self._claim(conn, key):
+                            self._count(conn, "misses")
+                            return None
+                        self._count(conn, "hits")
+                        return auth_ref
+                if self._claim(conn, key) or time.time() > deadline:
+                    self._count(conn, "misses")
+                    return None
+            time.sleep(POLL_INTERVAL)
+
+    def put(self, key, auth_ref):
+        """Stores the token of the key and releases its claim."""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO tokens "
+                         "(key, auth_ref, claimed_until) VALUES (?, ?, 0)",
+                         (key, json.dumps(auth_ref)))
+
+    def evict(self, key):
+        """Removes the token of the key, e.g. if it was rejected."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM tokens WHERE key = ?", (key,))
+
+    def prune(self, keys=()):
+        """Removes the tokens of the keys and all the expired tokens.
+
+        Tokens being refreshed by other processes are kept.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM tokens WHERE key = ?",
+                             [(key,) for key in keys])
+            expired = []
+            for key, auth_ref, claimed_until in conn.execute(
+                    "SELECT key, auth_ref, claimed_until FROM tokens"):
+                if claimed_until >= now:
+                    continue
+                if not auth_ref or access.AccessInfo.factory(
+                        **json.loads(auth_ref)).will_expire_soon(0):
+                    expired.append((key,))
+            conn.executemany("DELETE FROM tokens WHERE key = ?", expired)
+
+    def release(self, key):
+        """Releases the claim of the key, e.g. if authentication failed."""
+        with self._connect() as conn:
+            conn.execute("UPDATE tokens SET claimed_until = 0 WHERE key = ?",
+                         (key,))
+
+    def stats(self):
+        """Returns numbers of hits and misses of all the processes."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT name, value FROM stats"))
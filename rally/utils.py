@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ctypes
+import ctypes.util
 import functools
 import imp
 import itertools
@@ -76,19 +78,78 @@ class StdErrCapture(object):
         sys.stderr = self.stderr
 
 
+# NOTE: clock ids of Linux, see <linux/time.h>
+_CLOCK_MONOTONIC = 1
+_CLOCK_THREAD_CPUTIME_ID = 3
+
+
+class _timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+def _posix_clock(clock_id):
+    """Returns a function reading the clock with clock_gettime().
+
+    :returns: function returning the clock value in seconds or None if
+              the clock isn't available
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    for library in (ctypes.util.find_library("rt"),
+                    ctypes.util.find_library("c")):
+        try:
+            clock_gettime = ctypes.CDLL(library, use_errno=True).clock_gettime
+        except (OSError, AttributeError):
+            continue
+        clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_timespec)]
+
+        def clock():
+            t = _timespec()
+            if clock_gettime(clock_id, ctypes.byref(t)):
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno))
+            return t.tv_sec + t.tv_nsec * 1e-9
+
+        try:
+            clock()
+        except OSError:
+            return None
+        return clock
+    return None
+
+
+# Monotonic high-resolution clock, it isn't affected by the system time
+# adjustments (e.g. by NTP), so it's used to measure durations.
+monotonic = (getattr(time, "monotonic", None) or
+             _posix_clock(_CLOCK_MONOTONIC) or time.time)
+
+# CPU time of the current thread (or of the whole process if the former
+# isn't available) in seconds.
+thread_time = (getattr(time, "thread_time", None) or
+               _posix_clock(_CLOCK_THREAD_CPUTIME_ID) or time.clock)
+
+
 class Timer(object):
+    """Measures the duration of the block with the monotonic clock.
+
+    Wall clock timestamps of the start and the finish of the block are
+    kept as well, so the measured blocks can be laid out on a timeline.
+    """
+
     def __enter__(self):
         self.error = None
         self.start = time.time()
+        self._start = monotonic()
         return self
 
     def __exit__(self, type, value, tb):
-        self.finish = time.time()
+        self._finish = monotonic()
+        self.finish = self.start + self.duration()
         if type:
             self.error = (type, value, tb)
 
     def duration(self):
-        return self.finish - self.start
+        return self._finish - self._start
 
 
 class Struct(object):
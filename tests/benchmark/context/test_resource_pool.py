@@ -0,0 +1,200 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+
+import mock
+
+from rally.benchmark.context import resource_pool
+from rally import exceptions
+from tests import test
+
+CTX = "rally.benchmark.context.resource_pool"
+
+
+def _run_concurrent(concurrent, cls, fn, args):
+    return [getattr(cls, fn)(a) for a in args]
+
+
+class ResourcePoolTestCase(test.TestCase):
+
+    def setUp(self):
+        super(ResourcePoolTestCase, self).setUp()
+        self.context = {
+            "task": mock.MagicMock(),
+            "config": {
+                "resource_pool": {
+                    "servers": {"amount": 2, "image_id": "img",
+                                "flavor_id": 1}
+                }
+            },
+            "tenants": [{"id": "t1"}, {"id": "t2"}],
+            "users": [{"tenant_id": "t1", "endpoint": "e1"},
+                      {"tenant_id": "t1", "endpoint": "e1b"},
+                      {"tenant_id": "t2", "endpoint": "e2"}]
+        }
+        self.create = mock.MagicMock(side_effect=["s1", "s2", "s3", "s4"])
+        self.delete = mock.MagicMock()
+        patcher = mock.patch.dict(resource_pool._KINDS,
+                                  {"servers": (self.create, self.delete)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch("%s.osclients" % CTX)
+    @mock.patch("%s.bench_utils.run_concurrent" % CTX,
+                side_effect=_run_concurrent)
+    def test_setup_and_cleanup(self, mock_run_concurrent, mock_osclients):
+        pool = resource_pool.ResourcePool(self.context)
+        pool.setup()
+        lock_dir = self.context["resource_pool"]["lock_dir"]
+        self.assertTrue(os.path.isdir(lock_dir))
+        self.assertEqual({"t1": {"servers": ["s1", "s2"]},
+                          "t2": {"servers": ["s3", "s4"]}},
+                         self.context["resource_pool"]["resources"])
+        self.assertEqual(10, mock_run_concurrent.call_args[0][0])
+        mock_osclients.Clients.assert_has_calls([mock.call("e1"),
+                                                 mock.call("e2")],
+                                                any_order=True)
+
+        pool.cleanup()
+        self.assertEqual(
+            sorted(["s1", "s2", "s3", "s4"]),
+            sorted(c[0][1] for c in self.delete.call_args_list))
+        self.assertFalse(os.path.exists(lock_dir))
+
+    @mock.patch("%s.osclients" % CTX)
+    @mock.patch("%s.bench_utils.run_concurrent" % CTX,
+                side_effect=_run_concurrent)
+    def test_setup_failed(self, mock_run_concurrent, mock_osclients):
+        self.create.side_effect = ["s1", Exception, "s3", "s4"]
+        pool = resource_pool.ResourcePool(self.context)
+        self.assertRaises(exceptions.BenchmarkSetupFailure, pool.setup)
+        self.assertEqual({"t1": {"servers": ["s1"]},
+                          "t2": {"servers": ["s3", "s4"]}},
+                         self.context["resource_pool"]["resources"])
+        pool.cleanup()
+        self.assertEqual(3, self.delete.call_count)
+
+    def test_cleanup_without_setup(self):
+        resource_pool.ResourcePool(self.context).cleanup()
+
+
+class CheckoutTestCase(test.TestCase):
+
+    def setUp(self):
+        super(CheckoutTestCase, self).setUp()
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir)
+        self.context = {
+            "user": {"tenant_id": "t1", "endpoint": "e1"},
+            "resource_pool": {
+                "lock_dir": lock_dir,
+                "resources": {"t1": {"servers": ["s1", "s2"]}}
+            }
+        }
+        self.get_status = mock.MagicMock(return_value="ACTIVE")
+        patcher = mock.patch.dict(resource_pool._KINDS,
+                                  {"servers": (None, None, self.get_status)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("%s.osclients" % CTX)
+        self.osclients = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_checkout(self):
+        with resource_pool.checkout(self.context, "servers") as first:
+            with resource_pool.checkout(self.context, "servers") as second:
+                self.assertEqual(set(["s1", "s2"]), set([first, second]))
+        # The resources are checked in on exit
+        with resource_pool.checkout(self.context, "servers") as first:
+            with resource_pool.checkout(self.context, "servers") as second:
+                self.assertEqual(set(["s1", "s2"]), set([first, second]))
+
+    def test_checkout_checked_in_on_error(self):
+        def _fail():
+            with resource_pool.checkout(self.context, "servers", timeout=0):
+                with resource_pool.checkout(self.context, "servers",
+                                            timeout=0):
+                    raise ValueError()
+
+        self.assertRaises(ValueError, _fail)
+        with resource_pool.checkout(self.context, "servers", timeout=0):
+            with resource_pool.checkout(self.context, "servers", timeout=0):
+                pass
+
+    def test_checkout_empty(self):
+        context = dict(self.context, user={"tenant_id": "t2"})
+        with mock.patch("%s.time.sleep" % CTX) as mock_sleep:
+            self.assertRaises(exceptions.ResourcePoolExhausted,
+                              resource_pool.checkout(context,
+                                                     "servers").__enter__)
+            self.assertRaises(exceptions.ResourcePoolExhausted,
+                              resource_pool.checkout(self.context,
+                                                     "volumes").__enter__)
+        self.assertFalse(mock_sleep.called)
+
+    @mock.patch("%s.time" % CTX)
+    def test_checkout_timeout(self, mock_time):
+        mock_time.time.side_effect = [0, 0, 0, 5, 11]
+        with resource_pool.checkout(self.context, "servers"):
+            with resource_pool.checkout(self.context, "servers"):
+                self.assertRaises(
+                    exceptions.ResourcePoolExhausted,
+                    resource_pool.checkout(self.context, "servers",
+                                           timeout=10).__enter__)
+        mock_time.sleep.assert_called_once_with(
+            resource_pool.CHECKOUT_POLL_INTERVAL)
+
+    def test_checkout_failed_resource(self):
+        self.get_status.return_value = "ERROR"
+        with resource_pool.checkout(self.context, "servers") as failed:
+            pass
+        self.get_status.assert_called_once_with(
+            self.osclients.cached_clients.return_value, failed)
+        self.osclients.cached_clients.assert_called_once_with("e1")
+        # The failed resource isn't checked out anymore
+        self.get_status.return_value = "ACTIVE"
+        for i in range(4):
+            with resource_pool.checkout(self.context, "servers") as other:
+                self.assertNotEqual(failed, other)
+
+        self.get_status.return_value = "ERROR"
+        with resource_pool.checkout(self.context, "servers"):
+            pass
+        with mock.patch("%s.time.sleep" % CTX) as mock_sleep:
+            self.assertRaises(exceptions.ResourcePoolExhausted,
+                              resource_pool.checkout(self.context,
+                                                     "servers").__enter__)
+        self.assertFalse(mock_sleep.called)
+
+    def test_checkout_deleted_resource(self):
+        self.get_status.side_effect = type("NotFound", (Exception,),
+                                           {"code": 404})()
+        with resource_pool.checkout(self.context, "servers") as deleted:
+            pass
+        with resource_pool.checkout(self.context, "servers") as other:
+            self.assertNotEqual(deleted, other)
+
+    def test_checkout_status_unknown(self):
+        self.get_status.side_effect = Exception("timeout")
+        with resource_pool.checkout(self.context, "servers", timeout=0):
+            with resource_pool.checkout(self.context, "servers", timeout=0):
+                pass
+        # The resources are kept in the pool
+        with resource_pool.checkout(self.context, "servers", timeout=0):
+            with resource_pool.checkout(self.context, "servers", timeout=0):
+                pass
@@ -109,6 +109,20 @@ class UserGeneratorTestCase(test.TestCase):
         self.assertEqual(len(fc.keystone().users.list()), 0)
         self.assertEqual(len(fc.keystone().tenants.list()), 0)
 
+    @mock.patch("rally.benchmark.context.users.workers")
+    @mock.patch("rally.benchmark.context.users.osclients")
+    def test_cleanup_forgets_clients(self, mock_osclients, mock_workers):
+        mock_osclients.Clients.return_value = fakes.FakeClients()
+        ctx = users.UserGenerator(self.context)
+        ctx.context["users"] = [{"id": "u1", "endpoint": "e1"},
+                                {"id": "u2", "endpoint": "e2"}]
+        ctx.context["tenants"] = []
+        ctx.cleanup()
+        mock_osclients.forget_clients.assert_called_once_with(["e1", "e2"])
+        mock_workers.call_all.assert_called_once_with(
+            mock_osclients.forget_clients, (["e1", "e2"],))
+        mock_osclients.forget_tokens.assert_called_once_with(["e1", "e2"])
+
     @mock.patch("rally.benchmark.context.users.osclients")
     def test_users_and_tenants_in_context(self, mock_osclients):
         fc = fakes.FakeClients()
@@ -133,6 +133,21 @@ class PlotTestCase(test.TestCase):
             ]
         })
 
+    def test__process_main_time_warmup(self):
+        result = {
+            "result": [
+                {"error": [], "duration": 10, "idle_duration": 0,
+                 "warmup": True},
+                {"error": [], "duration": 1, "idle_duration": 2}
+            ]
+        }
+
+        output = plot._process_main_duration(result)
+
+        self.assertEqual([{"key": "success", "value": 1},
+                          {"key": "errors", "value": 0}], output["pie"])
+        self.assertEqual([[1, 1]], output["iter"][0]["values"])
+
     def test__process_atomic_time(self):
         result = {
             "result": [
@@ -234,3 +249,27 @@ class PlotTestCase(test.TestCase):
                 }
             ]
         })
+
+    def test__process_atomic_different_actions(self):
+        result = {
+            "result": [
+                {"error": [],
+                 "atomic_tree": {"action": ["a", "b", "b"],
+                                 "parent": [-1, 0, 0],
+                                 "start": [0, 0, 1],
+                                 "duration": [3, 1, 2]}},
+                {"error": [],
+                 "atomic_actions": [{"action": "c", "duration": 5}]}
+            ]
+        }
+
+        output = plot._process_atomic(result)
+
+        self.assertEqual([{"key": "a", "values": [[1, 3], [2, 0]]},
+                          {"key": "a > b", "values": [[1, 3], [2, 0]]},
+                          {"key": "c", "values": [[1, 0], [2, 5]]}],
+                         output["iter"])
+        self.assertEqual([{"key": "a", "value": 3.0},
+                          {"key": "a > b", "value": 3.0},
+                          {"key": "c", "value": 5.0}],
+                         output["pie"])
@@ -34,3 +34,71 @@ class ProcessingUtilsTestCase(test.TestCase):
         lst = []
         self.assertRaises(exceptions.InvalidArgumentsException,
                           utils.mean, lst)
+
+    def test_measured_results(self):
+        results = [{"duration": 1, "warmup": True}, {"duration": 2},
+                   {"duration": 3, "warmup": False}]
+        self.assertEqual([{"duration": 2}, {"duration": 3, "warmup": False}],
+                         utils.measured_results(results))
+
+    def test_atomic_durations(self):
+        result = {"atomic_tree": {"action": ["a", "b", "b", "c", "a"],
+                                  "parent": [-1, 0, 0, 2, -1],
+                                  "start": [0, 0, 1, 1, 3],
+                                  "duration": [3, 1, 2, 1, 1]}}
+        self.assertEqual([("a", (4, 2)), ("a > b", (3, 2)),
+                          ("a > b > c", (1, 1))],
+                         utils.atomic_durations(result).items())
+
+    def test_atomic_durations_flat(self):
+        result = {"atomic_actions": [{"action": "a", "duration": 1},
+                                     {"action": "b", "duration": 2},
+                                     {"action": "a", "duration": 3}]}
+        self.assertEqual([("a", (4, 2)), ("b", (2, 1))],
+                         utils.atomic_durations(result).items())
+        self.assertEqual([], utils.atomic_durations({}).items())
+
+    def test_atomic_actions(self):
+        result = {"atomic_tree": {"action": ["a", "b", "c"],
+                                  "parent": [-1, 0, -1],
+                                  "start": [0, 0, 3],
+                                  "duration": [3, 1, None]}}
+        self.assertEqual([{"action": "a", "duration": 3},
+                          {"action": "b", "duration": 1}],
+                         utils.atomic_actions(result))
+        flat = [{"action": "a", "duration": 1}]
+        self.assertEqual(flat, utils.atomic_actions({"atomic_actions": flat}))
+        self.assertEqual([], utils.atomic_actions({}))
+
+    def test_atomic_paths(self):
+        results = [{"atomic_actions": [{"action": "a", "duration": 1}]},
+                   {"atomic_actions": [{"action": "b", "duration": 1},
+                                       {"action": "a", "duration": 1}]}]
+        self.assertEqual(["a", "b"], utils.atomic_paths(results))
+
+    def test_scheduling_lag(self):
+        self.assertEqual(0.5, utils.scheduling_lag(
+            {"scheduled_start": 10, "start": 10.5}))
+        self.assertEqual(0, utils.scheduling_lag(
+            {"scheduled_start": 10, "start": 9.9}))
+        self.assertIsNone(utils.scheduling_lag({"start": 10}))
+        self.assertIsNone(utils.scheduling_lag({"scheduled_start": 10}))
+
+    def test_corrected_duration(self):
+        self.assertEqual(3.5, utils.corrected_duration(
+            {"duration": 3, "scheduled_start": 10, "start": 10.5}))
+        self.assertEqual(3, utils.corrected_duration(
+            {"duration": 3, "start": 10}))
+
+    def test_merge_results(self):
+        results = [
+            {"key": {"name": "a", "pos": 0}, "data": {"raw": [1, 2]}},
+            {"key": {"name": "b", "pos": 0}, "data": {"raw": [5]}},
+            {"key": {"pos": 0, "name": "a"}, "data": {"raw": [3],
+                                                      "info": {"x": 1}}}
+        ]
+        self.assertEqual(
+            [{"key": {"name": "a", "pos": 0},
+              "data": {"raw": [1, 2, 3], "info": {"x": 1}}},
+             {"key": {"name": "b", "pos": 0}, "data": {"raw": [5]}}],
+            utils.merge_results(results))
@@ -0,0 +1,205 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import adaptive
+from rally.benchmark.runners import base
+from rally import consts
+from tests import fakes
+from tests import test
+
+
+def _result(duration, error=False, atomic_actions=None):
+    atomic_actions = atomic_actions or []
+    return {"duration": duration, "error": ["E", "", ""] if error else [],
+            "atomic_tree": {
+                "action": [a["action"] for a in atomic_actions],
+                "parent": [-1] * len(atomic_actions),
+                "start": [0] * len(atomic_actions),
+                "duration": [a["duration"] for a in atomic_actions]}}
+
+
+class AdaptiveHelpersTestCase(test.TestCase):
+
+    def test_latency(self):
+        self.assertEqual(2, adaptive._latency(_result(2)))
+        self.assertEqual(float("inf"),
+                         adaptive._latency(_result(2, error=True)))
+        result = _result(5, atomic_actions=[
+            {"action": "nova.boot_server", "duration": 3},
+            {"action": "nova.delete_server", "duration": 1}])
+        self.assertEqual(3, adaptive._latency(result, "nova.boot_server"))
+        self.assertEqual(float("inf"),
+                         adaptive._latency(result, "nova.reboot_server"))
+
+    def _get_controller(self, **kwargs):
+        params = {"target": 10, "window": 2, "concurrency": 4,
+                  "min_concurrency": 1, "max_concurrency": 6,
+                  "increase_step": 1, "decrease_factor": 0.5,
+                  "headroom": 0.1}
+        params.update(kwargs)
+        return adaptive._ConcurrencyController(**params)
+
+    def test_controller_increase(self):
+        controller = self._get_controller()
+        self.assertFalse(controller.add(1))
+        self.assertTrue(controller.add(1))
+        self.assertEqual(5, controller.concurrency)
+        for i in range(4):
+            controller.add(1)
+        self.assertEqual(6, controller.concurrency)
+        self.assertEqual([4, 5, 6], [w["concurrency"]
+                                     for w in controller.history])
+
+    def test_controller_decrease(self):
+        controller = self._get_controller()
+        controller.add(1)
+        self.assertTrue(controller.add(float("inf")))
+        self.assertEqual(2, controller.concurrency)
+        self.assertIsNone(controller.history[0]["p95"])
+        self.assertFalse(controller.history[0]["target_met"])
+        controller.add(20)
+        controller.add(20)
+        self.assertEqual(1, controller.concurrency)
+        self.assertFalse(controller.add(20))
+        self.assertFalse(controller.add(20))
+        self.assertEqual(1, controller.concurrency)
+
+    def test_controller_hold(self):
+        controller = self._get_controller()
+        controller.add(9.5)
+        self.assertFalse(controller.add(9.5))
+        self.assertEqual(4, controller.concurrency)
+        self.assertTrue(controller.history[0]["target_met"])
+
+    @mock.patch("rally.benchmark.runners.adaptive.time.time")
+    def test_controller_summary(self, mock_time):
+        mock_time.side_effect = [0, 1, 2, 3]
+        controller = self._get_controller()
+        for latency in [1, 1, 1, 1, 20, 20]:
+            controller.add(latency)
+        summary = controller.summary()
+        self.assertEqual([2.0, 2.0, 2.0],
+                         [w["throughput"] for w in summary["windows"]])
+        self.assertEqual(2.0, summary["sustained_throughput"])
+        self.assertEqual(4, summary["sustained_concurrency"])
+        self.assertEqual(3, summary["final_concurrency"])
+        self.assertEqual(10, summary["target_p95"])
+
+    def test_controller_summary_target_never_met(self):
+        controller = self._get_controller()
+        controller.add(20)
+        controller.add(20)
+        summary = controller.summary()
+        self.assertIsNone(summary["sustained_throughput"])
+        self.assertIsNone(summary["sustained_concurrency"])
+
+
+class AdaptiveConcurrencyScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(AdaptiveConcurrencyScenarioRunnerTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+
+    def _get_runner(self, **config):
+        config["type"] = consts.RunnerType.ADAPTIVE
+        return adaptive.AdaptiveConcurrencyScenarioRunner(
+            None, [self.context["admin"]["endpoint"]], config)
+
+    def test_validate(self):
+        configs = [
+            {"type": consts.RunnerType.ADAPTIVE, "target_p95": 60,
+             "times": 100},
+            {"type": consts.RunnerType.ADAPTIVE, "target_p95": 60,
+             "duration": 600, "atomic_action": "nova.boot_server",
+             "window": 20, "concurrency": 5, "min_concurrency": 2,
+             "max_concurrency": 50, "increase_step": 2,
+             "decrease_factor": 0.5, "headroom": 0.2, "timeout": 100}
+        ]
+        for config in configs:
+            adaptive.AdaptiveConcurrencyScenarioRunner.validate(config)
+
+    def test_validate_failed(self):
+        configs = [
+            {"type": consts.RunnerType.ADAPTIVE, "times": 10},
+            {"type": consts.RunnerType.ADAPTIVE, "target_p95": 60},
+            {"type": consts.RunnerType.ADAPTIVE, "target_p95": 60,
+             "times": 10, "duration": 10},
+            {"type": consts.RunnerType.ADAPTIVE, "target_p95": 0,
+             "times": 10},
+            {"type": consts.RunnerType.ADAPTIVE, "target_p95": 60,
+             "times": 10, "decrease_factor": 1}
+        ]
+        for config in configs:
+            self.assertRaises(jsonschema.ValidationError,
+                              adaptive.AdaptiveConcurrencyScenarioRunner
+                              .validate, config)
+
+    def test_get_controller(self):
+        controller = self._get_runner(target_p95=5, times=1, concurrency=100,
+                                      max_concurrency=10)._get_controller()
+        self.assertEqual(10, controller.concurrency)
+        self.assertEqual(5, controller.target)
+        controller = self._get_runner(target_p95=5, times=1,
+                                      min_concurrency=3)._get_controller()
+        self.assertEqual(3, controller.concurrency)
+
+    @mock.patch("rally.benchmark.runners.adaptive.workers.get_pool")
+    def test_run_scenario_adjusts_concurrency(self, mock_get_pool):
+        runner = self._get_runner(target_p95=10, times=4, window=1,
+                                  atomic_action="a")
+        limits = []
+
+        def run_iterations(iter_args, concurrency, timeout):
+            for latency in [1, 1, 20, 1]:
+                yield _result(latency, atomic_actions=[
+                    {"action": "a", "duration": latency}])
+                limits.append(concurrency())
+
+        runner._run_iterations = run_iterations
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(4, len(result))
+        self.assertEqual([2, 3, 2, 3], limits)
+        self.assertEqual(3, result.info["final_concurrency"])
+        self.assertEqual([1, 2, 3, 2], [w["concurrency"]
+                                        for w in result.info["windows"]])
+        mock_get_pool.assert_has_calls([mock.call(1), mock.call(2),
+                                        mock.call(3)])
+
+    def test_run_scenario(self):
+        runner = self._get_runner(target_p95=10, times=4, window=2,
+                                  max_concurrency=2)
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(4, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        self.assertEqual(2, len(result.info["windows"]))
+        self.assertEqual(2, result.info["final_concurrency"])
+        self.assertIsNotNone(result.info["sustained_throughput"])
+
+    def test_run_scenario_exception(self):
+        runner = self._get_runner(target_p95=10, duration=0, window=1,
+                                  concurrency=2)
+        result = runner._run_scenario(fakes.FakeScenario,
+                                      "something_went_wrong",
+                                      self.context, {})
+        self.assertEqual(1, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        self.assertEqual(1, result.info["final_concurrency"])
+        self.assertIsNone(result.info["sustained_throughput"])
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import multiprocessing
+
 import jsonschema
 import mock
 
@@ -20,6 +22,7 @@ from rally.benchmark.runners import base
 from rally.benchmark.runners import constant
 from rally.benchmark.runners import serial
 from rally.benchmark.scenarios import base as base_scenario
+from rally.benchmark.sla import base as sla_base
 from rally import consts
 from rally import exceptions
 from tests import fakes
@@ -30,7 +33,7 @@ class ScenarioHelpersTestCase(test.TestCase):
 
     @mock.patch("rally.benchmark.runners.base.random")
     def test_get_scenario_context(self, mock_random):
-        mock_random.choice = lambda x: x[1]
+        mock_random.randrange.return_value = 1
 
         context = {
             "admin": mock.MagicMock(),
@@ -48,9 +51,36 @@ class ScenarioHelpersTestCase(test.TestCase):
 
         self.assertEqual(expected_context, base._get_scenario_context(context))
 
+    @mock.patch("rally.benchmark.runners.base.workers")
+    def test_get_scenario_context_shared(self, mock_workers):
+        context = {"admin": "admin", "users": ["u0", "u1"]}
+        mock_workers.get_shared.return_value = context
+        self.addCleanup(base._SHARED_CONTEXTS.clear)
+        base._SHARED_CONTEXTS[id(context)] = 5
+
+        scenario_ctx = base._get_scenario_context(context, user=1)
+        self.assertEqual(base._SharedScenarioContext(5, 1), scenario_ctx)
+        self.assertEqual({"admin": "admin", "user": "u1"},
+                         scenario_ctx.resolve())
+        mock_workers.get_shared.assert_called_once_with(5)
+
+    @mock.patch("rally.benchmark.runners.base.osclients")
+    @mock.patch("rally.benchmark.runners.base._SharedScenarioContext.resolve")
+    def test_run_scenario_once_shared_context(self, mock_resolve,
+                                              mock_clients):
+        mock_resolve.return_value = base._get_scenario_context(
+            fakes.FakeUserContext({}).context)
+        scenario_cls = mock.MagicMock()
+        args = (2, scenario_cls, "test", base._SharedScenarioContext(1, 0),
+                {})
+        base._run_scenario_once(args)
+        mock_resolve.assert_called_once_with()
+        self.assertEqual(mock_resolve.return_value,
+                         scenario_cls.call_args[1]["context"])
+
     @mock.patch("rally.benchmark.runners.base.osclients")
     def test_run_scenario_once_internal_logic(self, mock_clients):
-        mock_clients.Clients.return_value = "cl"
+        mock_clients.cached_clients.return_value = "cl"
 
         context = base._get_scenario_context(fakes.FakeUserContext({}).context)
         scenario_cls = mock.MagicMock()
@@ -62,15 +92,23 @@ class ScenarioHelpersTestCase(test.TestCase):
             mock.call().test(),
             mock.call().idle_duration(),
             mock.call().idle_duration(),
-            mock.call().atomic_actions()
+            mock.call().atomic_actions_tree()
         ]
         scenario_cls.assert_has_calls(expected_calls, any_order=True)
 
+    @mock.patch("rally.benchmark.runners.base._run_scenario_once")
+    def test_run_scheduled_scenario_once(self, mock_run_once):
+        mock_run_once.return_value = {"duration": 1, "start": 11}
+        self.assertEqual({"duration": 1, "scheduled_start": 10, "start": 11},
+                         base._run_scheduled_scenario_once((10, "args")))
+        mock_run_once.assert_called_once_with("args")
+
     @mock.patch("rally.benchmark.runners.base.rutils")
     @mock.patch("rally.benchmark.runners.base.osclients")
     def test_run_scenario_once_without_scenario_output(self, mock_clients,
                                                        mock_rutils):
         mock_rutils.Timer = fakes.FakeTimer
+        mock_rutils.thread_time.side_effect = [1, 1.5]
         context = base._get_scenario_context(fakes.FakeUserContext({}).context)
         args = (1, fakes.FakeScenario, "do_it", context, {})
         result = base._run_scenario_once(args)
@@ -78,9 +116,13 @@ class ScenarioHelpersTestCase(test.TestCase):
         expected_reuslt = {
             "duration": fakes.FakeTimer().duration(),
             "idle_duration": 0,
+            "cpu_duration": 0.5,
+            "start": 0,
+            "finish": fakes.FakeTimer().duration(),
             "error": [],
             "scenario_output": {},
-            "atomic_actions": []
+            "atomic_tree": {"action": [], "parent": [], "start": [],
+                            "duration": []}
         }
         self.assertEqual(expected_reuslt, result)
 
@@ -89,6 +131,7 @@ class ScenarioHelpersTestCase(test.TestCase):
     def test_run_scenario_once_with_scenario_output(self, mock_clients,
                                                     mock_rutils):
         mock_rutils.Timer = fakes.FakeTimer
+        mock_rutils.thread_time.side_effect = [1, 1.5]
         context = base._get_scenario_context(fakes.FakeUserContext({}).context)
         args = (1, fakes.FakeScenario, "with_output", context, {})
         result = base._run_scenario_once(args)
@@ -96,9 +139,13 @@ class ScenarioHelpersTestCase(test.TestCase):
         expected_reuslt = {
             "duration": fakes.FakeTimer().duration(),
             "idle_duration": 0,
+            "cpu_duration": 0.5,
+            "start": 0,
+            "finish": fakes.FakeTimer().duration(),
             "error": [],
             "scenario_output": fakes.FakeScenario().with_output(),
-            "atomic_actions": []
+            "atomic_tree": {"action": [], "parent": [], "start": [],
+                            "duration": []}
         }
         self.assertEqual(expected_reuslt, result)
 
@@ -106,6 +153,7 @@ class ScenarioHelpersTestCase(test.TestCase):
     @mock.patch("rally.benchmark.runners.base.osclients")
     def test_run_scenario_once_exception(self, mock_clients, mock_rutils):
         mock_rutils.Timer = fakes.FakeTimer
+        mock_rutils.thread_time.side_effect = [1, 1.5]
         context = base._get_scenario_context(fakes.FakeUserContext({}).context)
         args = (1, fakes.FakeScenario, "something_went_wrong", context, {})
         result = base._run_scenario_once(args)
@@ -113,13 +161,56 @@ class ScenarioHelpersTestCase(test.TestCase):
         expected_reuslt = {
             "duration": fakes.FakeTimer().duration(),
             "idle_duration": 0,
+            "cpu_duration": 0.5,
+            "start": 0,
+            "finish": fakes.FakeTimer().duration(),
             "scenario_output": {},
-            "atomic_actions": []
+            "atomic_tree": {"action": [], "parent": [], "start": [],
+                            "duration": []}
         }
         self.assertEqual(expected_reuslt, result)
         self.assertEqual(expected_error[:2],
                          [str(Exception), "Something went wrong"])
 
+    @mock.patch("rally.benchmark.runners.base.osclients")
+    def test_run_scenario_once_unauthorized(self, mock_clients):
+        context = base._get_scenario_context(fakes.FakeUserContext({}).context)
+        scenario_cls = mock.MagicMock()
+        scenario_cls.return_value.test.side_effect = Exception
+        mock_clients.is_unauthorized.return_value = False
+        base._run_scenario_once((1, scenario_cls, "test", context, {}))
+        self.assertFalse(mock_clients.evict_token.called)
+
+        mock_clients.is_unauthorized.return_value = True
+        base._run_scenario_once((1, scenario_cls, "test", context, {}))
+        mock_clients.evict_token.assert_has_calls(
+            [mock.call(context["user"]["endpoint"]),
+             mock.call(context["admin"]["endpoint"])])
+
+    def test_get_iteration_result(self):
+        async_result = mock.MagicMock()
+        async_result.get.return_value = {"duration": 1}
+        self.assertEqual({"duration": 1},
+                         base._get_iteration_result(async_result, 0, 10))
+        self.assertFalse(async_result.cancel.called)
+
+    def test_get_iteration_result_timeout(self):
+        async_result = mock.MagicMock()
+        async_result.get.side_effect = multiprocessing.TimeoutError()
+        result = base._get_iteration_result(async_result, 0, 10)
+        async_result.cancel.assert_called_once_with()
+        self.assertTrue(result["timed_out"])
+        self.assertEqual(10, result["duration"])
+        self.assertIsNotNone(base.ScenarioRunnerResult([result]))
+
+    def test_get_iteration_result_exception(self):
+        async_result = mock.MagicMock()
+        async_result.get.side_effect = exceptions.WorkerJobFailure(
+            reason="died")
+        result = base._get_iteration_result(async_result, 0, 10)
+        self.assertNotIn("timed_out", result)
+        self.assertTrue(result["error"])
+
 
 class ScenarioRunnerResultTestCase(test.TestCase):
 
@@ -132,7 +223,8 @@ class ScenarioRunnerResultTestCase(test.TestCase):
                     "data": {"test": 1.0},
                     "errors": "test error string 1"
                 },
-                "atomic_actions": [{"action": "test1", "duration": 1.0}],
+                "atomic_tree": {"action": ["test1"], "parent": [-1],
+                                "start": [0.0], "duration": [1.0]},
                 "error": []
             },
             {
@@ -142,7 +234,9 @@ class ScenarioRunnerResultTestCase(test.TestCase):
                     "data": {"test": 2.0},
                     "errors": "test error string 2"
                 },
-                "atomic_actions": [{"action": "test2", "duration": 2.0}],
+                "atomic_tree": {"action": ["test2", "test3"],
+                                "parent": [-1, 0], "start": [0.0, 0.5],
+                                "duration": [2.0, None]},
                 "error": ["a", "b", "c"]
             }
         ]
@@ -155,6 +249,37 @@ class ScenarioRunnerResultTestCase(test.TestCase):
                           base.ScenarioRunnerResult, config)
 
 
+class ResultCollectorTestCase(test.TestCase):
+
+    def test_append(self):
+        consumer = mock.MagicMock()
+        collector = base.ResultCollector(consumer, chunk_size=2)
+        for i in range(5):
+            collector.append({"duration": i})
+        self.assertEqual([mock.call([{"duration": 0}, {"duration": 1}]),
+                          mock.call([{"duration": 2}, {"duration": 3}])],
+                         consumer.call_args_list)
+        self.assertEqual(5, collector.count)
+        self.assertEqual([{"duration": 4}], collector.pop())
+        self.assertEqual([], collector.pop())
+
+    def test_append_without_consumer(self):
+        collector = base.ResultCollector(chunk_size=2)
+        for i in range(5):
+            collector.append({"duration": i})
+        self.assertEqual([{"duration": i} for i in range(5)],
+                         collector.pop())
+
+    def test_default_chunk_size(self):
+        self.assertEqual(1000, base.ResultCollector().chunk_size)
+
+    def test_flush_invalid_results(self):
+        collector = base.ResultCollector(mock.MagicMock(), chunk_size=2)
+        collector.append({"a": 1})
+        self.assertRaises(jsonschema.ValidationError,
+                          collector.append, {"a": 2})
+
+
 class ScenarioRunnerTestCase(test.TestCase):
 
     def setUp(self):
@@ -175,6 +300,29 @@ class ScenarioRunnerTestCase(test.TestCase):
         mock_validate.assert_called_once_with(config,
                                               fakes.FakeRunner.CONFIG_SCHEMA)
 
+    @mock.patch("rally.benchmark.runners.base.jsonschema.validate")
+    @mock.patch("rally.benchmark.runners.base.ScenarioRunner._get_cls")
+    def test_validate_warmup(self, mock_get_cls, mock_validate):
+        mock_get_cls.return_value = fakes.FakeRunner
+
+        config = {"type": "fake", "a": 10, "warmup": {"iterations": 5}}
+        base.ScenarioRunner.validate(config)
+        mock_validate.assert_has_calls([
+            mock.call({"iterations": 5}, base.ScenarioRunner.WARMUP_SCHEMA),
+            mock.call({"type": "fake", "a": 10},
+                      fakes.FakeRunner.CONFIG_SCHEMA)])
+
+    def test_validate_warmup_failed(self):
+        configs = [
+            {"type": consts.RunnerType.CONSTANT, "warmup": {}},
+            {"type": consts.RunnerType.CONSTANT,
+             "warmup": {"iterations": 5, "duration": 10}},
+            {"type": consts.RunnerType.CONSTANT, "warmup": {"iterations": 0}}
+        ]
+        for config in configs:
+            self.assertRaises(jsonschema.ValidationError,
+                              base.ScenarioRunner.validate, config)
+
     def test_get_runner(self):
 
         class NewRunner(base.ScenarioRunner):
@@ -227,7 +375,7 @@ class ScenarioRunnerTestCase(test.TestCase):
             }
         }
 
-        expected = [context_obj, runner._run_scenario, cls, method_name,
+        expected = [context_obj, runner._start_scenario, cls, method_name,
                     context_obj, [1, 2, 3]]
         mock_ctx_manager.run.assert_called_once_with(*expected)
 
@@ -240,3 +388,135 @@ class ScenarioRunnerTestCase(test.TestCase):
                           srunner.run,
                           "NovaServers.boot_server_from_volume_and_delete",
                           mock.MagicMock(), {})
+
+    def test_until_aborted(self):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(),
+                                             self.fake_endpoints, {})
+        items = []
+        for i in runner._until_aborted(range(5)):
+            items.append(i)
+            if i == 1:
+                runner.aborted.set()
+        self.assertEqual([0, 1], items)
+
+    @mock.patch("rally.benchmark.runners.base.workers")
+    @mock.patch("rally.benchmark.runners.base.threading.Timer")
+    def test_abort(self, mock_timer, mock_workers):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(),
+                                             self.fake_endpoints, {})
+        runner._owner = "owner"
+        runner.abort()
+        runner.abort()
+        self.assertTrue(runner.aborted.is_set())
+        mock_timer.assert_called_once_with(
+            base.CONF.benchmark.abort_grace_period,
+            mock_workers.cancel_jobs, args=("owner",))
+        mock_timer.return_value.start.assert_called_once_with()
+
+    @mock.patch("rally.benchmark.runners.base.threading.Timer")
+    def test_abort_not_running(self, mock_timer):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(),
+                                             self.fake_endpoints, {})
+        runner.abort()
+        self.assertTrue(runner.aborted.is_set())
+        self.assertFalse(mock_timer.called)
+
+    @mock.patch("rally.benchmark.runners.base.workers")
+    @mock.patch("rally.benchmark.runners.base.threading.Timer")
+    def test_start_scenario_cancels_grace_timer(self, mock_timer,
+                                                mock_workers):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(),
+                                             self.fake_endpoints, {})
+        runner._run_scenario = mock.MagicMock(
+            side_effect=lambda *args: runner.abort())
+        runner._start_scenario("cls", "method", {}, {})
+        mock_timer.return_value.start.assert_called_once_with()
+        # The timer is stopped before the context is cleaned up, so the
+        # jobs of the cleanup aren't cancelled
+        mock_timer.return_value.cancel.assert_called_once_with()
+        self.assertIsNone(runner._owner)
+        mock_workers.unshare.assert_called_once_with(
+            mock_workers.share.return_value)
+
+    @mock.patch("rally.benchmark.runners.base._run_scenario_once")
+    def test_serial_runner_aborted(self, mock_run_once):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(),
+                                             self.fake_endpoints,
+                                             {"times": 5})
+
+        def run_once(args):
+            runner.aborted.set()
+            return {"duration": 1, "idle_duration": 0, "error": []}
+
+        mock_run_once.side_effect = run_once
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      fakes.FakeUserContext({}).context, {})
+        self.assertEqual(1, len(result))
+
+    def test_start_scenario(self):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(),
+                                             self.fake_endpoints, {})
+        runner._run_scenario = mock.MagicMock()
+        result = runner._start_scenario("cls", "method", "ctx", "args")
+        self.assertEqual(runner._run_scenario.return_value, result)
+        runner._run_scenario.assert_called_once_with("cls", "method", "ctx",
+                                                     "args")
+        self.assertIsNotNone(runner.start_time)
+
+    @mock.patch("rally.benchmark.runners.base.workers")
+    def test_start_scenario_shares_context(self, mock_workers):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(),
+                                             self.fake_endpoints, {})
+        context = {"users": ["u"]}
+        shared = []
+        runner._run_scenario = mock.MagicMock(
+            side_effect=lambda *args: shared.append(
+                base._get_scenario_context(context)))
+        runner._start_scenario("cls", "method", context, "args")
+
+        mock_workers.share.assert_called_once_with(context)
+        mock_workers.unshare.assert_called_once_with(
+            mock_workers.share.return_value)
+        self.assertEqual([base._SharedScenarioContext(
+            mock_workers.share.return_value, 0)], shared)
+        self.assertNotIn(id(context), base._SHARED_CONTEXTS)
+
+    def test_send_result_warmup_iterations(self):
+        runner = serial.SerialScenarioRunner(
+            mock.MagicMock(), self.fake_endpoints,
+            {"warmup": {"iterations": 2}})
+        runner.sla_checker = mock.MagicMock()
+        results = [{"duration": i, "error": []} for i in range(3)]
+        for result in results:
+            runner._send_result(result)
+        self.assertEqual([True, True, False],
+                         [r.get("warmup", False) for r in results])
+        runner.sla_checker.add_iteration.assert_called_once_with(results[2])
+        self.assertEqual(3, runner.result_collector.count)
+
+    @mock.patch("rally.benchmark.runners.base.time.time")
+    def test_send_result_warmup_duration(self, mock_time):
+        mock_time.side_effect = [15, 25]
+        runner = serial.SerialScenarioRunner(
+            mock.MagicMock(), self.fake_endpoints,
+            {"warmup": {"duration": 20}})
+        runner.start_time = 0
+        results = [{"duration": 1, "error": []},
+                   {"duration": 1, "error": []},
+                   {"duration": 1, "error": [], "start": 19},
+                   {"duration": 1, "error": [], "start": 20}]
+        for result in results:
+            runner._send_result(result)
+        self.assertEqual([True, False, True, False],
+                         [r.get("warmup", False) for r in results])
+
+    @mock.patch("rally.benchmark.runners.base.ScenarioRunner.abort")
+    def test_send_result_sla_violated(self, mock_abort):
+        runner = serial.SerialScenarioRunner(mock.MagicMock(),
+                                             self.fake_endpoints, {})
+        runner.sla_checker = sla_base.SLAChecker({"max_failure_percent": 0,
+                                                  "min_iterations": 2})
+        runner._send_result({"duration": 1, "error": []})
+        runner._send_result({"duration": 1, "error": ["Exception", "oops"]})
+        mock_abort.assert_called_once_with()
+        self.assertEqual(2, runner.result_collector.count)
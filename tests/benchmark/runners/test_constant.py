@@ -134,3 +134,19 @@ class ConstantForDurationScenarioRunnerTeestCase(test.TestCase):
         self.assertEqual(len(result), expected_times)
         self.assertIsNotNone(base.ScenarioRunnerResult(result))
         self.assertIn('error', result[0])
+
+    def test_run_scenario_constantly_for_duration_keeps_all_results(self):
+        self.config["duration"] = 0.3
+        runner = constant.ConstantForDurationScenarioRunner(
+                        None, [self.context["admin"]["endpoint"]], self.config)
+        chunks = []
+        runner.result_collector = base.ResultCollector(chunks.append,
+                                                       chunk_size=2)
+
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, self.args)
+        stored = sum(chunks, []) + result
+        self.assertEqual(runner.result_collector.count, len(stored))
+        self.assertTrue(len(stored) > self.config["concurrency"])
+        self.assertTrue(all(len(chunk) == 2 for chunk in chunks))
+        self.assertTrue(len(result) < 2)
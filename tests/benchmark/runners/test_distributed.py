@@ -0,0 +1,202 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import threading
+import time
+
+import jsonschema
+import mock
+
+from rally.benchmark import agent
+from rally.benchmark.runners import base
+from rally.benchmark.runners import distributed
+from rally import consts
+from rally import exceptions
+from tests import fakes
+from tests import test
+
+
+class DistributedHelpersTestCase(test.TestCase):
+
+    def test_local_transport(self):
+        status, stdout, stderr = distributed.LocalTransport().execute(
+            "cat; echo err >&2; exit 3", stdin="in")
+        self.assertEqual((3, "in", "err\n"), (status, stdout, stderr))
+
+    @mock.patch("rally.benchmark.runners.distributed.time.time")
+    def test_clock_offset(self, mock_time):
+        # round trips are 2, 1 and 3 seconds
+        mock_time.side_effect = [0, 2, 10, 11, 20, 23]
+        transport = mock.MagicMock()
+        transport.execute.side_effect = [(0, "101.0\n", ""),
+                                         (0, "out\n110.7\n", ""),
+                                         (0, "121.5\n", "")]
+        self.assertEqual(100.2, distributed._clock_offset(transport, "py"))
+        transport.execute.assert_called_with(
+            distributed.CLOCK_COMMAND % "py")
+
+    def test_clock_offset_failed(self):
+        transport = mock.MagicMock()
+        transport.execute.return_value = (1, "", "error")
+        self.assertRaises(exceptions.AgentFailure,
+                          distributed._clock_offset, transport, "py")
+
+    def test_run_agent(self):
+        transport = mock.MagicMock()
+        transport.execute.return_value = (0, "out\n[{\"a\": 1}]\n", "")
+        self.assertEqual([{"a": 1}],
+                         distributed._run_agent(transport, "py", {"a": 2}))
+        transport.execute.assert_called_once_with(
+            distributed.AGENT_COMMAND % "py",
+            stdin=agent.encode_job({"a": 2}), timeout=0)
+
+    def test_run_agent_failed(self):
+        transport = mock.MagicMock()
+        for output in [(1, "", "error"), (0, "", ""), (0, "[{", "")]:
+            transport.execute.return_value = output
+            self.assertRaises(exceptions.AgentFailure,
+                              distributed._run_agent, transport, "py", {})
+
+
+class DistributedScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(DistributedScenarioRunnerTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+
+    def _get_runner(self, **config):
+        config["type"] = consts.RunnerType.DISTRIBUTED
+        return distributed.DistributedScenarioRunner(
+            None, [self.context["admin"]["endpoint"]], config)
+
+    def test_validate(self):
+        configs = [
+            {"type": consts.RunnerType.DISTRIBUTED, "local_agents": 2},
+            {"type": consts.RunnerType.DISTRIBUTED, "times": 100, "rps": 10,
+             "hosts": [{"host": "h1", "user": "u", "password": "p"},
+                       {"host": "h2", "user": "u", "port": 2222}],
+             "python": "/opt/rally/bin/python", "timeout": 10}
+        ]
+        for config in configs:
+            distributed.DistributedScenarioRunner.validate(config)
+
+    def test_validate_failed(self):
+        configs = [
+            {"type": consts.RunnerType.DISTRIBUTED},
+            {"type": consts.RunnerType.DISTRIBUTED, "local_agents": 2,
+             "hosts": [{"host": "h1", "user": "u"}]},
+            {"type": consts.RunnerType.DISTRIBUTED, "local_agents": 2,
+             "rps": 1, "concurrency": 2},
+            {"type": consts.RunnerType.DISTRIBUTED,
+             "hosts": [{"host": "h1"}]}
+        ]
+        for config in configs:
+            self.assertRaises(jsonschema.ValidationError,
+                              distributed.DistributedScenarioRunner.validate,
+                              config)
+
+    @mock.patch("rally.benchmark.runners.distributed.sshutils.SSH")
+    def test_get_agents(self, mock_ssh):
+        runner = self._get_runner(hosts=[{"host": "h1", "user": "u"},
+                                         {"host": "h2", "user": "v",
+                                          "port": 2, "key": "k",
+                                          "password": "p"}])
+        self.assertEqual([(mock_ssh.return_value, "python")] * 2,
+                         runner._get_agents())
+        mock_ssh.assert_has_calls([
+            mock.call("u", "h1", port=22, pkey=None, password=None),
+            mock.call("v", "h2", port=2, pkey="k", password="p")])
+
+        runner = self._get_runner(local_agents=2, python="py")
+        agents = runner._get_agents()
+        self.assertEqual(["py", "py"], [a[1] for a in agents])
+        for transport, python in agents:
+            self.assertIsInstance(transport, distributed.LocalTransport)
+
+    @mock.patch("rally.benchmark.runners.distributed._run_agent")
+    @mock.patch("rally.benchmark.runners.distributed._clock_offset")
+    def test_run_scenario_partition(self, mock_offset, mock_run_agent):
+        agents = [(mock.MagicMock(), "python") for i in range(3)]
+
+        def clock_offset(transport, python):
+            # The agents are synchronized concurrently, so the failing one
+            # is picked by the transport rather than by the call order
+            if transport is not agents[0][0]:
+                raise exceptions.AgentFailure(host="h", reason="")
+            return 10
+
+        mock_offset.side_effect = clock_offset
+        mock_run_agent.return_value = [{"duration": 1, "error": [],
+                                        "start": 110, "scheduled_start": 109}]
+        runner = self._get_runner(local_agents=3, times=2, rps=3)
+        runner._get_agents = mock.MagicMock(return_value=agents)
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+
+        job = mock_run_agent.call_args[0][2]
+        self.assertEqual([0], job["iterations"])
+        self.assertEqual(1.5, job["rps"])
+        self.assertEqual([{"duration": 1, "error": [], "start": 100,
+                           "scheduled_start": 99}], result[:1])
+        self.assertEqual(2, len(result))
+        self.assertEqual("AgentFailure", result[1]["error"][0][-14:-2])
+
+    @mock.patch("rally.benchmark.runners.distributed.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.distributed._run_agent")
+    @mock.patch("rally.benchmark.runners.distributed._clock_offset")
+    def test_run_scenario_aborted(self, mock_offset, mock_run_agent):
+        transport = mock.MagicMock()
+        transport.execute.return_value = (0, "", "")
+        abort_transport = mock.MagicMock()
+        abort_transport.execute.return_value = (0, "", "")
+        mock_offset.return_value = 0
+        runner = self._get_runner(local_agents=1, times=10)
+        runner._get_agents = mock.MagicMock(
+            side_effect=[[(transport, "python")],
+                         [(abort_transport, "python")]])
+        touched = threading.Event()
+
+        def run_agent(transport, python, job):
+            runner.abort()
+            abort_transport.execute.side_effect = (
+                lambda cmd: touched.set() or (0, "", ""))
+            touched.wait(5)
+            return [{"duration": 1, "error": []}]
+
+        mock_run_agent.side_effect = run_agent
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual([{"duration": 1, "error": []}], result)
+
+        abort_file = mock_run_agent.call_args[0][2]["abort_file"]
+        for i in range(100):
+            if abort_transport.execute.call_count == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual([mock.call("touch %s" % abort_file),
+                          mock.call("rm -f %s" % abort_file)],
+                         abort_transport.execute.call_args_list)
+
+    @mock.patch("rally.benchmark.runners.distributed.START_DELAY", 0)
+    def test_run_scenario_local_agents(self):
+        runner = self._get_runner(local_agents=2, times=5, concurrency=3)
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(5, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        self.assertFalse(any(r["error"] for r in result))
+        json.dumps(result)
@@ -0,0 +1,148 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import mixed
+from rally import consts
+from tests import fakes
+from tests import test
+
+
+class WeightedChoiceTestCase(test.TestCase):
+
+    @mock.patch("rally.benchmark.runners.mixed.random.random")
+    def test_pick(self, mock_random):
+        choice = mixed._WeightedChoice(["a", "b", "c"], [6, 3, 1])
+        picked = []
+        for value in [0, 0.59, 0.6, 0.89, 0.9, 0.99]:
+            mock_random.return_value = value
+            picked.append(choice.pick())
+        self.assertEqual(["a", "a", "b", "b", "c", "c"], picked)
+
+
+class MixedScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(MixedScenarioRunnerTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+
+    def _get_runner(self, **config):
+        config["type"] = consts.RunnerType.MIXED
+        return mixed.MixedScenarioRunner(
+            None, [self.context["admin"]["endpoint"]], config)
+
+    def test_validate(self):
+        configs = [
+            {"type": consts.RunnerType.MIXED, "times": 10,
+             "scenarios": [{"name": "A.a", "weight": 1}]},
+            {"type": consts.RunnerType.MIXED, "duration": 10, "weight": 6,
+             "concurrency": 2, "timeout": 10,
+             "scenarios": [{"name": "A.a", "weight": 3, "args": {"a": 1}},
+                           {"name": "B.b", "weight": 0.5}]}
+        ]
+        for config in configs:
+            mixed.MixedScenarioRunner.validate(config)
+
+    def test_validate_failed(self):
+        configs = [
+            {"type": consts.RunnerType.MIXED, "times": 10},
+            {"type": consts.RunnerType.MIXED, "times": 10, "scenarios": []},
+            {"type": consts.RunnerType.MIXED, "times": 10,
+             "scenarios": [{"name": "A.a"}]},
+            {"type": consts.RunnerType.MIXED, "times": 10,
+             "scenarios": [{"name": "A.a", "weight": 0}]},
+            {"type": consts.RunnerType.MIXED, "times": 10,
+             "scenarios": [{"weight": 1}]},
+            {"type": consts.RunnerType.MIXED, "times": 10, "duration": 10,
+             "scenarios": [{"name": "A.a", "weight": 1}]}
+        ]
+        for config in configs:
+            self.assertRaises(jsonschema.ValidationError,
+                              mixed.MixedScenarioRunner.validate, config)
+
+    @mock.patch("rally.benchmark.runners.mixed.base.ScenarioRunner.run")
+    @mock.patch("rally.benchmark.runners.mixed._get_scenario")
+    def test_run_merges_contexts(self, mock_get_scenario, mock_run):
+        scenarios = {
+            "A.a": mock.MagicMock(context={"users": {"tenants": 1}}),
+            "B.b": mock.MagicMock(context={"users": {"tenants": 2},
+                                           "images": {"a": 1},
+                                           "roles": ["admin"]})
+        }
+        mock_get_scenario.side_effect = lambda name: (
+            mock.MagicMock(method=scenarios[name]), "method")
+        runner = self._get_runner(
+            times=1, scenarios=[{"name": "B.b", "weight": 1}])
+
+        runner.run("A.a", {"roles": ["member"]}, {"a": 1})
+        mock_run.assert_called_once_with(
+            "A.a", {"roles": ["member"], "images": {"a": 1}}, {"a": 1})
+
+    def test_run_scenario(self):
+        runner = self._get_runner(
+            times=20, concurrency=2, weight=1,
+            scenarios=[{"name": "FakeScenario.something_went_wrong",
+                        "weight": 1}])
+        mock_get_scenario = mock.patch(
+            "rally.benchmark.runners.mixed._get_scenario").start()
+        mock_get_scenario.return_value = (fakes.FakeScenario,
+                                          "something_went_wrong")
+
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(20, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        iterations = result.info["iterations"]
+        self.assertEqual(20, sum(iterations.values()))
+        for r in result:
+            self.assertEqual(r["scenario"] == "FakeScenario.do_it",
+                             not r["error"])
+
+    @mock.patch("rally.benchmark.runners.base.workers.get_pool")
+    def test_run_scenario_timed_out(self, mock_get_pool):
+        def imap_unordered(func, iter_args, concurrency, timeout):
+            for args in iter_args:
+                async_result = mock.MagicMock(args=(args,))
+                async_result.get.side_effect = multiprocessing.TimeoutError()
+                yield async_result
+
+        mock_get_pool.return_value.imap_unordered.side_effect = (
+            imap_unordered)
+        runner = self._get_runner(
+            times=10, scenarios=[{"name": "FakeScenario.do_it",
+                                  "weight": 1}])
+        mock.patch("rally.benchmark.runners.mixed._get_scenario",
+                   return_value=(fakes.FakeScenario, "do_it")).start()
+
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(10, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        # The timed out iterations are counted as failures of their scenario
+        self.assertEqual(["FakeScenario.do_it"] * 10,
+                         [r["scenario"] for r in result])
+        self.assertTrue(all(r["timed_out"] for r in result))
+
+    @mock.patch("rally.benchmark.runners.mixed.time.time")
+    def test_iterations_duration(self, mock_time):
+        mock_time.side_effect = [0, 0.5, 1, 1.5]
+        runner = self._get_runner(duration=1.2, scenarios=[])
+        self.assertEqual([0, 1, 2], list(runner._iterations()))
@@ -58,6 +58,20 @@ class PeriodicScenarioRunnerTestCase(test.TestCase):
         self.assertEqual(len(result), config["times"])
         self.assertIsNotNone(base.ScenarioRunnerResult(result))
 
+    def test_run_scenario_schedule(self):
+        context = fakes.FakeUserContext({}).context
+        context['task'] = {'uuid': 'fake_uuid'}
+        config = {"times": 3, "period": 0.05, "timeout": 5}
+        runner = periodic.PeriodicScenarioRunner(
+                        None, [context["admin"]["endpoint"]], config)
+
+        result = runner._run_scenario(fakes.FakeScenario, "do_it", context, {})
+        scheduled = sorted(r["scheduled_start"] for r in result)
+        self.assertAlmostEqual(0.05, scheduled[1] - scheduled[0], places=5)
+        self.assertAlmostEqual(0.1, scheduled[2] - scheduled[0], places=5)
+        for r in result:
+            self.assertTrue(r["start"] >= r["scheduled_start"])
+
     def test_run_scenario_exception(self):
         context = fakes.FakeUserContext({}).context
         context['task'] = {'uuid': 'fake_uuid'}
@@ -72,9 +86,9 @@ class PeriodicScenarioRunnerTestCase(test.TestCase):
         self.assertIsNotNone(base.ScenarioRunnerResult(result))
 
     @mock.patch("rally.benchmark.runners.periodic.base.ScenarioRunnerResult")
-    @mock.patch("rally.benchmark.runners.periodic.multiprocessing")
+    @mock.patch("rally.benchmark.runners.periodic.workers")
     @mock.patch("rally.benchmark.runners.periodic.time.sleep")
-    def test_run_scenario_internal_logic(self, mock_time, mock_mp,
+    def test_run_scenario_internal_logic(self, mock_time, mock_workers,
                                          mock_result):
         context = fakes.FakeUserContext({}).context
         config = {"times": 4, "period": 0, "timeout": 5}
@@ -82,27 +96,26 @@ class PeriodicScenarioRunnerTestCase(test.TestCase):
                         None, [context["admin"]["endpoint"]], config)
 
         mock_pool_inst = mock.MagicMock()
-        mock_mp.Pool.return_value = mock_pool_inst
+        mock_pool_inst.apply_async.return_value.ready.return_value = False
+        mock_workers.get_pool.return_value = mock_pool_inst
 
         runner._run_scenario(fakes.FakeScenario, "do_it", context, {})
 
         exptected_pool_inst_call = []
         for i in range(config["times"]):
             args = (
-                base._run_scenario_once,
-                ((i, fakes.FakeScenario, "do_it",
-                  base._get_scenario_context(context), {}),)
+                base._run_scheduled_scenario_once,
+                ((mock.ANY, (i, fakes.FakeScenario, "do_it",
+                             base._get_scenario_context(context), {})),)
             )
-            exptected_pool_inst_call.append(mock.call.apply_async(*args))
-            call = mock.call.close()
-            exptected_pool_inst_call.append(call)
-
-        for i in range(config["times"]):
-            call = mock.call.apply_async().get(timeout=5)
-            exptected_pool_inst_call.append(call)
-
-        mock_mp.assert_has_calls([mock.call.Pool(1)])
-        mock_pool_inst.assert_has_calls(exptected_pool_inst_call)
+            exptected_pool_inst_call.append(mock.call(*args))
+
+        self.assertEqual([mock.call(i + 1) for i in range(config["times"])],
+                         mock_workers.get_pool.call_args_list)
+        self.assertEqual(exptected_pool_inst_call,
+                         mock_pool_inst.apply_async.call_args_list)
+        async_result = mock_pool_inst.apply_async.return_value
+        self.assertEqual(config["times"], async_result.get.call_count)
         mock_time.assert_has_calls([])
 
     @mock.patch("rally.benchmark.runners.base.base")
@@ -0,0 +1,162 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import ramp
+from rally import consts
+from tests import fakes
+from tests import test
+
+
+class StepRampHelpersTestCase(test.TestCase):
+
+    def test_concurrency_steps(self):
+        self.assertEqual([1, 2, 4, 8, 16, 32, 64],
+                         ramp._concurrency_steps({}))
+        self.assertEqual([3, 6, 12], ramp._concurrency_steps(
+            {"start": 3, "max_concurrency": 20}))
+        self.assertEqual([1, 2, 3, 4], ramp._concurrency_steps(
+            {"factor": 1.2, "max_concurrency": 4}))
+        self.assertEqual([5, 1], ramp._concurrency_steps({"steps": [5, 1]}))
+
+    def test_step_stats(self):
+        results = [{"duration": d, "error": []} for d in range(1, 21)]
+        results.append({"duration": 100, "error": ["Exception", "", ""]})
+        stats = ramp._step_stats(4, results, 2.0)
+        self.assertEqual({"concurrency": 4, "iterations": 21,
+                          "duration": 2.0, "throughput": 10.0,
+                          "p95": 19.05, "error_rate": 1 / 21.0}, stats)
+
+    def test_step_stats_empty(self):
+        stats = ramp._step_stats(1, [], 0)
+        self.assertEqual(0.0, stats["throughput"])
+        self.assertIsNone(stats["p95"])
+        self.assertEqual(0.0, stats["error_rate"])
+
+
+class StepRampScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(StepRampScenarioRunnerTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+
+    def _get_runner(self, **config):
+        config["type"] = consts.RunnerType.STEP_RAMP
+        return ramp.StepRampScenarioRunner(
+            None, [self.context["admin"]["endpoint"]], config)
+
+    def test_validate(self):
+        configs = [
+            {"type": consts.RunnerType.STEP_RAMP, "times": 10},
+            {"type": consts.RunnerType.STEP_RAMP, "step_duration": 30,
+             "start": 2, "factor": 1.5, "max_concurrency": 20,
+             "plateau_threshold": 0.05, "max_error_rate": 0, "timeout": 10},
+            {"type": consts.RunnerType.STEP_RAMP, "times": 10,
+             "steps": [1, 5, 10]}
+        ]
+        for config in configs:
+            ramp.StepRampScenarioRunner.validate(config)
+
+    def test_validate_failed(self):
+        configs = [
+            {"type": consts.RunnerType.STEP_RAMP},
+            {"type": consts.RunnerType.STEP_RAMP, "times": 10,
+             "step_duration": 10},
+            {"type": consts.RunnerType.STEP_RAMP, "times": 10, "factor": 1},
+            {"type": consts.RunnerType.STEP_RAMP, "times": 10, "steps": []},
+            {"type": consts.RunnerType.STEP_RAMP, "times": 10,
+             "max_error_rate": 2}
+        ]
+        for config in configs:
+            self.assertRaises(jsonschema.ValidationError,
+                              ramp.StepRampScenarioRunner.validate, config)
+
+    @mock.patch("rally.benchmark.runners.ramp.time.time")
+    def _run_steps(self, throughputs, errors, mock_time, **config):
+        # every step takes 1 second, so the throughput equals to the number
+        # of successful iterations
+        mock_time.side_effect = [t for i in range(len(throughputs))
+                                 for t in (i, i + 1)]
+        step_results = []
+        for good, bad in zip(throughputs, errors):
+            step_results.append(
+                [{"duration": 1, "error": []} for i in range(good)] +
+                [{"duration": 1, "error": ["E", "", ""]} for i in range(bad)])
+        runner = self._get_runner(times=1, **config)
+        runner._run_iterations = mock.MagicMock(side_effect=step_results)
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        return runner, result
+
+    def test_run_scenario_plateau(self):
+        runner, result = self._run_steps([10, 20, 30, 31, 40], [0] * 5)
+        self.assertEqual(4, len(runner._run_iterations.mock_calls))
+        self.assertEqual([1, 2, 4, 8],
+                         [c[1][1] for c in runner._run_iterations.mock_calls])
+        self.assertEqual(91, len(result))
+        self.assertEqual(4, result.info["knee"])
+        self.assertEqual("plateau", result.info["stop_reason"])
+        self.assertEqual([10, 20, 30, 31],
+                         [s["throughput"] for s in result.info["steps"]])
+
+    def test_run_scenario_errors(self):
+        runner, result = self._run_steps([10, 20, 30], [0, 0, 4],
+                                         max_error_rate=0.1)
+        self.assertEqual(2, result.info["knee"])
+        self.assertEqual("errors", result.info["stop_reason"])
+        self.assertEqual(3, len(result.info["steps"]))
+
+    def test_run_scenario_warmup(self):
+        runner, result = self._run_steps([10, 20, 30], [0] * 3,
+                                         steps=[1, 2, 4],
+                                         warmup={"iterations": 15})
+        self.assertEqual(15, len([r for r in result if r.get("warmup")]))
+        # The first step is a part of the warm-up, it doesn't become the knee
+        self.assertEqual([0, 15, 30],
+                         [s["iterations"] for s in result.info["steps"]])
+        self.assertEqual([0, 15, 30],
+                         [s["throughput"] for s in result.info["steps"]])
+        self.assertEqual(4, result.info["knee"])
+
+    def test_run_scenario_max_concurrency(self):
+        runner, result = self._run_steps([10, 20, 30], [0] * 3,
+                                         steps=[1, 5, 10])
+        self.assertEqual([1, 5, 10],
+                         [c[1][1] for c in runner._run_iterations.mock_calls])
+        self.assertEqual(10, result.info["knee"])
+        self.assertEqual("max_concurrency", result.info["stop_reason"])
+
+    def test_run_scenario(self):
+        runner = self._get_runner(times=2, max_concurrency=2)
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        self.assertEqual(2 * len(result.info["steps"]), len(result))
+        self.assertIn(result.info["stop_reason"],
+                      ["plateau", "max_concurrency"])
+
+    def test_run_scenario_exception(self):
+        runner = self._get_runner(step_duration=0)
+        result = runner._run_scenario(fakes.FakeScenario,
+                                      "something_went_wrong",
+                                      self.context, {})
+        self.assertEqual(1, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        self.assertIsNone(result.info["knee"])
+        self.assertEqual("errors", result.info["stop_reason"])
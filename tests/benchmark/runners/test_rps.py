@@ -0,0 +1,183 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+import threading
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import rps
+from rally import consts
+from tests import fakes
+from tests import test
+
+
+class RPSHelpersTestCase(test.TestCase):
+
+    def test_schedule_pieces(self):
+        schedule = [
+            {"type": "constant", "rps": 2, "duration": 10},
+            {"type": "linear", "start": 2, "end": 4, "duration": 5},
+            {"type": "step", "start": 1, "end": 3, "step": 1,
+             "step_duration": 2},
+            {"type": "spike", "rps": 1, "peak": 10, "duration": 10,
+             "spike_start": 3, "spike_duration": 2}
+        ]
+        self.assertEqual([(2, 2, 10), (2, 4, 5),
+                          (1, 1, 2), (2, 2, 2), (3, 3, 2),
+                          (1, 1, 3), (10, 10, 2), (1, 1, 5)],
+                         rps._schedule_pieces(schedule))
+
+    def test_schedule_pieces_skips_empty(self):
+        schedule = [{"type": "spike", "rps": 1, "peak": 10, "duration": 10,
+                     "spike_start": 0, "spike_duration": 20}]
+        self.assertEqual([(10, 10, 10)], rps._schedule_pieces(schedule))
+
+    def test_arrival_times_constant(self):
+        self.assertEqual([0.0, 0.5, 1.0, 1.5],
+                         list(rps._arrival_times([(2, 2, 2)])))
+
+    def test_arrival_times_infinite(self):
+        arrivals = rps._arrival_times([(4, 4, float("inf"))])
+        self.assertEqual([0.0, 0.25, 0.5], [next(arrivals) for i in range(3)])
+
+    def test_arrival_times_linear(self):
+        # 0.5 * t^2 iterations are started by the moment t
+        arrivals = list(rps._arrival_times([(0, 4, 4)]))
+        self.assertEqual(8, len(arrivals))
+        for k, t in enumerate(arrivals):
+            self.assertAlmostEqual((2.0 * k) ** 0.5, t)
+
+    def test_arrival_times_several_pieces(self):
+        self.assertEqual([0.0, 1.0, 2.0, 2.5, 3.0, 3.5, 4.0, 5.5],
+                         list(rps._arrival_times([(1, 1, 2), (2, 2, 2),
+                                                  (0, 0, 1), (2, 2, 1)])))
+
+
+class RPSScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(RPSScenarioRunnerTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+
+    def test_validate(self):
+        configs = [
+            {"type": consts.RunnerType.RPS, "rps": 10, "times": 5},
+            {"type": consts.RunnerType.RPS, "rps": 0.5, "duration": 5,
+             "max_concurrency": 3, "timeout": 10},
+            {"type": consts.RunnerType.RPS,
+             "schedule": [{"type": "constant", "rps": 2, "duration": 10},
+                          {"type": "linear", "start": 2, "end": 4,
+                           "duration": 5}]}
+        ]
+        for config in configs:
+            rps.RPSScenarioRunner.validate(config)
+
+    def test_validate_failed(self):
+        configs = [
+            {"type": consts.RunnerType.RPS, "rps": 10},
+            {"type": consts.RunnerType.RPS, "times": 10},
+            {"type": consts.RunnerType.RPS, "rps": 10, "times": 5,
+             "schedule": [{"type": "constant", "rps": 2, "duration": 10}]},
+            {"type": consts.RunnerType.RPS,
+             "schedule": [{"type": "constant", "rps": 2}]},
+            {"type": consts.RunnerType.RPS,
+             "schedule": [{"type": "unknown", "rps": 2, "duration": 1}]}
+        ]
+        for config in configs:
+            self.assertRaises(jsonschema.ValidationError,
+                              rps.RPSScenarioRunner.validate, config)
+
+    def test_run_scenario(self):
+        config = {"type": consts.RunnerType.RPS, "rps": 20, "times": 4,
+                  "max_concurrency": 2}
+        runner = rps.RPSScenarioRunner(
+                        None, [self.context["admin"]["endpoint"]], config)
+
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(config["times"], len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        scheduled = [r["scheduled_start"] for r in result]
+        self.assertAlmostEqual(0.15, scheduled[-1] - scheduled[0], places=5)
+        for r in result:
+            self.assertTrue(r["start"] >= r["scheduled_start"])
+
+    def test_run_scenario_exception(self):
+        config = {"type": consts.RunnerType.RPS, "rps": 100, "duration": 0.03}
+        runner = rps.RPSScenarioRunner(
+                        None, [self.context["admin"]["endpoint"]], config)
+
+        result = runner._run_scenario(fakes.FakeScenario,
+                                      "something_went_wrong",
+                                      self.context, {})
+        self.assertEqual(3, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        self.assertTrue(all(r["error"] for r in result))
+
+    def _mock_pool(self, mock_workers):
+        """Makes the pool return results that are ready only if cancelled."""
+        results = []
+
+        def apply_async(func, args, callback=None):
+            result = mock.MagicMock()
+            result.ready.return_value = False
+            result.get.side_effect = multiprocessing.TimeoutError()
+
+            def cancel():
+                if not result.ready():
+                    result.ready.return_value = True
+                    callback(result)
+
+            result.cancel.side_effect = cancel
+            results.append(result)
+            return result
+
+        mock_workers.get_pool.return_value.apply_async.side_effect = (
+            apply_async)
+        return results
+
+    @mock.patch("rally.benchmark.runners.rps.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.rps.workers")
+    def test_run_arrivals_cancels_overdue(self, mock_workers):
+        results = self._mock_pool(mock_workers)
+        runner = rps.RPSScenarioRunner(
+            None, [self.context["admin"]["endpoint"]],
+            {"type": consts.RunnerType.RPS, "rps": 1, "max_concurrency": 1,
+             "timeout": 0.05})
+        runner._run_arrivals([(0, "args")] * 2)
+        self.assertEqual(2, len(results))
+        self.assertTrue(results[0].cancel.called)
+        collected = runner._collected_results()
+        self.assertEqual(2, len(collected))
+        self.assertTrue(all(r["timed_out"] for r in collected))
+
+    @mock.patch("rally.benchmark.runners.rps.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.rps.workers")
+    def test_run_arrivals_aborted_waiting_for_slot(self, mock_workers):
+        results = self._mock_pool(mock_workers)
+        runner = rps.RPSScenarioRunner(
+            None, [self.context["admin"]["endpoint"]],
+            {"type": consts.RunnerType.RPS, "rps": 1, "max_concurrency": 1,
+             "timeout": 600})
+        timer = threading.Timer(0.05, runner.aborted.set)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        runner._run_arrivals([(0, "args")] * 3)
+        self.assertEqual(1, len(results))
+        self.assertEqual(1, len(runner._collected_results()))
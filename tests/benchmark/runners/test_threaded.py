@@ -0,0 +1,301 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+import os
+import threading
+import time
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import threaded
+from rally import consts
+from rally import exceptions
+from tests import fakes
+from tests import test
+
+
+class ThreadedHelpersTestCase(test.TestCase):
+
+    def test_split(self):
+        self.assertEqual([4, 3, 3], threaded._split(10, 3))
+        self.assertEqual([1, 1], threaded._split(2, 2))
+
+    @mock.patch("rally.benchmark.runners.threaded.base._run_scenario_once")
+    def test_run_batch(self, mock_run_once):
+        threads = set()
+
+        def run_once(args):
+            threads.add(threading.current_thread())
+            time.sleep(0.01)
+            return {"duration": args}
+
+        mock_run_once.side_effect = run_once
+        messages = []
+        utilization = threaded._run_batch(range(10), 3, 10, messages.append,
+                                          threading.Event())
+        results = [m[2] for m in messages if m[0] == "result"]
+        self.assertEqual(range(10), sorted(r["duration"] for r in results))
+        self.assertEqual(range(10),
+                         sorted(m[1] for m in messages if m[0] == "start"))
+        self.assertEqual(3, len(threads))
+        self.assertEqual(os.getpid(), utilization["pid"])
+        self.assertEqual(3, utilization["threads"])
+        self.assertEqual(10, utilization["iterations"])
+        self.assertTrue(0 < utilization["threads_utilization"] <= 1)
+        self.assertTrue(utilization["cpu_time"] >= 0)
+
+    @mock.patch("rally.benchmark.runners.threaded.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.threaded.base._run_scenario_once")
+    def test_run_batch_timeout(self, mock_run_once):
+        hung = threading.Event()
+        self.addCleanup(hung.set)
+
+        def run_once(args):
+            if args == 0:
+                hung.wait()
+            return {"duration": 0, "error": []}
+
+        mock_run_once.side_effect = run_once
+        messages = []
+        threaded._run_batch([0, 1, 2], 1, 0.1, messages.append,
+                            threading.Event())
+        results = [m[2] for m in messages if m[0] == "result"]
+        self.assertEqual(3, len(results))
+        errors = [r["error"] for r in results if r["error"]]
+        self.assertEqual(1, len(errors))
+        self.assertIn("TimeoutError", errors[0][0])
+        self.assertEqual(1, len([r for r in results if r.get("timed_out")]))
+
+    @mock.patch("rally.benchmark.runners.threaded.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.threaded.base._run_scenario_once")
+    def test_run_batch_timeout_retires_thread(
+            self, mock_run_once):
+        hung = threading.Event()
+        self.addCleanup(hung.set)
+        threads = {}
+
+        def run_once(args):
+            threads[args] = threading.current_thread()
+            if args == 0:
+                hung.wait()
+            else:
+                # The hung thread returns while the others are running
+                hung.set()
+                time.sleep(0.05)
+            return {"duration": 0, "error": []}
+
+        mock_run_once.side_effect = run_once
+        messages = []
+        threaded._run_batch([0, 1, 2, 3], 1, 0.1, messages.append,
+                            threading.Event())
+        results = [m[2] for m in messages if m[0] == "result"]
+        self.assertEqual(4, len(results))
+        self.assertEqual(1, len(set(threads[i] for i in [1, 2, 3])))
+        self.assertNotIn(threads[0], [threads[i] for i in [1, 2, 3]])
+
+    @mock.patch("rally.benchmark.runners.threaded.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.threaded.base._run_scenario_once")
+    def test_run_batch_aborted(self, mock_run_once):
+        aborted = threading.Event()
+
+        def run_once(args):
+            if args == 1:
+                aborted.set()
+            return {"duration": args}
+
+        mock_run_once.side_effect = run_once
+        messages = []
+        utilization = threaded._run_batch(range(10), 1, 10, messages.append,
+                                          aborted)
+        self.assertEqual([("result", 0, {"duration": 0}),
+                          ("result", 1, {"duration": 1}),
+                          ("start", 0), ("start", 1)],
+                         sorted(messages))
+        self.assertEqual(2, utilization["iterations"])
+
+    @mock.patch("rally.benchmark.runners.threaded.base._run_scenario_once")
+    def test_run_scenario_in_threads(self, mock_run_once):
+        mock_run_once.side_effect = lambda args: {"duration": args}
+        listener = threaded._BatchListener()
+        self.addCleanup(listener.stop)
+        utilization = threaded._run_scenario_in_threads(
+            ([0, 1], 2, 10, listener.address, 3))
+        self.assertEqual(2, utilization["iterations"])
+        events = []
+        while not events or events[-1][1] != ("closed",):
+            events.append(listener.events.get(timeout=5))
+        self.assertEqual(set([3]), set(batch for batch, m in events))
+        self.assertEqual([{"duration": 0}, {"duration": 1}],
+                         sorted(m[2] for b, m in events if m[0] == "result"))
+        self.assertEqual(set([3]), listener.connected)
+
+
+class ThreadedScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(ThreadedScenarioRunnerTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+
+    def _get_runner(self, **config):
+        config["type"] = consts.RunnerType.CONSTANT_THREADS
+        return threaded.ThreadedScenarioRunner(
+            None, [self.context["admin"]["endpoint"]], config)
+
+    def test_validate(self):
+        threaded.ThreadedScenarioRunner.validate(
+            {"type": consts.RunnerType.CONSTANT_THREADS, "times": 1000,
+             "concurrency": 500, "processes": 2, "timeout": 10})
+
+    def test_validate_failed(self):
+        self.assertRaises(jsonschema.ValidationError,
+                          threaded.ThreadedScenarioRunner.validate,
+                          {"type": consts.RunnerType.CONSTANT_THREADS,
+                           "processes": 0})
+
+    @mock.patch("rally.benchmark.runners.threaded.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.threaded.workers")
+    def test_run_scenario_jobs(self, mock_workers):
+        pool = mock_workers.get_pool.return_value
+        utilization = {"pid": 42, "cpu_utilization": 1.0}
+        pool.apply_async.return_value.get.return_value = utilization
+        runner = self._get_runner(times=5, concurrency=5, processes=2)
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual({"workers": [utilization] * 2}, result.info)
+
+        mock_workers.get_pool.assert_called_once_with(2)
+        jobs = [c[0][1][0] for c in pool.apply_async.call_args_list]
+        self.assertEqual([[0, 2, 4], [1, 3]],
+                         [[a[0] for a in job[0]] for job in jobs])
+        self.assertEqual([3, 2], [job[1] for job in jobs])
+
+    @mock.patch("rally.benchmark.runners.threaded.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.threaded.workers")
+    def test_run_scenario_worker_died(self, mock_workers):
+        pool = mock_workers.get_pool.return_value
+        pool.apply_async.return_value.get.side_effect = (
+            exceptions.WorkerJobFailure(reason="died"))
+        runner = self._get_runner(times=3)
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(3, len(result))
+        self.assertTrue(all(r["error"] for r in result))
+
+    @mock.patch("rally.benchmark.runners.threaded.POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.runners.threaded.workers")
+    def test_run_scenario_aborted_worker_killed(self, mock_workers):
+        # The first iteration is finished, the second one is running when
+        # the worker is killed and the third one is never started
+        pool = mock_workers.get_pool.return_value
+        async_result = pool.apply_async.return_value
+        async_result.get.side_effect = multiprocessing.TimeoutError()
+        runner = self._get_runner(times=3)
+        batch_listener = threaded._BatchListener
+
+        def listener():
+            listener = batch_listener()
+            listener.events.put((0, ("start", 0)))
+            listener.events.put((0, ("result", 0, {"duration": 1,
+                                                   "idle_duration": 0,
+                                                   "error": []})))
+            listener.events.put((0, ("start", 1)))
+            listener.events.put((0, ("closed",)))
+            listener.connected.add(0)
+            runner.abort()
+            return listener
+
+        with mock.patch("rally.benchmark.runners.threaded._BatchListener",
+                        side_effect=listener):
+            result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                          self.context, {})
+        self.assertEqual(2, len(result))
+        self.assertEqual([], result[0]["error"])
+        self.assertTrue(result[1]["timed_out"])
+
+    def test_run_scenario_aborted(self):
+        runner = self._get_runner(times=1000, concurrency=2, processes=2)
+        sent = []
+
+        def send_result(result):
+            sent.append(result)
+            if len(sent) == 5:
+                runner.abort()
+
+        runner._send_result = send_result
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(0, len(result))
+        self.assertTrue(5 <= len(sent) < 1000)
+        self.assertFalse(any(r["error"] for r in sent))
+
+    def test_run_scenario(self):
+        runner = self._get_runner(times=10, concurrency=4, processes=2)
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(10, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        self.assertEqual(2, len(result.info["workers"]))
+
+    def test_run_scenario_exception(self):
+        runner = self._get_runner(times=3, concurrency=3)
+        result = runner._run_scenario(fakes.FakeScenario,
+                                      "something_went_wrong",
+                                      self.context, {})
+        self.assertEqual(3, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        self.assertTrue(all(r["error"] for r in result))
+
+
+class HybridScenarioRunnerTestCase(test.TestCase):
+
+    def _get_runner(self, **config):
+        config["type"] = consts.RunnerType.HYBRID
+        return threaded.HybridScenarioRunner(None, [mock.MagicMock()],
+                                             config)
+
+    def test_validate(self):
+        configs = [
+            {"type": consts.RunnerType.HYBRID, "times": 100},
+            {"type": consts.RunnerType.HYBRID, "times": 100, "processes": 4,
+             "threads": 25, "timeout": 10},
+            {"type": consts.RunnerType.HYBRID, "times": 100,
+             "concurrency": 100}
+        ]
+        for config in configs:
+            threaded.HybridScenarioRunner.validate(config)
+
+    def test_validate_failed(self):
+        self.assertRaises(jsonschema.ValidationError,
+                          threaded.HybridScenarioRunner.validate,
+                          {"type": consts.RunnerType.HYBRID,
+                           "concurrency": 10, "threads": 5})
+
+    @mock.patch("rally.benchmark.runners.threaded.multiprocessing.cpu_count")
+    def test_get_threads(self, mock_cpu_count):
+        mock_cpu_count.return_value = 3
+        self.assertEqual([1, 1, 1], self._get_runner()._get_threads())
+        self.assertEqual([10, 10, 10],
+                         self._get_runner(threads=10)._get_threads())
+        self.assertEqual([4, 3, 3],
+                         self._get_runner(concurrency=10)._get_threads())
+        self.assertEqual([2],
+                         self._get_runner(processes=1,
+                                          threads=2)._get_threads())
+        self.assertEqual([1, 1],
+                         self._get_runner(concurrency=2)._get_threads())
@@ -0,0 +1,155 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import tempfile
+
+import jsonschema
+import mock
+
+from rally.benchmark.runners import base
+from rally.benchmark.runners import trace
+from rally import consts
+from rally import exceptions
+from tests import fakes
+from tests import test
+
+
+class TraceHelpersTestCase(test.TestCase):
+
+    def test_parse_trace_text(self):
+        data = "# arrivals\n10.5\n\n10 GET /servers\n12\n"
+        self.assertEqual([{"time": 10}, {"time": 10.5}, {"time": 12}],
+                         trace._parse_trace(data))
+
+    def test_parse_trace_json(self):
+        data = json.dumps([3, {"time": 1, "args": {"a": 1}, "user": 2}])
+        self.assertEqual([{"time": 1, "args": {"a": 1}, "user": 2},
+                          {"time": 3}],
+                         trace._parse_trace(data))
+
+    def test_parse_trace_task_results(self):
+        data = json.dumps([
+            {"key": {"name": "a", "pos": 0},
+             "result": [{"scheduled_start": 5, "start": 6},
+                        {"start": 2}, {"duration": 1}]},
+            {"key": {"name": "b", "pos": 1},
+             "result": [{"start": 1}]}
+        ])
+        self.assertEqual([{"time": 2}, {"time": 5}],
+                         trace._parse_trace(data))
+
+    def test_parse_trace_invalid(self):
+        for data in ["abc\n", "{\"time\": 1}", "[{\"user\": 1}]",
+                     "[{\"time\": 1, \"user\": -1}]", "[1, true]",
+                     "[{\"time\": false}]"]:
+            self.assertRaises(ValueError, trace._parse_trace, data)
+
+    def test_load_trace(self):
+        with tempfile.NamedTemporaryFile(delete=False) as trace_file:
+            trace_file.write("1\n2\n")
+        self.addCleanup(os.remove, trace_file.name)
+        self.assertEqual([{"time": 1}, {"time": 2}],
+                         trace._load_trace(trace_file.name))
+
+    def test_load_trace_failed(self):
+        self.assertRaises(exceptions.InvalidTrace, trace._load_trace,
+                          "/non/existing/trace")
+
+
+class TraceScenarioRunnerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(TraceScenarioRunnerTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+
+    def _get_runner(self, **config):
+        config["type"] = consts.RunnerType.TRACE
+        return trace.TraceScenarioRunner(
+            None, [self.context["admin"]["endpoint"]], config)
+
+    @mock.patch("rally.benchmark.runners.trace._load_trace")
+    def test_validate(self, mock_load_trace):
+        configs = [
+            {"type": consts.RunnerType.TRACE, "trace": "trace.json"},
+            {"type": consts.RunnerType.TRACE, "trace": "trace.json",
+             "time_scale": 0.5, "max_concurrency": 10, "timeout": 10}
+        ]
+        for config in configs:
+            trace.TraceScenarioRunner.validate(config)
+        mock_load_trace.assert_called_with("trace.json")
+
+    def test_validate_invalid_trace(self):
+        self.assertRaises(exceptions.InvalidTrace,
+                          trace.TraceScenarioRunner.validate,
+                          {"type": consts.RunnerType.TRACE,
+                           "trace": "/non/existing/trace"})
+
+    def test_validate_failed(self):
+        configs = [
+            {"type": consts.RunnerType.TRACE},
+            {"type": consts.RunnerType.TRACE, "trace": "trace.json",
+             "time_scale": 0},
+            {"type": consts.RunnerType.TRACE, "trace": "trace.json",
+             "rps": 10}
+        ]
+        for config in configs:
+            self.assertRaises(jsonschema.ValidationError,
+                              trace.TraceScenarioRunner.validate, config)
+
+    def test_get_scenario_context(self):
+        context = {"users": ["u0", "u1"], "admin": "admin"}
+        self.assertEqual({"user": "u1", "admin": "admin"},
+                         trace.TraceScenarioRunner._get_scenario_context(
+                             context, 3))
+        self.assertIn(trace.TraceScenarioRunner._get_scenario_context(
+                      context)["user"], context["users"])
+
+    @mock.patch("rally.benchmark.runners.trace._load_trace")
+    def test_run_scenario_arrivals(self, mock_load_trace):
+        mock_load_trace.return_value = [
+            {"time": 100}, {"time": 102, "args": {"b": 3}, "user": 0}]
+        arrivals_list = []
+        runner = self._get_runner(trace="trace.json", time_scale=0.5)
+        runner._run_arrivals = mock.MagicMock(
+            side_effect=lambda arrivals: arrivals_list.extend(arrivals))
+
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {"a": 1, "b": 2})
+
+        mock_load_trace.assert_called_once_with("trace.json")
+        self.assertEqual([0, 1.0], [a[0] for a in arrivals_list])
+        self.assertEqual([{"a": 1, "b": 2}, {"a": 1, "b": 3}],
+                         [a[1][4] for a in arrivals_list])
+        self.assertEqual(self.context["users"][0],
+                         arrivals_list[1][1][3]["user"])
+        self.assertEqual({"arrivals": 2, "duration": 1.0}, result.info)
+
+    @mock.patch("rally.benchmark.runners.trace._load_trace")
+    def test_run_scenario(self, mock_load_trace):
+        mock_load_trace.return_value = [{"time": t}
+                                        for t in [10, 10.05, 10.1, 10.3]]
+        runner = self._get_runner(trace="trace.json", time_scale=0.5)
+
+        result = runner._run_scenario(fakes.FakeScenario, "do_it",
+                                      self.context, {})
+        self.assertEqual(4, len(result))
+        self.assertIsNotNone(base.ScenarioRunnerResult(result))
+        scheduled = sorted(r["scheduled_start"] for r in result)
+        self.assertAlmostEqual(0.15, scheduled[-1] - scheduled[0], places=5)
+        for r in result:
+            self.assertTrue(r["start"] >= r["scheduled_start"])
@@ -76,11 +76,10 @@ class GlanceScenarioTestCase(test.TestCase):
                                               'image_location',
                                               'container_format',
                                               'disk_format')
-        self.wait_for.mock.assert_called_once_with(self.image,
-                                                   update_resource=self.gfm(),
-                                                   is_ready=self.res_is.mock(),
-                                                   check_interval=1,
-                                                   timeout=120)
+        self.wait_for.mock.assert_called_once_with(
+            self.image, update_resource=self.gfm(),
+            is_ready=self.res_is.mock(), check_interval=1, timeout=120,
+            transition="glance.create_image")
         self.res_is.mock.assert_has_calls(mock.call('active'))
         self.assertEqual(self.wait_for.mock(), return_image)
         self._test_atomic_action_timer(scenario.atomic_actions(),
@@ -94,6 +93,7 @@ class GlanceScenarioTestCase(test.TestCase):
             mock.assert_called_once_with(self.image,
                                          update_resource=self.gfm(),
                                          check_interval=1,
-                                         timeout=120)
+                                         timeout=120,
+                                         transition="glance.delete_image")
         self._test_atomic_action_timer(scenario.atomic_actions(),
                                        'glance.delete_image')
@@ -158,6 +158,20 @@ class NovaServersTestCase(test.TestCase):
     def test_boot_hard_reboot(self):
         self._verify_reboot(soft=False)
 
+    @mock.patch(NOVA_SERVERS + ".clients")
+    @mock.patch(NOVA_SERVERS_MODULE + ".resource_pool.checkout")
+    def test_reboot_pooled_server(self, mock_checkout, mock_clients):
+        mock_checkout.return_value.__enter__.return_value = "server_id"
+        scenario = servers.NovaServers(context={"user": {}})
+        scenario._reboot_server = mock.MagicMock()
+
+        scenario.reboot_pooled_server(soft=False)
+
+        mock_checkout.assert_called_once_with(scenario.context(), "servers")
+        mock_clients("nova").servers.get.assert_called_once_with("server_id")
+        scenario._reboot_server.assert_called_once_with(
+            mock_clients("nova").servers.get.return_value, soft=False)
+
     def test_boot_and_delete_server(self):
         fake_server = object()
 
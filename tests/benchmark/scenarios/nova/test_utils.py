@@ -82,7 +82,8 @@ class NovaScenarioTestCase(test.TestCase):
             update_resource=self.gfm(),
             is_ready=self.res_is.mock(),
             check_interval=CONF.benchmark.nova_server_boot_poll_interval,
-            timeout=CONF.benchmark.nova_server_boot_timeout
+            timeout=CONF.benchmark.nova_server_boot_timeout,
+            transition="nova.boot_server"
         )
         self.res_is.mock.assert_has_calls(mock.call('ACTIVE'))
         self.assertEqual(self.wait_for.mock(), return_server)
@@ -98,7 +99,8 @@ class NovaScenarioTestCase(test.TestCase):
             update_resource=self.gfm(),
             is_ready=self.res_is.mock(),
             check_interval=CONF.benchmark.nova_server_suspend_poll_interval,
-            timeout=CONF.benchmark.nova_server_suspend_timeout
+            timeout=CONF.benchmark.nova_server_suspend_timeout,
+            transition="nova.suspend_server"
         )
         self.res_is.mock.assert_has_calls(mock.call('SUSPENDED'))
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
@@ -115,7 +117,8 @@ class NovaScenarioTestCase(test.TestCase):
             is_ready=self.res_is.mock(),
             check_interval=
                 CONF.benchmark.nova_server_image_create_poll_interval,
-            timeout=CONF.benchmark.nova_server_image_create_timeout
+            timeout=CONF.benchmark.nova_server_image_create_timeout,
+            transition="nova.create_image"
         )
         self.res_is.mock.assert_has_calls(mock.call('ACTIVE'))
         self.assertEqual(self.wait_for.mock(), return_image)
@@ -130,7 +133,8 @@ class NovaScenarioTestCase(test.TestCase):
             self.server,
             update_resource=self.gfm(),
             check_interval=CONF.benchmark.nova_server_delete_poll_interval,
-            timeout=CONF.benchmark.nova_server_delete_timeout
+            timeout=CONF.benchmark.nova_server_delete_timeout,
+            transition="nova.delete_server"
         )
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
                                        'nova.delete_server')
@@ -144,7 +148,8 @@ class NovaScenarioTestCase(test.TestCase):
             update_resource=self.gfm(),
             is_ready=self.res_is.mock(),
             check_interval=CONF.benchmark.nova_server_reboot_poll_interval,
-            timeout=CONF.benchmark.nova_server_reboot_timeout
+            timeout=CONF.benchmark.nova_server_reboot_timeout,
+            transition="nova.reboot_server"
         )
         self.res_is.mock.assert_has_calls(mock.call('ACTIVE'))
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
@@ -159,7 +164,8 @@ class NovaScenarioTestCase(test.TestCase):
             update_resource=self.gfm(),
             is_ready=self.res_is.mock(),
             check_interval=CONF.benchmark.nova_server_start_poll_interval,
-            timeout=CONF.benchmark.nova_server_start_timeout
+            timeout=CONF.benchmark.nova_server_start_timeout,
+            transition="nova.start_server"
         )
         self.res_is.mock.assert_has_calls(mock.call('ACTIVE'))
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
@@ -174,7 +180,8 @@ class NovaScenarioTestCase(test.TestCase):
             update_resource=self.gfm(),
             is_ready=self.res_is.mock(),
             check_interval=CONF.benchmark.nova_server_stop_poll_interval,
-            timeout=CONF.benchmark.nova_server_stop_timeout
+            timeout=CONF.benchmark.nova_server_stop_timeout,
+            transition="nova.stop_server"
         )
         self.res_is.mock.assert_has_calls(mock.call('SHUTOFF'))
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
@@ -189,7 +196,8 @@ class NovaScenarioTestCase(test.TestCase):
             update_resource=self.gfm(),
             is_ready=self.res_is.mock(),
             check_interval=CONF.benchmark.nova_server_rescue_poll_interval,
-            timeout=CONF.benchmark.nova_server_rescue_timeout
+            timeout=CONF.benchmark.nova_server_rescue_timeout,
+            transition="nova.rescue_server"
         )
         self.res_is.mock.assert_has_calls(mock.call('RESCUE'))
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
@@ -204,7 +212,8 @@ class NovaScenarioTestCase(test.TestCase):
             update_resource=self.gfm(),
             is_ready=self.res_is.mock(),
             check_interval=CONF.benchmark.nova_server_unrescue_poll_interval,
-            timeout=CONF.benchmark.nova_server_unrescue_timeout
+            timeout=CONF.benchmark.nova_server_unrescue_timeout,
+            transition="nova.unrescue_server"
         )
         self.res_is.mock.assert_has_calls(mock.call('ACTIVE'))
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
@@ -221,13 +230,15 @@ class NovaScenarioTestCase(test.TestCase):
                 self.server, update_resource=self.gfm(),
                 check_interval=
                     CONF.benchmark.nova_server_delete_poll_interval,
-                timeout=CONF.benchmark.nova_server_delete_timeout
+                timeout=CONF.benchmark.nova_server_delete_timeout,
+                transition="nova.delete_server"
             ),
             mock.call(
                 self.server1, update_resource=self.gfm(),
                 check_interval=
                     CONF.benchmark.nova_server_delete_poll_interval,
-                timeout=CONF.benchmark.nova_server_delete_timeout
+                timeout=CONF.benchmark.nova_server_delete_timeout,
+                transition="nova.delete_server"
             )
         ]
         self.assertEqual(expected, self.wait_for_delete.mock.mock_calls)
@@ -242,7 +253,8 @@ class NovaScenarioTestCase(test.TestCase):
             self.image, update_resource=self.gfm(),
             check_interval=
                 CONF.benchmark.nova_server_image_delete_poll_interval,
-            timeout=CONF.benchmark.nova_server_image_delete_timeout
+            timeout=CONF.benchmark.nova_server_image_delete_timeout,
+            transition="nova.delete_image"
         )
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
                                        'nova.delete_image')
@@ -252,22 +264,30 @@ class NovaScenarioTestCase(test.TestCase):
         mock_clients("nova").servers.list.return_value = [self.server,
                                                           self.server1]
         nova_scenario = utils.NovaScenario()
-        nova_scenario._boot_servers('prefix', 'image', 'flavor', 2)
+        with mock.patch.object(nova_scenario, "run_parallel",
+                               wraps=nova_scenario.run_parallel) as parallel:
+            nova_scenario._boot_servers('prefix', 'image', 'flavor', 2)
+        self.assertEqual(CONF.benchmark.nova_servers_boot_wait_concurrency,
+                         parallel.call_args[1]["concurrency"])
         expected = [
             mock.call(
                 self.server, is_ready=self.res_is.mock(),
                 update_resource=self.gfm(),
                 check_interval=CONF.benchmark.nova_server_boot_poll_interval,
-                timeout=CONF.benchmark.nova_server_boot_timeout
+                timeout=CONF.benchmark.nova_server_boot_timeout,
+                transition="nova.boot_server"
             ),
             mock.call(
                 self.server1, is_ready=self.res_is.mock(),
                 update_resource=self.gfm(),
                 check_interval=CONF.benchmark.nova_server_boot_poll_interval,
-                timeout=CONF.benchmark.nova_server_boot_timeout
+                timeout=CONF.benchmark.nova_server_boot_timeout,
+                transition="nova.boot_server"
             )
         ]
-        self.assertEqual(expected, self.wait_for.mock.mock_calls)
+        # The servers are waited for in parallel, so in any order
+        self.assertEqual(2, self.wait_for.mock.call_count)
+        self.wait_for.mock.assert_has_calls(expected, any_order=True)
         self.res_is.mock.assert_has_calls(mock.call('ACTIVE'))
         self._test_atomic_action_timer(nova_scenario.atomic_actions(),
                                        'nova.boot_servers')
@@ -13,7 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import mock
+import threading
 import traceback
 
 from rally.benchmark.context import base as base_ctx
@@ -52,7 +54,17 @@ class ScenarioTestCase(test.TestCase):
         task = mock.MagicMock()
         base.Scenario._validate_helper(validators, clients, args, task)
         for validator in validators:
-            validator.assert_called_with(clients=clients, task=task, **args)
+            validator.assert_called_with(clients=clients, task=task,
+                                         task_context={}, **args)
+
+    def test__validate_helper_context_arg(self):
+        validator = mock.MagicMock(return_value=validation.ValidationResult())
+        base.Scenario._validate_helper([validator], "clients",
+                                       {"context": "arg"}, "task",
+                                       {"users": {}})
+        validator.assert_called_once_with(clients="clients", task="task",
+                                          task_context={"users": {}},
+                                          context="arg")
 
     def test__validate_helper__no_valid(self):
         validators = [
@@ -100,9 +112,9 @@ class ScenarioTestCase(test.TestCase):
         task = mock.MagicMock()
         args = {"a": 1, "b": 2}
         base.Scenario.validate("FakeScenario.do_it", args, admin="admin",
-                               task=task)
+                               task=task, context={"users": {}})
         mock_validate_helper.assert_called_once_with(validators, "admin", args,
-                                                     task)
+                                                     task, {"users": {}})
 
     @mock.patch("rally.benchmark.scenarios.base.Scenario._validate_helper")
     @mock.patch("rally.benchmark.scenarios.base.Scenario.get_by_name")
@@ -124,8 +136,8 @@ class ScenarioTestCase(test.TestCase):
         base.Scenario.validate("FakeScenario.do_it", args, users=["u1", "u2"])
 
         mock_validate_helper.assert_has_calls([
-            mock.call(validators, "u1", args, None),
-            mock.call(validators, "u2", args, None)
+            mock.call(validators, "u1", args, None, {}),
+            mock.call(validators, "u2", args, None, {})
         ])
 
     def test_meta_string_returns_non_empty_list(self):
@@ -209,6 +221,94 @@ class ScenarioTestCase(test.TestCase):
         mock_sleep.assert_called_once_with(mock_uniform.return_value)
         self.assertEqual(scenario.idle_duration(), mock_uniform.return_value)
 
+    @mock.patch("rally.benchmark.scenarios.base.time.sleep")
+    def test_sleep_between_in_parallel(self, mock_sleep):
+        scenario = base.Scenario()
+        scenario.sleep_between(1, 1)
+        started = threading.Condition()
+        count = [0]
+
+        def sleep(duration):
+            # Each call blocks its thread until all of them are started
+            with started:
+                count[0] += 1
+                started.notify_all()
+                while count[0] < 3:
+                    started.wait()
+            scenario.sleep_between(duration, duration)
+
+        # Only the thread that slept the most counts
+        scenario.run_parallel([functools.partial(sleep, 2),
+                               functools.partial(sleep, 4),
+                               functools.partial(sleep, 3)])
+        self.assertEqual(5, scenario.idle_duration())
+        # Calls of the same thread run one after another
+        scenario.run_parallel(
+            [lambda: scenario.sleep_between(1, 1)] * 2, concurrency=1)
+        self.assertEqual(7, scenario.idle_duration())
+
+    @mock.patch("rally.benchmark.scenarios.base.utils.monotonic")
+    def test_atomic_actions(self, mock_monotonic):
+        mock_monotonic.side_effect = [10, 11, 12, 14, 15, 16, 20]
+        scenario = base.Scenario()
+        a = scenario._start_atomic_action("a")
+        b = scenario._start_atomic_action("b")
+        scenario._finish_atomic_action(b)
+        scenario._add_atomic_actions("c", 2)
+        scenario._finish_atomic_action(a)
+        scenario._add_atomic_actions("d", 1)
+
+        self.assertEqual({"action": ["a", "b", "c", "d"],
+                          "parent": [-1, 0, 0, -1],
+                          "start": [1, 2, 3, 9],
+                          "duration": [5, 2, 2, 1]},
+                         scenario.atomic_actions_tree())
+        self.assertEqual([{"action": "a", "duration": 5},
+                          {"action": "b", "duration": 2},
+                          {"action": "c", "duration": 2},
+                          {"action": "d", "duration": 1}],
+                         scenario.atomic_actions())
+
+    def test_run_parallel(self):
+        scenario = base.Scenario()
+        started = threading.Event()
+
+        def _action(name, wait=None):
+            index = scenario._start_atomic_action(name)
+            if wait:
+                # Fails unless the other call is running at the same time
+                self.assertTrue(wait.wait(5))
+            else:
+                started.set()
+            scenario._finish_atomic_action(index)
+            return name
+
+        a = scenario._start_atomic_action("a")
+        results = scenario.run_parallel(
+            [functools.partial(_action, "b", started),
+             functools.partial(_action, "c")], name="group")
+        scenario._finish_atomic_action(a)
+
+        self.assertEqual(["b", "c"], results)
+        tree = scenario.atomic_actions_tree()
+        self.assertEqual(["a", "group"], tree["action"][:2])
+        parents = dict(zip(tree["action"], tree["parent"]))
+        self.assertEqual({"a": -1, "group": 0, "b": 1, "c": 1}, parents)
+        durations = dict(zip(tree["action"], tree["duration"]))
+        self.assertTrue(durations["group"] >= max(durations["b"],
+                                                  durations["c"]))
+
+    def test_run_parallel_failed(self):
+        scenario = base.Scenario()
+        calls = [mock.MagicMock(return_value=1),
+                 mock.MagicMock(side_effect=KeyError),
+                 mock.MagicMock(side_effect=ValueError)]
+        self.assertRaises(KeyError, scenario.run_parallel, calls,
+                          concurrency=1)
+        for call in calls:
+            call.assert_called_once_with()
+        self.assertEqual([], scenario.atomic_actions())
+
     def test_context(self):
         context = mock.MagicMock()
         scenario = base.Scenario(context=context)
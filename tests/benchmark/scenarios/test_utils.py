@@ -17,6 +17,7 @@
 import mock
 
 from jsonschema import exceptions as schema_exceptions
+from rally.benchmark.scenarios import base
 from rally.benchmark.scenarios import utils
 from tests import test
 
@@ -200,12 +201,30 @@ class AtomicActionTestCase(test.TestCase):
         self.assertEqual(c.scenario_instance, fake_scenario_instance)
         self.assertEqual(c.name, 'asdf')
 
-    @mock.patch('rally.utils.time')
-    def test__exit__(self, mock_time):
-        fake_scenario_instance = mock.Mock()
-        self.start = mock_time.time()
-        with utils.AtomicAction(fake_scenario_instance, "asdf"):
-            pass
-        duration = mock_time.time() - self.start
-        fake_scenario_instance._add_atomic_actions.assert_called_once_with(
-                                            'asdf', duration)
+    @mock.patch('rally.utils.monotonic')
+    def test__exit__(self, mock_monotonic):
+        mock_monotonic.side_effect = [1, 3]
+        scenario = mock.Mock()
+        with utils.AtomicAction(scenario, "asdf"):
+            scenario._start_atomic_action.assert_called_once_with("asdf")
+        scenario._finish_atomic_action.assert_called_once_with(
+            scenario._start_atomic_action.return_value, 2)
+
+    def test_nested(self):
+        scenario = base.Scenario()
+
+        @utils.atomic_action_timer("outer")
+        def outer(self):
+            for i in range(2):
+                with utils.AtomicAction(self, "inner"):
+                    pass
+            raise ValueError()
+
+        self.assertRaises(ValueError, outer, scenario)
+        tree = scenario.atomic_actions_tree()
+        self.assertEqual(["outer", "inner", "inner"], tree["action"])
+        self.assertEqual([-1, 0, 0], tree["parent"])
+        self.assertTrue(tree["start"][0] <= tree["start"][1] <=
+                        tree["start"][2])
+        self.assertTrue(tree["duration"][0] >=
+                        tree["duration"][1] + tree["duration"][2])
@@ -0,0 +1,117 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import jsonschema
+
+from rally.benchmark.sla import base
+from tests import test
+
+
+def _result(duration=1.0, error=False, atomic_actions=None):
+    atomic_actions = atomic_actions or []
+    return {"duration": duration, "idle_duration": 0,
+            "error": ["Exception", "oops"] if error else [],
+            "atomic_tree": {
+                "action": [a["action"] for a in atomic_actions],
+                "parent": [-1] * len(atomic_actions),
+                "start": [0] * len(atomic_actions),
+                "duration": [a["duration"] for a in atomic_actions]}}
+
+
+class SLATestCase(test.TestCase):
+
+    def test_validate(self):
+        base.SLA.validate({"max_failure_percent": 10,
+                           "max_avg_duration": 1.5,
+                           "max_p95_per_atomic_action": {"a": 1},
+                           "min_iterations": 5,
+                           "stop_on_violation": False})
+
+    def test_validate_failed(self):
+        for config in [{"max_failure_percent": 101},
+                       {"max_avg_duration": 0},
+                       {"max_p95_per_atomic_action": {"a": "1"}},
+                       {"no_such_criterion": 1}]:
+            self.assertRaises(jsonschema.ValidationError,
+                              base.SLA.validate, config)
+
+    def test_get_by_name(self):
+        self.assertEqual(base.FailureRate,
+                         base.SLA.get_by_name("max_failure_percent"))
+        self.assertIsNone(base.SLA.get_by_name("no_such_criterion"))
+
+
+class FailureRateTestCase(test.TestCase):
+
+    def test_add_iteration(self):
+        sla = base.FailureRate(25)
+        self.assertTrue(sla.add_iteration(_result()))
+        self.assertFalse(sla.add_iteration(_result(error=True)))
+        self.assertFalse(sla.add_iteration(_result()))
+        self.assertTrue(sla.add_iteration(_result()))
+        self.assertEqual({"criterion": "max_failure_percent",
+                          "success": True,
+                          "detail": "Failure rate 25.0% (max 25%)"},
+                         sla.result())
+
+
+class MaxAverageDurationTestCase(test.TestCase):
+
+    def test_add_iteration(self):
+        sla = base.MaxAverageDuration(2.0)
+        self.assertTrue(sla.add_iteration(_result(duration=1.0)))
+        self.assertTrue(sla.add_iteration(_result(duration=100.0,
+                                                  error=True)))
+        self.assertFalse(sla.add_iteration(_result(duration=5.0)))
+        self.assertEqual("Average duration 3.000s (max 2.0s)", sla.details())
+
+
+class MaxPercentileAtomicActionTestCase(test.TestCase):
+
+    def test_add_iteration(self):
+        sla = base.MaxPercentileAtomicAction({"a": 2.0, "b": 1.0})
+        for i in range(19):
+            self.assertTrue(sla.add_iteration(_result(
+                atomic_actions=[{"action": "a", "duration": 1.0}])))
+        self.assertFalse(sla.add_iteration(_result(
+            atomic_actions=[{"action": "a", "duration": 50.0}])))
+        self.assertEqual("a p95 3.450s (max 2.0s); b p95 n/a (max 1.0s)",
+                         sla.details())
+
+
+class SLACheckerTestCase(test.TestCase):
+
+    def test_add_iteration(self):
+        checker = base.SLAChecker({"max_failure_percent": 0,
+                                   "min_iterations": 3})
+        self.assertFalse(checker.add_iteration(_result(error=True)))
+        self.assertFalse(checker.add_iteration(_result()))
+        self.assertTrue(checker.add_iteration(_result()))
+        self.assertEqual([{"criterion": "max_failure_percent",
+                           "success": False,
+                           "detail": "Failure rate 33.3% (max 0%)"}],
+                         checker.results())
+
+    def test_add_iteration_no_stop(self):
+        checker = base.SLAChecker({"max_failure_percent": 0,
+                                   "min_iterations": 1,
+                                   "stop_on_violation": False})
+        self.assertFalse(checker.add_iteration(_result(error=True)))
+        self.assertFalse(checker.results()[0]["success"])
+
+    def test_no_criteria(self):
+        checker = base.SLAChecker({})
+        self.assertFalse(checker.add_iteration(_result(error=True)))
+        self.assertEqual([], checker.results())
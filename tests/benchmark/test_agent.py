@@ -0,0 +1,110 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import mock
+
+from rally.benchmark import agent
+from rally.benchmark import workers
+from tests import fakes
+from tests import test
+
+
+class AgentTestCase(test.TestCase):
+
+    def setUp(self):
+        super(AgentTestCase, self).setUp()
+        self.context = fakes.FakeUserContext({"task":
+                                             {"uuid": "uuid"}}).context
+        self.addCleanup(workers.shutdown_pool)
+
+    def _get_job(self, **kwargs):
+        job = {"cls": fakes.FakeScenario, "method": "do_it",
+               "context": self.context, "args": {}, "iterations": [1, 3, 5],
+               "timeout": 10, "concurrency": 2, "rps": 0,
+               "start_at": time.time()}
+        job.update(kwargs)
+        return job
+
+    def test_encode_job(self):
+        job = self._get_job(context={"task": {"uuid": "uuid"}})
+        self.assertEqual(job, agent.decode_job(agent.encode_job(job)))
+
+    @mock.patch("rally.benchmark.agent.time.sleep")
+    def test_run(self, mock_sleep):
+        before = time.time()
+        results = agent.run(self._get_job(start_at=time.time() + 10))
+        self.assertTrue(mock_sleep.call_args[0][0] > 9)
+        self.assertEqual(3, len(results))
+        for result in results:
+            self.assertFalse(result["error"])
+            self.assertTrue(result["start"] >= before)
+
+    @mock.patch("rally.benchmark.agent.rps.RPSScenarioRunner")
+    def test_run_rps(self, mock_runner):
+        mock_runner.return_value._run_scenario.return_value = ["result"]
+        job = self._get_job(rps=2.5)
+        self.assertEqual(["result"], agent.run(job))
+        self.assertEqual({"type": "rps", "rps": 2.5, "times": 3,
+                          "timeout": 10}, mock_runner.call_args[0][2])
+        mock_runner.return_value._run_scenario.assert_called_once_with(
+            fakes.FakeScenario, "do_it", self.context, {})
+
+    @mock.patch("rally.benchmark.agent.ABORT_POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.agent.workers.cancel_jobs")
+    def test_watch_abort_file(self, mock_cancel_jobs):
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        path = os.path.join(tempdir, "abort")
+        aborted = threading.Event()
+        finished = threading.Event()
+        watcher = threading.Thread(target=agent._watch_abort_file,
+                                   args=(path, 0, aborted, finished))
+        watcher.start()
+        self.assertFalse(aborted.wait(0.05))
+        open(path, "w").close()
+        watcher.join(5)
+        self.assertTrue(aborted.is_set())
+        mock_cancel_jobs.assert_called_once_with()
+
+    @mock.patch("rally.benchmark.agent.ABORT_POLL_INTERVAL", 0.01)
+    @mock.patch("rally.benchmark.agent.workers.cancel_jobs")
+    def test_watch_abort_file_finished(self, mock_cancel_jobs):
+        finished = threading.Event()
+        finished.set()
+        aborted = threading.Event()
+        agent._watch_abort_file("/non/existent", 0, aborted, finished)
+        self.assertFalse(aborted.is_set())
+        self.assertFalse(mock_cancel_jobs.called)
+
+    @mock.patch("rally.benchmark.agent.threading")
+    @mock.patch("rally.benchmark.agent._watch_abort_file")
+    def test_run_abort_file(self, mock_watch, mock_threading):
+        # The agent is aborted before the iterations are started
+        mock_threading.Event = threading.Event
+        mock_threading.Thread.return_value.start.side_effect = (
+            lambda: mock_threading.Thread.call_args[1]["target"](
+                *mock_threading.Thread.call_args[1]["args"]))
+        mock_watch.side_effect = (
+            lambda path, grace_period, aborted, finished: aborted.set())
+        job = self._get_job(abort_file="/tmp/abort", abort_grace_period=5)
+        self.assertEqual([], agent.run(job))
+        self.assertEqual(("/tmp/abort", 5), mock_watch.call_args[0][:2])
+        self.assertTrue(mock_watch.call_args[0][3].is_set())
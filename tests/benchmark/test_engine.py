@@ -15,16 +15,29 @@
 
 """Tests for the Test engine."""
 
+import os
+import signal
+import threading
+import time
+
 import jsonschema
 import mock
 
 from rally.benchmark import engine
+from rally.benchmark import poller
+from rally.benchmark.runners import base as base_runner
+from rally.benchmark import workers
 from rally import consts
 from rally import exceptions
 from tests import fakes
 from tests import test
 
 
+def _get_poller_address(delay):
+    time.sleep(delay)
+    return poller._ADDRESS
+
+
 class BenchmarkEngineTestCase(test.TestCase):
 
     def test_init(self):
@@ -53,6 +66,16 @@ class BenchmarkEngineTestCase(test.TestCase):
         ]
         mock_validate.assert_has_calls(expected_calls)
 
+    def test_validate__aborted(self):
+        task = mock.MagicMock()
+        task.get_status.return_value = consts.TaskStatus.ABORTING
+        task.update_status.side_effect = exceptions.TaskInvalidStatus
+        eng = engine.BenchmarkEngine(mock.MagicMock(), task)
+        eng._validate_config_scenarios_name = mock.MagicMock()
+        eng.validate()
+        self.assertFalse(eng._validate_config_scenarios_name.called)
+        self.assertFalse(task.set_failed.called)
+
     def test_validate__wrong_schema(self):
         config = {
             "wrong": True
@@ -120,6 +143,29 @@ class BenchmarkEngineTestCase(test.TestCase):
         self.assertRaises(exceptions.NotFoundScenarios,
                           eng._validate_config_scenarios_name, config)
 
+    @mock.patch("rally.benchmark.engine.base_scenario.Scenario")
+    def test__validate_config_scenarios_name_mixed(self, mock_scenario):
+        config = {
+            "a": [{"runner": {"type": "mixed",
+                              "scenarios": [{"name": "nonexist",
+                                             "weight": 1}]}}]
+        }
+        mock_scenario.list_benchmark_scenarios.return_value = ["a"]
+        eng = engine.BenchmarkEngine(config, mock.MagicMock())
+
+        self.assertRaises(exceptions.NotFoundScenarios,
+                          eng._validate_config_scenarios_name, config)
+
+    def test_validate__mixed_without_name(self):
+        config = {
+            "Dummy.dummy": [{"runner": {"type": "mixed",
+                                        "scenarios": [{"weight": 1}]}}]
+        }
+        eng = engine.BenchmarkEngine(config, mock.MagicMock())
+        eng._validate_config_scenarios_name(config)
+        self.assertRaises(exceptions.InvalidBenchmarkConfig,
+                          eng._validate_config_syntax, config)
+
     @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner.validate")
     @mock.patch("rally.benchmark.engine.base_ctx.ContextManager.validate")
     def test__validate_config_syntax(self, mock_context, mock_runner):
@@ -154,15 +200,25 @@ class BenchmarkEngineTestCase(test.TestCase):
         self.assertRaises(exceptions.InvalidBenchmarkConfig,
                           eng._validate_config_syntax, config)
 
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner.validate")
+    @mock.patch("rally.benchmark.engine.base_ctx.ContextManager.validate")
+    def test__validate_config_syntax__wrong_sla(self, mock_context,
+                                                mock_runner):
+        config = {"sca": [{"sla": {"max_failure_percent": "a"}}]}
+        eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
+        self.assertRaises(exceptions.InvalidBenchmarkConfig,
+                          eng._validate_config_syntax, config)
+
     @mock.patch("rally.benchmark.engine.base_scenario.Scenario.validate")
     def test__validate_config_semantic_helper(self, mock_validate):
         task = mock.MagicMock()
         eng = engine.BenchmarkEngine(mock.MagicMock(), mock.MagicMock())
         eng._validate_config_sematic_helper("admin", "user", "name", "pos",
-                                            task, {"args": "args"})
+                                            task, {"args": "args",
+                                                   "context": "context"})
         mock_validate.assert_called_once_with(
             "name", "args", admin="admin", users=["user"],
-            task=task)
+            task=task, context="context")
 
     @mock.patch("rally.benchmark.engine.base_scenario.Scenario.validate")
     def test__validate_config_semanitc_helper_invalid_arg(self, mock_validate):
@@ -207,16 +263,298 @@ class BenchmarkEngineTestCase(test.TestCase):
         ]
         mock_helper.assert_has_calls(expected_calls)
 
+    @mock.patch("rally.benchmark.engine.osclients.Clients")
+    @mock.patch("rally.benchmark.engine.users_ctx")
+    @mock.patch("rally.benchmark.engine.BenchmarkEngine"
+                "._validate_config_sematic_helper")
+    def test__validate_config_sematic_mixed(self, mock_helper, mock_userctx,
+                                            mock_osclients):
+        mock_userctx.UserGenerator = fakes.FakeUserContext
+        kw = {"context": {"resource_pool": {}},
+              "runner": {"type": "mixed",
+                         "scenarios": [{"name": "b", "weight": 1}]}}
+        eng = engine.BenchmarkEngine({"a": [kw]}, mock.MagicMock())
+        eng.admin_endpoint = "admin"
+        eng._validate_config_semantic({"a": [kw]})
+
+        user = mock_osclients.return_value
+        mock_helper.assert_has_calls([
+            mock.call(user, user, "a", 0, eng.task, kw),
+            mock.call(user, user, "b", 0, eng.task, {"name": "b", "weight": 1},
+                      context={"resource_pool": {}})
+        ])
+
     def test_run__update_status(self):
         task = mock.MagicMock()
         eng = engine.BenchmarkEngine([], task)
-        results = eng.run()
-        self.assertEqual(results, {})
+        eng.run()
         task.update_status.assert_has_calls([
-            mock.call(consts.TaskStatus.RUNNING),
-            mock.call(consts.TaskStatus.FINISHED)
+            mock.call(consts.TaskStatus.RUNNING,
+                      allowed_statuses=[consts.TaskStatus.INIT,
+                                        consts.TaskStatus.VERIFYING]),
+            mock.call(consts.TaskStatus.FINISHED,
+                      allowed_statuses=[consts.TaskStatus.RUNNING])
         ])
 
+    @mock.patch("rally.benchmark.engine.workers")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__aborted(self, mock_runner, mock_workers):
+        task = mock.MagicMock()
+        task.get_status.return_value = consts.TaskStatus.RUNNING
+        runner = mock_runner.get_runner.return_value
+
+        def run(name, context, args):
+            task.get_status.return_value = consts.TaskStatus.ABORTING
+            return base_runner.ScenarioRunnerResult([])
+
+        runner.run.side_effect = run
+        config = {"a.args": [{"args": {"a": 1}}, {"args": {"a": 2}}]}
+        eng = engine.BenchmarkEngine(config, task)
+        eng.endpoints = [mock.MagicMock()]
+        eng.run()
+        # The results of the aborted benchmark are kept, the next one
+        # isn't started
+        self.assertEqual(1, runner.run.call_count)
+        self.assertEqual(1, task.append_results.call_count)
+        task.update_status.assert_has_calls([
+            mock.call(consts.TaskStatus.RUNNING,
+                      allowed_statuses=[consts.TaskStatus.INIT,
+                                        consts.TaskStatus.VERIFYING]),
+            mock.call(consts.TaskStatus.ABORTED)
+        ])
+
+    def test_run__aborted_before_start(self):
+        task = mock.MagicMock()
+        task.get_status.return_value = consts.TaskStatus.ABORTING
+        task.update_status.side_effect = [exceptions.TaskInvalidStatus,
+                                          None]
+        engine.BenchmarkEngine({"a.args": [{}]}, task).run()
+        task.update_status.assert_has_calls([
+            mock.call(consts.TaskStatus.RUNNING,
+                      allowed_statuses=[consts.TaskStatus.INIT,
+                                        consts.TaskStatus.VERIFYING]),
+            mock.call(consts.TaskStatus.ABORTED)
+        ])
+
+    def test_run__aborted_at_finish(self):
+        task = mock.MagicMock()
+        # Aborted after the last benchmark is finished
+        task.get_status.side_effect = [consts.TaskStatus.RUNNING,
+                                       consts.TaskStatus.ABORTING]
+        task.update_status.side_effect = [None,
+                                          exceptions.TaskInvalidStatus,
+                                          None]
+        engine.BenchmarkEngine([], task).run()
+        task.update_status.assert_called_with(consts.TaskStatus.ABORTED)
+
+    def test_run__invalid_status(self):
+        task = mock.MagicMock()
+        task.get_status.return_value = consts.TaskStatus.FAILED
+        task.update_status.side_effect = exceptions.TaskInvalidStatus
+        self.assertRaises(exceptions.TaskInvalidStatus,
+                          engine.BenchmarkEngine([], task).run)
+
+    @mock.patch("rally.benchmark.engine.ABORT_POLL_INTERVAL", 0.01)
+    def test_watch_abort(self):
+        task = mock.MagicMock()
+        task.get_status.return_value = consts.TaskStatus.RUNNING
+        eng = engine.BenchmarkEngine({}, task)
+        runner = mock.MagicMock()
+        finished = threading.Event()
+        watcher = threading.Thread(target=eng._watch_abort,
+                                   args=(runner, finished))
+        watcher.start()
+        task.get_status.return_value = consts.TaskStatus.ABORTING
+        watcher.join(5)
+        runner.abort.assert_called_once_with()
+
+    def test_watch_abort_finished(self):
+        task = mock.MagicMock()
+        task.get_status.return_value = consts.TaskStatus.RUNNING
+        finished = threading.Event()
+        finished.set()
+        runner = mock.MagicMock()
+        engine.BenchmarkEngine({}, task)._watch_abort(runner, finished)
+        self.assertFalse(runner.abort.called)
+
+    def test_handle_interrupt(self):
+        eng = engine.BenchmarkEngine({}, mock.MagicMock())
+        previous_handler = eng._handle_interrupt()
+        self.addCleanup(signal.signal, signal.SIGINT, previous_handler)
+        os.kill(os.getpid(), signal.SIGINT)
+        self.assertTrue(eng._is_aborting())
+        self.assertEqual(previous_handler, signal.getsignal(signal.SIGINT))
+
+    @mock.patch("rally.benchmark.engine.workers")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__shares_worker_pool(self, mock_runner, mock_workers):
+        mock_runner.get_runner.return_value.run.side_effect = (
+            exceptions.RallyException)
+        config = {"a.args": [{"args": {"a": 1}}]}
+        eng = engine.BenchmarkEngine(config, mock.MagicMock())
+        eng.endpoints = [mock.MagicMock()]
+        self.assertRaises(exceptions.RallyException, eng.run)
+        mock_workers.get_pool.assert_called_once_with()
+        mock_workers.shutdown_pool.assert_called_once_with()
+
+    @mock.patch("rally.benchmark.engine.poller")
+    @mock.patch("rally.benchmark.engine.workers")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__starts_poller(self, mock_runner, mock_workers,
+                                mock_poller):
+        config = {"a.args": [{"args": {"a": 1}}]}
+        eng = engine.BenchmarkEngine(config, mock.MagicMock())
+        eng.endpoints = [mock.MagicMock()]
+        eng.admin_endpoint = eng.endpoints[0]
+        eng.run()
+        mock_poller.start.assert_called_once_with(eng.admin_endpoint)
+        mock_poller.stop.assert_called_once_with()
+
+    @mock.patch("rally.benchmark.poller.osclients")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__poller_address_in_workers(self, mock_runner,
+                                            mock_osclients):
+        self.addCleanup(workers.shutdown_pool)
+        config = {"a.args": [{"args": {"a": 1}}]}
+        eng = engine.BenchmarkEngine(config, mock.MagicMock())
+        eng.endpoints = [mock.MagicMock()]
+        eng.admin_endpoint = eng.endpoints[0]
+        seen = []
+
+        def run(*args, **kwargs):
+            # Both workers are busy at the same time, so each reports
+            seen.append(poller._ADDRESS)
+            seen.extend(workers.get_pool().map(_get_poller_address,
+                                               [0.5, 0.5], concurrency=2))
+            return base_runner.ScenarioRunnerResult([])
+
+        mock_runner.get_runner.return_value.run.side_effect = run
+        with mock.patch.multiple(
+                eng, _validate_config_scenarios_name=mock.DEFAULT,
+                _validate_config_syntax=mock.DEFAULT,
+                # The users context forks the workers of the task
+                _validate_config_semantic=mock.MagicMock(
+                    side_effect=lambda config: workers.get_pool(2))):
+            eng.validate()
+        eng.run()
+        self.assertEqual(3, len(seen))
+        self.assertIsNotNone(seen[0])
+        self.assertEqual([seen[0]] * 3, seen)
+
+    @mock.patch("rally.benchmark.engine.workers")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__stores_runner_info(self, mock_runner, mock_workers):
+        results = [base_runner.ScenarioRunnerResult([]),
+                   base_runner.ScenarioRunnerResult([], info={"knee": 4})]
+        mock_runner.get_runner.return_value.run.side_effect = results
+        config = {"a.args": [{"args": {"a": 1}}, {"args": {"a": 2}}]}
+        task = mock.MagicMock()
+        eng = engine.BenchmarkEngine(config, task)
+        eng.endpoints = [mock.MagicMock()]
+        eng.run()
+        self.assertEqual(
+            [mock.call({"name": "a.args", "pos": 0, "kw": config["a.args"][0]},
+                       {"raw": results[0]}),
+             mock.call({"name": "a.args", "pos": 1, "kw": config["a.args"][1]},
+                       {"raw": results[1], "info": {"knee": 4}})],
+            task.append_results.call_args_list)
+
+    @mock.patch("rally.benchmark.engine.workers")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__stores_sla(self, mock_runner, mock_workers):
+        runner = mock_runner.get_runner.return_value
+        result = {"duration": 1, "error": []}
+
+        def run(name, context, args):
+            runner.sla_checker.add_iteration(result)
+            return base_runner.ScenarioRunnerResult([result])
+
+        runner.run.side_effect = run
+        config = {"a.args": [{"sla": {"max_avg_duration": 0.5}}]}
+        task = mock.MagicMock()
+        eng = engine.BenchmarkEngine(config, task)
+        eng.endpoints = [mock.MagicMock()]
+        eng.run()
+        task.append_results.assert_called_once_with(
+            {"name": "a.args", "pos": 0, "kw": config["a.args"][0]},
+            {"raw": [result],
+             "sla": [{"criterion": "max_avg_duration", "success": False,
+                      "detail": "Average duration 1.000s (max 0.5s)"}]})
+
+    @mock.patch("rally.benchmark.engine.workers")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__streams_results(self, mock_runner, mock_workers):
+        runner = mock_runner.get_runner.return_value
+
+        def run(name, context, args):
+            runner.result_collector.consumer(["chunk"])
+            return base_runner.ScenarioRunnerResult([])
+
+        runner.run.side_effect = run
+        config = {"a.args": [{"args": {"a": 1}}]}
+        task = mock.MagicMock()
+        eng = engine.BenchmarkEngine(config, task)
+        eng.endpoints = [mock.MagicMock()]
+        eng.run()
+        key = {"name": "a.args", "pos": 0, "kw": config["a.args"][0]}
+        self.assertEqual([mock.call(key, {"raw": ["chunk"]}),
+                          mock.call(key, {"raw": []})],
+                         task.append_results.call_args_list)
+
+    def test_get_stages(self):
+        config = {"a.args": [{"group": "g"}, {}, {"group": "g"}]}
+        eng = engine.BenchmarkEngine(config, mock.MagicMock())
+        self.assertEqual(
+            [[("a.args", 0, config["a.args"][0]),
+              ("a.args", 2, config["a.args"][2])],
+             [("a.args", 1, config["a.args"][1])]],
+            eng._get_stages())
+
+    @mock.patch("rally.benchmark.engine.workers")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__concurrent_group(self, mock_runner, mock_workers):
+        started = [threading.Event(), threading.Event()]
+
+        def get_runner(task, endpoints, config):
+            runner = mock.MagicMock()
+
+            def run(name, context, args):
+                # Each benchmark waits for the other one to start
+                started[args["i"]].set()
+                self.assertTrue(started[1 - args["i"]].wait(5))
+                return base_runner.ScenarioRunnerResult([])
+
+            runner.run.side_effect = run
+            return runner
+
+        mock_runner.get_runner.side_effect = get_runner
+        config = {"a.args": [{"args": {"i": 0}, "group": "g"},
+                             {"args": {"i": 1}, "group": "g"}]}
+        task = mock.MagicMock()
+        eng = engine.BenchmarkEngine(config, task)
+        eng.endpoints = [mock.MagicMock()]
+        eng.run()
+        self.assertEqual(2, task.append_results.call_count)
+        self.assertEqual(2, mock_workers.release_pool.call_count)
+        task.update_status.assert_called_with(
+            consts.TaskStatus.FINISHED,
+            allowed_statuses=[consts.TaskStatus.RUNNING])
+
+    @mock.patch("rally.benchmark.engine.workers")
+    @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
+    def test_run__concurrent_group_failed(self, mock_runner, mock_workers):
+        results = [exceptions.RallyException(),
+                   base_runner.ScenarioRunnerResult([])]
+        mock_runner.get_runner.return_value.run.side_effect = results
+        config = {"a.args": [{"group": "g"}, {"group": "g"}]}
+        task = mock.MagicMock()
+        eng = engine.BenchmarkEngine(config, task)
+        eng.endpoints = [mock.MagicMock()]
+        self.assertRaises(exceptions.RallyException, eng.run)
+        # The other benchmark of the group is finished
+        self.assertEqual(1, task.append_results.call_count)
+        mock_workers.shutdown_pool.assert_called_once_with()
+
     @mock.patch("rally.benchmark.engine.endpoint.Endpoint")
     @mock.patch("rally.benchmark.engine.osclients")
     @mock.patch("rally.benchmark.engine.base_runner.ScenarioRunner")
@@ -0,0 +1,134 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+from novaclient.v1_1 import servers
+
+from rally.benchmark import poller
+from rally import exceptions
+from rally.openstack.common.fixture import config
+from tests import test
+
+
+def _server(id, status, tenant_id="t1"):
+    server = mock.MagicMock(id=id, status=status, tenant_id=tenant_id)
+    server.manager = servers.ServerManager(mock.MagicMock())
+    return server
+
+
+class StatusPollerTestCase(test.TestCase):
+
+    def setUp(self):
+        super(StatusPollerTestCase, self).setUp()
+        self.listed = []
+        self.statuses = {}
+        lister = mock.MagicMock(side_effect=self._list)
+        patcher = mock.patch.dict(poller._LISTERS, {"servers": lister})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("rally.benchmark.poller.osclients")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        poller.start(mock.MagicMock())
+        self.addCleanup(poller.stop)
+
+    def _list(self, clients, tenant_id):
+        self.listed.append(tenant_id)
+        return [mock.MagicMock(id=id, status=status)
+                for id, status in self.statuses.items()]
+
+    def _wait_all(self, resources, statuses, timeout=5):
+        results = {}
+
+        def _wait(resource):
+            results[resource.id] = poller.wait(resource, statuses,
+                                               timeout, 0.01)
+
+        threads = [threading.Thread(target=_wait, args=(r,))
+                   for r in resources]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return results
+
+    def test_wait(self):
+        self.statuses = {"a": "ACTIVE", "b": "ERROR"}
+        results = self._wait_all([_server("a", "BUILD"),
+                                  _server("b", "BUILD"),
+                                  _server("c", "BUILD")],
+                                 ["active", "error", "deleted"])
+        self.assertEqual({"a": True, "b": True, "c": True}, results)
+        self.assertTrue(set(self.listed) == set(["t1"]))
+
+    def test_wait_batched(self):
+        self.statuses = {"a": "BUILD", "b": "BUILD"}
+        timer = threading.Timer(0.2, self.statuses.update,
+                                args=({"a": "ACTIVE", "b": "ACTIVE"},))
+        timer.start()
+        results = self._wait_all([_server("a", "BUILD"),
+                                  _server("b", "BUILD")], ["ACTIVE"])
+        timer.join()
+        self.assertEqual({"a": True, "b": True}, results)
+        # Both the servers are polled by the same list requests
+        self.assertTrue(len(self.listed) < 40)
+
+    def test_wait_timeout(self):
+        self.statuses = {"a": "BUILD"}
+        self.assertRaises(exceptions.TimeoutException, poller.wait,
+                          _server("a", "BUILD"), ["ACTIVE"], 0.05, 0.01)
+
+    def test_wait_list_failed(self):
+        poller._LISTERS["servers"].side_effect = Exception
+        self.assertFalse(poller.wait(_server("a", "BUILD"), ["ACTIVE"],
+                                     5, 0.01))
+
+    def test_wait_not_supported(self):
+        resource = mock.MagicMock(id="a", status="BUILD")
+        self.assertFalse(poller.wait(resource, ["ACTIVE"], 5, 0.01))
+        self.assertEqual([], self.listed)
+
+
+class PollerTestCase(test.TestCase):
+
+    def test_wait_not_started(self):
+        self.assertFalse(poller.wait(_server("a", "BUILD"), ["ACTIVE"],
+                                     5, 0.01))
+
+    def test_start_disabled(self):
+        self.useFixture(config.Config()).config(
+            batch_status_polling=False, group="benchmark")
+        poller.start(mock.MagicMock())
+        self.addCleanup(poller.stop)
+        self.assertIsNone(poller._ADDRESS)
+
+    def test_get_key(self):
+        self.assertEqual(("servers", "t1"),
+                         poller._get_key(_server("a", "BUILD")))
+        server = _server("a", "BUILD", tenant_id=None)
+        server.manager.api.client.tenant_id = "t2"
+        self.assertEqual(("servers", "t2"), poller._get_key(server))
+        server.manager.api.client.tenant_id = None
+        self.assertIsNone(poller._get_key(server))
+        self.assertIsNone(poller._get_key(mock.MagicMock()))
+
+    def test_list_servers(self):
+        clients = mock.MagicMock()
+        self.assertEqual(clients.nova().servers.list.return_value,
+                         poller._list_servers(clients, "t1"))
+        clients.nova().servers.list.assert_called_once_with(
+            search_opts={"all_tenants": 1, "tenant_id": "t1"})
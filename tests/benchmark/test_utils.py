@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
 import mock
 
 import datetime
@@ -21,6 +22,7 @@ from tests import test
 
 from rally.benchmark import utils
 from rally import exceptions
+from rally.openstack.common.fixture import config
 
 
 class BenchmarkUtilsTestCase(test.TestCase):
@@ -112,6 +114,20 @@ class BenchmarkUtilsTestCase(test.TestCase):
         result = utils.run_concurrent_helper(args)
         self.assertEqual(cls.test(), result)
 
+    @mock.patch("rally.benchmark.utils.workers")
+    def test_run_concurrent(self, mock_workers):
+        mock_pool = mock_workers.get_pool.return_value
+        mock_pool.map.return_value = [1, 2]
+        cls = mock.MagicMock()
+
+        result = utils.run_concurrent(3, cls, "test", ["a", "b"])
+
+        self.assertEqual([1, 2], list(result))
+        mock_workers.get_pool.assert_called_once_with(3)
+        mock_pool.map.assert_called_once_with(
+            utils.run_concurrent_helper,
+            [(cls, "test", "a"), (cls, "test", "b")], concurrency=3)
+
 
 class WaitForTestCase(test.TestCase):
 
@@ -150,3 +166,85 @@ class WaitForTestCase(test.TestCase):
                           self.resource, self.fake_checker_false,
                           self.fake_updater, self.load_secs,
                           self.load_secs / 3)
+
+    @mock.patch("rally.benchmark.utils.poller.wait")
+    def test_wait_for_by_poller(self, mock_wait):
+        resource = fakes.FakeResource(status="ACTIVE")
+        manager = mock.MagicMock()
+        manager.get.return_value = resource
+        resource.manager = manager
+        loaded_resource = utils.wait_for(
+            resource, utils.resource_is("ACTIVE"),
+            utils.get_from_manager(["ERROR", "failed"]), 10, 2)
+        self.assertEqual(resource, loaded_resource)
+        mock_wait.assert_called_once_with(
+            resource, ["ACTIVE", "DELETED", "ERROR", "FAILED"], 10, 2)
+        manager.get.assert_called_once_with(resource.id)
+
+    @mock.patch("rally.benchmark.utils.poller.wait")
+    def test_wait_for_delete_by_poller(self, mock_wait):
+        resource = mock.MagicMock()
+        resource.manager.get.side_effect = type("NotFound", (Exception,),
+                                                {"code": 404})
+        utils.wait_for_delete(resource, utils.get_from_manager(), 10, 2)
+        mock_wait.assert_called_once_with(resource, ["DELETED", "ERROR"],
+                                          10, 2)
+
+
+class PollIntervalsTestCase(test.TestCase):
+
+    def setUp(self):
+        super(PollIntervalsTestCase, self).setUp()
+        self.config = self.useFixture(config.Config()).config
+        self.config(poll_min_interval=0.5, poll_max_interval=4,
+                    group="benchmark")
+        transitions = mock.patch.dict(utils._transitions, clear=True)
+        transitions.start()
+        self.addCleanup(transitions.stop)
+
+    def _intervals(self, strategy, count, transition=None):
+        self.config(poll_strategy=strategy, group="benchmark")
+        return list(itertools.islice(utils.poll_intervals(2, transition),
+                                     count))
+
+    def test_fixed(self):
+        self.assertEqual([2, 2, 2], self._intervals("fixed", 3))
+
+    @mock.patch("rally.benchmark.utils.random.uniform", return_value=1)
+    def test_backoff(self, mock_uniform):
+        self.assertEqual([0.5, 1, 2, 4, 4], self._intervals("backoff", 5))
+        mock_uniform.assert_called_with(0.5, 1)
+
+    @mock.patch("rally.benchmark.utils.random.uniform", return_value=1)
+    def test_learned_not_enough_samples(self, mock_uniform):
+        for duration in range(utils.MIN_TRANSITION_SAMPLES - 1):
+            utils._record_transition("a", duration)
+        self.assertEqual([0.5, 1, 2], self._intervals("learned", 3, "a"))
+        self.assertEqual([0.5, 1, 2], self._intervals("learned", 3))
+
+    @mock.patch("rally.benchmark.utils.random.uniform", return_value=1)
+    def test_learned(self, mock_uniform):
+        for duration in [20, 20, 21, 22, 30, 30]:
+            utils._record_transition("a", duration)
+        # Sparse until the shortest duration, dense (every tenth of 20..30)
+        # until the longest one, backoff from the dense interval after that
+        self.assertEqual([4, 4, 4, 4, 3] + [1] * 11 + [2, 4, 4],
+                         self._intervals("learned", 19, "a"))
+
+    def test_min_interval_above_max(self):
+        self.config(poll_min_interval=5, poll_max_interval=4,
+                    group="benchmark")
+        self.assertRaises(exceptions.InvalidArgumentsException,
+                          self._intervals, "backoff", 1)
+
+    @mock.patch("rally.benchmark.utils.time")
+    def test_wait_for_records_transition(self, mock_time):
+        mock_time.time.side_effect = [0, 3, 5, 7, 8, 9]
+        is_ready = mock.MagicMock(side_effect=[False, True])
+        utils.wait_for("resource", is_ready, transition="a")
+        utils.wait_for_delete(
+            "resource", mock.MagicMock(side_effect=[
+                "resource", exceptions.GetResourceNotFound(resource="r")]),
+            transition="b")
+        self.assertEqual([5], list(utils._transitions["a"]))
+        self.assertEqual([2], list(utils._transitions["b"]))
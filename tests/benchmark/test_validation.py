@@ -377,3 +377,30 @@ class ValidationUtilsTestCase(test.TestCase):
                            task=mock.MagicMock())
 
         self.assertTrue(result.is_valid)
+
+    def test_required_context(self):
+        validator = validation.required_context("resource_pool", ["servers"])
+        result = validator(task_context={"resource_pool": {"servers": {}}})
+        self.assertTrue(result.is_valid)
+
+        result = validator(task_context={})
+        self.assertFalse(result.is_valid)
+        self.assertEqual(_("The scenario requires the '%s' context")
+                         % "resource_pool", result.msg)
+
+        result = validator(task_context={"resource_pool": {"volumes": {}}})
+        self.assertFalse(result.is_valid)
+
+        # A scenario arg named "context" isn't taken for the task context
+        result = validator(task_context={"resource_pool": {"servers": {}}},
+                           context={})
+        self.assertTrue(result.is_valid)
+
+    def test_required_parameters(self):
+        validator = validation.required_parameters(["a", "context"])
+        result = validator(a=1, context={}, task_context={})
+        self.assertTrue(result.is_valid)
+
+        # The task context doesn't make up for the missing "context" arg
+        result = validator(a=1, task_context={})
+        self.assertFalse(result.is_valid)
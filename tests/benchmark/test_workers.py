@@ -0,0 +1,267 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+import os
+import threading
+import time
+
+import mock
+
+from rally.benchmark import workers
+from rally import exceptions
+from rally.openstack.common.fixture import config
+from tests import test
+
+
+def _square(x):
+    return x * x
+
+
+def _pid(x):
+    time.sleep(x)
+    return os.getpid()
+
+
+def _fail(x):
+    raise ValueError(x)
+
+
+def _get_shared(key):
+    return workers._SHARED.get(key)
+
+
+class WorkerPoolTestCase(test.TestCase):
+
+    def setUp(self):
+        super(WorkerPoolTestCase, self).setUp()
+        self.pool = workers.WorkerPool(2)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_apply_async(self):
+        result = self.pool.apply_async(_square, (3,))
+        self.assertEqual(9, result.get(5))
+        self.assertEqual((3,), result.args)
+        self.assertTrue(result.ready())
+        self.assertTrue(result.successful())
+
+    def test_apply_async_callback(self):
+        called = threading.Event()
+        callback = mock.MagicMock(side_effect=lambda r: called.set())
+        result = self.pool.apply_async(_square, (3,), callback=callback)
+        called.wait(5)
+        callback.assert_called_once_with(result)
+
+    def test_apply_async_exception(self):
+        result = self.pool.apply_async(_fail, ("oops",))
+        self.assertRaises(ValueError, result.get, 5)
+        self.assertFalse(result.successful())
+
+    def test_apply_async_closed(self):
+        self.pool.shutdown()
+        self.assertRaises(exceptions.WorkerPoolClosed,
+                          self.pool.apply_async, _square, (1,))
+
+    def test_workers_are_reused(self):
+        pids = set(self.pool.map(_pid, [0.01] * 10))
+        self.assertEqual(set(w.pid for w in self.pool._workers), pids)
+
+    def test_resize(self):
+        self.pool.resize(4)
+        self.assertEqual(4, self.pool.size)
+        self.pool.resize(1)
+        self.assertEqual(1, self.pool.size)
+        self.assertEqual([1, 4], self.pool.map(_square, [1, 2]))
+
+    def test_map(self):
+        self.assertEqual([x * x for x in range(10)],
+                         self.pool.map(_square, range(10), concurrency=3))
+
+    def test_imap_unordered_concurrency(self):
+        self.pool.resize(4)
+        results = list(self.pool.imap_unordered(_pid, [0.05] * 4,
+                                                concurrency=1))
+        self.assertEqual(4, len(results))
+        self.assertEqual(1, len(set(r.get() for r in results)))
+
+    def test_imap_unordered_dynamic_concurrency(self):
+        self.pool.resize(4)
+        limit = mock.Mock(return_value=1)
+        results = list(self.pool.imap_unordered(_pid, [0.05] * 4,
+                                                concurrency=limit))
+        self.assertEqual(4, len(results))
+        self.assertEqual(1, len(set(r.get() for r in results)))
+        self.assertTrue(limit.called)
+
+    def test_imap_unordered_timeout(self):
+        results = list(self.pool.imap_unordered(_pid, [0, 10], timeout=0.5))
+        self.assertTrue(results[0].successful())
+        self.assertFalse(results[1].successful())
+        self.assertRaises(multiprocessing.TimeoutError, results[1].get, 0)
+        self.assertEqual(2, self.pool.size)
+
+    def test_imap_unordered_timeout_since_dispatch(self):
+        # The jobs waiting for the only worker aren't timed out
+        self.pool.resize(1)
+        results = list(self.pool.imap_unordered(_pid, [0.3] * 3,
+                                                concurrency=3, timeout=0.5))
+        self.assertEqual(3, len(results))
+        self.assertTrue(all(r.successful() for r in results))
+        self.assertTrue(all(r.dispatched for r in results))
+
+    def test_cancel(self):
+        result = self.pool.apply_async(_pid, (10,))
+        time.sleep(0.1)
+        worker = next(w for w in self.pool._workers
+                      if w.job == result.job_id)
+        result.cancel()
+        self.assertRaises(multiprocessing.TimeoutError, result.get, 0)
+        worker.process.join(5)
+        self.assertFalse(worker.process.is_alive())
+        self.assertNotIn(worker, self.pool._workers)
+        self.assertEqual(2, self.pool.size)
+        self.assertEqual(4, self.pool.apply_async(_square, (2,)).get(5))
+
+    def test_cancel_pending(self):
+        self.pool.resize(1)
+        running = self.pool.apply_async(_pid, (0.2,))
+        pending = self.pool.apply_async(_square, (2,))
+        pending.cancel()
+        self.assertRaises(multiprocessing.TimeoutError, pending.get, 0)
+        self.assertTrue(running.get(5))
+        self.assertEqual(0, len(self.pool._pending))
+
+    def test_cancel_all(self):
+        results = [self.pool.apply_async(_pid, (10,)) for i in range(3)]
+        self.pool.cancel_all()
+        for result in results:
+            self.assertRaises(multiprocessing.TimeoutError, result.get, 0)
+        self.assertEqual(2, self.pool.size)
+
+    def test_cancel_all_owner(self):
+        results = [self.pool.apply_async(_pid, (10,)) for i in range(2)]
+        thread = threading.Thread(target=lambda: results.append(
+            self.pool.apply_async(_square, (3,))))
+        thread.start()
+        thread.join()
+        self.pool.cancel_all(owner=threading.current_thread().ident)
+        for result in results[:2]:
+            self.assertRaises(multiprocessing.TimeoutError, result.get, 0)
+        self.assertEqual(9, results[2].get(5))
+
+    def test_cancel_finished(self):
+        result = self.pool.apply_async(_square, (3,))
+        result.get(5)
+        result.cancel()
+        self.assertEqual(9, result.get(0))
+
+    def test_call_all_busy_worker(self):
+        busy = self.pool.apply_async(_pid, (1,))
+        value = "x" * 1024 * 1024
+        started = time.time()
+        # The value doesn't fit into the pipe of the busy worker, which
+        # doesn't read it until its job is finished
+        self.pool.call_all(workers._install_shared, ("key", value))
+        self.addCleanup(workers._SHARED.pop, "key", None)
+        self.assertEqual(9, self.pool.apply_async(_square, (3,)).get(5))
+        self.assertTrue(time.time() - started < 1)
+        busy.get(5)
+        self.assertEqual([len(value)] * 2,
+                         [len(v) for v in self.pool.map(
+                             _get_shared, ["key"] * 2, concurrency=2)])
+
+    def test_worker_lost(self):
+        worker = self.pool._workers[0]
+        worker.process.terminate()
+        worker.listener.join(5)
+        self.assertEqual(2, self.pool.size)
+        self.assertNotIn(worker, self.pool._workers)
+
+
+class TaskPoolTestCase(test.TestCase):
+
+    def setUp(self):
+        super(TaskPoolTestCase, self).setUp()
+        self.addCleanup(workers.shutdown_pool)
+
+    def test_get_pool(self):
+        pool = workers.get_pool()
+        self.assertEqual(1, pool.size)
+        self.assertIs(pool, workers.get_pool(3))
+        self.assertEqual(3, pool.size)
+        self.assertIs(pool, workers.get_pool(2))
+        self.assertEqual(3, pool.size)
+
+    def _get_pool_in_thread(self, size):
+        thread = threading.Thread(target=workers.get_pool, args=(size,))
+        thread.start()
+        thread.join()
+
+    def test_get_pool_concurrent_benchmarks(self):
+        pool = workers.get_pool(2)
+        self._get_pool_in_thread(3)
+        self.assertEqual(5, pool.size)
+        workers.release_pool()
+        self.assertEqual(5, pool.size)
+        # The released workers are reused, the pool isn't grown
+        self.assertIs(pool, workers.get_pool(2))
+        self.assertEqual(5, pool.size)
+
+    def test_get_pool_max_concurrency(self):
+        self.useFixture(config.Config()).config(max_concurrency=4,
+                                                group="benchmark")
+        pool = workers.get_pool(2)
+        self._get_pool_in_thread(3)
+        self.assertEqual(4, pool.size)
+
+    @mock.patch("rally.benchmark.workers._POOL")
+    def test_cancel_jobs(self, mock_pool):
+        workers.cancel_jobs()
+        mock_pool.cancel_all.assert_called_once_with(None)
+        workers.cancel_jobs(42)
+        mock_pool.cancel_all.assert_called_with(42)
+
+    def test_share(self):
+        pool = workers.get_pool(1)
+        key = workers.share({"a": 1})
+        self.addCleanup(workers._SHARED.pop, key, None)
+        self.assertEqual({"a": 1}, workers.get_shared(key))
+        # The running worker receives the value through the pipe
+        self.assertEqual({"a": 1},
+                         pool.apply_async(_get_shared, (key,)).get(5))
+        # The new workers inherit it
+        pool.resize(3)
+        self.assertEqual([{"a": 1}] * 3,
+                         pool.map(_get_shared, [key] * 3, concurrency=3))
+
+        workers.unshare(key)
+        self.assertNotIn(key, workers._SHARED)
+        self.assertEqual([None] * 3,
+                         pool.map(_get_shared, [key] * 3, concurrency=3))
+
+    def test_share_without_pool(self):
+        key = workers.share("value")
+        self.assertEqual("value", workers.get_shared(key))
+        self.assertEqual("value", workers.get_pool().apply_async(
+            _get_shared, (key,)).get(5))
+        workers.unshare(key)
+        self.assertRaises(KeyError, workers.get_shared, key)
+
+    def test_shutdown_pool(self):
+        pool = workers.get_pool()
+        workers.shutdown_pool()
+        self.assertRaises(exceptions.WorkerPoolClosed,
+                          pool.apply_async, _square, (1,))
+        self.assertIsNot(pool, workers.get_pool())
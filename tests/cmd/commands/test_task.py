@@ -51,6 +51,19 @@ class TaskCommandsTestCase(test.TestCase):
         self.assertRaises(exceptions.InvalidArgumentsException,
                           self.task.start, 'path_to_config.json', None)
 
+    @mock.patch("rally.cmd.commands.task.db")
+    def test_sla_check(self, mock_db):
+        sla = [{"criterion": "max_failure_percent", "success": True,
+                "detail": "ok"}]
+        mock_db.task_result_get_all_by_uuid.return_value = [
+            {"key": {"name": "a", "pos": 0}, "data": {"raw": [], "sla": sla}},
+            {"key": {"name": "b", "pos": 0}, "data": {"raw": []}}]
+        self.assertEqual(0, self.task.sla_check("uuid", tojson=True))
+        mock_db.task_result_get_all_by_uuid.assert_called_once_with("uuid")
+
+        sla[0]["success"] = False
+        self.assertEqual(1, self.task.sla_check("uuid"))
+
     @mock.patch("rally.cmd.commands.task.api")
     def test_abort(self, mock_api):
         test_uuid = str(uuid.uuid4())
@@ -92,6 +105,89 @@ class TaskCommandsTestCase(test.TestCase):
         self.task.detailed(test_uuid)
         mock_db.task_get_detailed.assert_called_once_with(test_uuid)
 
+    @mock.patch('rally.cmd.commands.task.common_cliutils.print_list')
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_mixed(self, mock_db, mock_print_list):
+        raw = [
+            {"duration": 1, "idle_duration": 0, "error": [],
+             "scenario": "A.a",
+             "atomic_actions": [{"action": "a", "duration": 0.5}]},
+            {"duration": 2, "idle_duration": 0, "error": [],
+             "scenario": "B.b",
+             "atomic_tree": {"action": ["b", "b"], "parent": [-1, -1],
+                             "start": [0, 1], "duration": [0.5, 1]}},
+            {"duration": 3, "idle_duration": 0, "error": ["e"],
+             "scenario": "B.b", "atomic_actions": [], "cpu_duration": 0.1}
+        ]
+        mock_db.task_get_detailed.return_value = {
+            "id": "task",
+            "uuid": "uuid",
+            "status": "status",
+            "results": [{"key": {"name": "A.a", "pos": 0, "kw": {}},
+                         "data": {"raw": raw}}],
+            "failed": False
+        }
+        self.task.detailed("uuid")
+        actions, scenarios = mock_print_list.call_args_list
+        # Success of an action is relative to its scenario iterations
+        self.assertEqual([("a", 1, "100.0%", 1), ("b", 2, "50.0%", 2),
+                          ("total", 3, "66.7%", 1)],
+                         [(row.action, row.count, row.success, row.repeats)
+                          for row in actions[0][0]])
+        self.assertEqual([("A.a", 1, "100.0%"), ("B.b", 2, "50.0%")],
+                         [(row.action, row.count, row.success)
+                          for row in scenarios[0][0]])
+
+    @mock.patch('rally.cmd.commands.task.common_cliutils.print_list')
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_corrected(self, mock_db, mock_print_list):
+        raw = [
+            {"duration": 1, "idle_duration": 0, "error": [],
+             "atomic_actions": [], "scheduled_start": 10, "start": 10},
+            {"duration": 1, "idle_duration": 0, "error": [],
+             "atomic_actions": [], "scheduled_start": 11, "start": 14}
+        ]
+        mock_db.task_get_detailed.return_value = {
+            "id": "task",
+            "uuid": "uuid",
+            "status": "status",
+            "results": [{"key": {"name": "A.a", "pos": 0, "kw": {}},
+                         "data": {"raw": raw}}],
+            "failed": False
+        }
+        self.task.detailed("uuid")
+        rows = mock_print_list.call_args[0][0]
+        self.assertEqual([("total", 1), ("total (corrected)", 4)],
+                         [(row.action, row.__dict__["max (sec)"])
+                          for row in rows])
+
+    @mock.patch('rally.cmd.commands.task.common_cliutils.print_list')
+    @mock.patch('rally.cmd.commands.task.db')
+    def test_detailed_iterations_data(self, mock_db, mock_print_list):
+        raw = [
+            {"duration": 1, "idle_duration": 0, "error": [],
+             "atomic_tree": {"action": ["a"], "parent": [-1],
+                             "start": [0], "duration": [0.5]}},
+            {"duration": 2, "idle_duration": 0, "error": [],
+             "atomic_tree": {"action": ["b"], "parent": [-1],
+                             "start": [0], "duration": [1.5]}}
+        ]
+        mock_db.task_get_detailed.return_value = {
+            "id": "task",
+            "uuid": "uuid",
+            "status": "status",
+            "results": [{"key": {"name": "A.a", "pos": 0, "kw": {}},
+                         "data": {"raw": raw}}],
+            "failed": False
+        }
+        self.task.detailed("uuid", iterations_data=True)
+        iterations = mock_print_list.call_args_list[1]
+        formatters = iterations[1]["formatters"]
+        # The action missing in the iteration is shown as "n/a"
+        self.assertEqual([(0.5, "n/a"), ("n/a", 1.5)],
+                         [(formatters["a"](row), formatters["b"](row))
+                          for row in iterations[0][0]])
+
     @mock.patch('rally.cmd.commands.task.envutils.get_global')
     def test_detailed_no_task_id(self, mock_default):
         mock_default.side_effect = exceptions.InvalidArgumentsException
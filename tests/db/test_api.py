@@ -72,6 +72,25 @@ class TasksTestCase(test.DBTestCase):
             db_task = self._get_task(_uuid)
             self.assertEqual(db_task['status'], status)
 
+    def test_task_update_status(self):
+        _uuid = self._create_task({})['uuid']
+        task = db.task_update_status(_uuid, consts.TaskStatus.ABORTING,
+                                     [consts.TaskStatus.INIT])
+        self.assertEqual(consts.TaskStatus.ABORTING, task['status'])
+        self.assertRaises(exceptions.TaskInvalidStatus,
+                          db.task_update_status, _uuid,
+                          consts.TaskStatus.RUNNING,
+                          [consts.TaskStatus.INIT,
+                           consts.TaskStatus.VERIFYING])
+        self.assertEqual(consts.TaskStatus.ABORTING,
+                         self._get_task(_uuid)['status'])
+
+    def test_task_update_status_not_found(self):
+        self.assertRaises(exceptions.TaskNotFound,
+                          db.task_update_status, str(uuid.uuid4()),
+                          consts.TaskStatus.RUNNING,
+                          [consts.TaskStatus.INIT])
+
     def test_task_list_empty(self):
         self.assertEqual([], db.task_list())
 
@@ -546,6 +546,10 @@ class FakeRunner(object):
         "required": ["type", "a"]
     }
 
+    @classmethod
+    def _validate_config(cls, config):
+        pass
+
 
 class FakeScenario(base.Scenario):
 
@@ -570,6 +574,11 @@ class FakeScenario(base.Scenario):
 
 class FakeTimer(rally_utils.Timer):
 
+    def __enter__(self):
+        super(FakeTimer, self).__enter__()
+        self.start = 0
+        return self
+
     def duration(self):
         return 10
 
@@ -94,6 +94,26 @@ class TaskTestCase(test.TestCase):
                                             {'opt': 'val2'})
         self.assertEqual(deploy['opt'], 'val2')
 
+    @mock.patch('rally.objects.task.db.task_update_status')
+    def test_update_status_allowed(self, mock_update_status):
+        mock_update_status.return_value = dict(
+            self.task, status=consts.TaskStatus.RUNNING)
+        task = objects.Task(task=self.task)
+        task.update_status(consts.TaskStatus.RUNNING,
+                           allowed_statuses=[consts.TaskStatus.INIT])
+        mock_update_status.assert_called_once_with(
+            self.task['uuid'], consts.TaskStatus.RUNNING,
+            [consts.TaskStatus.INIT])
+        self.assertEqual(consts.TaskStatus.RUNNING, task['status'])
+
+    @mock.patch('rally.objects.task.db.task_get')
+    def test_get_status(self, mock_get):
+        mock_get.return_value = dict(self.task,
+                                     status=consts.TaskStatus.ABORTING)
+        task = objects.Task(task=self.task)
+        self.assertEqual(consts.TaskStatus.ABORTING, task.get_status())
+        mock_get.assert_called_once_with(self.task['uuid'])
+
     @mock.patch('rally.objects.task.db.task_update')
     def test_update_status(self, mock_update):
         mock_update.return_value = self.task
@@ -20,6 +20,7 @@ import uuid
 
 from rally.benchmark.scenarios import base
 from rally import consts
+from rally import exceptions
 from rally.orchestrator import api
 from tests import fakes
 from tests import test
@@ -110,15 +111,18 @@ class APITestCase(test.TestCase):
     @mock.patch('rally.benchmark.engine.base_runner.ScenarioRunner.get_runner')
     @mock.patch('rally.objects.deploy.db.deployment_get')
     @mock.patch('rally.objects.task.db.task_result_create')
-    @mock.patch('rally.objects.task.db.task_update')
+    @mock.patch('rally.objects.task.db.task_get')
+    @mock.patch('rally.objects.task.db.task_update_status')
     @mock.patch('rally.objects.task.db.task_create')
-    def test_start_task(self, mock_task_create, mock_task_update,
-                        mock_task_result_create, mock_deploy_get,
-                        mock_utils_runner, mock_osclients,
+    def test_start_task(self, mock_task_create, mock_task_update_status,
+                        mock_task_get, mock_task_result_create,
+                        mock_deploy_get, mock_utils_runner, mock_osclients,
                         mock_validate_names, mock_validate_syntax,
                         mock_validate_semantic):
         mock_task_create.return_value = self.task
-        mock_task_update.return_value = self.task
+        mock_task_update_status.return_value = self.task
+        mock_task_get.return_value = dict(self.task,
+                                          status=consts.TaskStatus.RUNNING)
         mock_deploy_get.return_value = self.deployment
 
         mock_utils_runner.return_value = mock_runner = mock.Mock()
@@ -132,10 +136,12 @@ class APITestCase(test.TestCase):
         mock_task_create.assert_called_once_with({
             'deployment_uuid': self.deploy_uuid,
         })
-        mock_task_update.assert_has_calls([
-            mock.call(self.task_uuid, {'status': consts.TaskStatus.VERIFYING}),
-            mock.call(self.task_uuid, {'status': consts.TaskStatus.RUNNING}),
-            mock.call(self.task_uuid, {'status': consts.TaskStatus.FINISHED})
+        started = [consts.TaskStatus.INIT, consts.TaskStatus.VERIFYING]
+        mock_task_update_status.assert_has_calls([
+            mock.call(self.task_uuid, consts.TaskStatus.VERIFYING, started),
+            mock.call(self.task_uuid, consts.TaskStatus.RUNNING, started),
+            mock.call(self.task_uuid, consts.TaskStatus.FINISHED,
+                      [consts.TaskStatus.RUNNING])
         ])
         # NOTE(akscram): It looks really awful, but checks degradation.
         mock_task_result_create.assert_called_once_with(
@@ -164,8 +170,23 @@ class APITestCase(test.TestCase):
             }
         )
 
-    def test_abort_task(self):
-        self.assertRaises(NotImplementedError, api.abort_task,
+    @mock.patch('rally.objects.task.db.task_update_status')
+    @mock.patch('rally.objects.task.db.task_get')
+    def test_abort_task(self, mock_task_get, mock_task_update_status):
+        mock_task_get.return_value = self.task
+        api.abort_task(self.task_uuid)
+        mock_task_update_status.assert_called_once_with(
+            self.task_uuid, consts.TaskStatus.ABORTING,
+            [consts.TaskStatus.INIT, consts.TaskStatus.VERIFYING,
+             consts.TaskStatus.SETTING_UP, consts.TaskStatus.RUNNING])
+
+    @mock.patch('rally.objects.task.db.task_update_status')
+    @mock.patch('rally.objects.task.db.task_get')
+    def test_abort_task_not_running(self, mock_task_get,
+                                    mock_task_update_status):
+        mock_task_get.return_value = self.task
+        mock_task_update_status.side_effect = exceptions.TaskInvalidStatus
+        self.assertRaises(exceptions.TaskInvalidStatus, api.abort_task,
                           self.task_uuid)
 
     @mock.patch('rally.objects.task.db.task_delete')
@@ -19,6 +19,7 @@ from oslotest import base
 
 from rally import db
 from rally.openstack.common.fixture import config
+from rally import osclients  # noqa
 
 
 class DatabaseFixture(config.Config):
@@ -31,12 +32,20 @@ class DatabaseFixture(config.Config):
         db.db_create()
 
 
+class TokenStoreFixture(config.Config):
+    """Disable the keystone token store shared by processes of the host."""
+    def setUp(self):
+        super(TokenStoreFixture, self).setUp()
+        self.conf.set_default("keystone_token_store", "")
+
+
 class TestCase(base.BaseTestCase):
     """Test case base class for all unit tests."""
 
     def setUp(self):
         super(TestCase, self).setUp()
         self.addCleanup(mock.patch.stopall)
+        self.useFixture(TokenStoreFixture())
 
 
 class DBTestCase(TestCase):
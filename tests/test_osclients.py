@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+
 import mock
 
 from keystoneclient import exceptions as keystone_exceptions
@@ -20,7 +22,9 @@ from oslo.config import cfg
 
 from rally import exceptions
 from rally.objects import endpoint
+from rally.openstack.common.fixture import config
 from rally import osclients
+from rally import tokenstore
 from tests import fakes
 from tests import test
 
@@ -32,6 +36,7 @@ class OSClientsTestCase(test.TestCase):
         self.endpoint = endpoint.Endpoint("http://auth_url", "use", "pass",
                                           "tenant")
         self.clients = osclients.Clients(self.endpoint)
+        self.conf = self.useFixture(config.Config()).conf
 
     def test_keystone(self):
         with mock.patch("rally.osclients.keystone") as mock_keystone:
@@ -46,6 +51,82 @@ class OSClientsTestCase(test.TestCase):
             mock_keystone.Client.assert_called_once_with(**kwargs)
             self.assertEqual(self.clients.cache["keystone"], fake_keystone)
 
+    @mock.patch("rally.osclients.get_token_store")
+    @mock.patch("rally.osclients.keystone")
+    def test_keystone_token_store_hit(self, mock_keystone, mock_store):
+        mock_store.return_value.get.return_value = {"token": "token"}
+        client = self.clients.keystone()
+        self.assertEqual(mock_keystone.Client.return_value, client)
+        mock_store.return_value.get.assert_called_once_with(
+            tokenstore.endpoint_key(self.endpoint))
+        self.assertEqual({"token": "token"},
+                         mock_keystone.Client.call_args[1]["auth_ref"])
+        self.assertFalse(client.authenticate.called)
+
+    @mock.patch("rally.osclients.get_token_store")
+    @mock.patch("rally.osclients.keystone")
+    def test_keystone_token_store_miss(self, mock_keystone, mock_store):
+        mock_store.return_value.get.return_value = None
+        client = self.clients.keystone()
+        client.authenticate.assert_called_once_with()
+        mock_store.return_value.put.assert_called_once_with(
+            tokenstore.endpoint_key(self.endpoint), client.auth_ref)
+
+    @mock.patch("rally.osclients.get_token_store")
+    @mock.patch("rally.osclients.keystone")
+    def test_keystone_token_store_failed(self, mock_keystone, mock_store):
+        mock_store.return_value.get.return_value = None
+        mock_keystone.Client.return_value.authenticate.side_effect = (
+            keystone_exceptions.Unauthorized)
+        self.assertRaises(keystone_exceptions.Unauthorized,
+                          self.clients.keystone)
+        mock_store.return_value.release.assert_called_once_with(
+            tokenstore.endpoint_key(self.endpoint))
+        self.assertFalse(mock_store.return_value.put.called)
+
+    @mock.patch("rally.osclients.tokenstore.TokenStore")
+    def test_get_token_store(self, mock_token_store):
+        self.assertIsNone(osclients.get_token_store())
+        self.conf.set_override("keystone_token_store", "~/tokens")
+        self.addCleanup(osclients._CACHE.update, {"token_store": None})
+        store = osclients.get_token_store()
+        path = os.path.expanduser("~/tokens")
+        mock_token_store.assert_called_once_with(
+            path,
+            stale_duration=cfg.CONF.openstack_client_token_stale_duration)
+        mock_token_store.return_value.path = path
+        self.assertIs(store, osclients.get_token_store())
+
+    def test_is_unauthorized(self):
+        self.assertTrue(osclients.is_unauthorized(
+            keystone_exceptions.Unauthorized()))
+        self.assertTrue(osclients.is_unauthorized(
+            mock.MagicMock(code=401)))
+        self.assertTrue(osclients.is_unauthorized(
+            mock.MagicMock(code=None, http_status=401)))
+        self.assertFalse(osclients.is_unauthorized(
+            mock.MagicMock(code=404, http_status=None, status_code=None)))
+        self.assertFalse(osclients.is_unauthorized(Exception()))
+
+    @mock.patch("rally.osclients.get_token_store")
+    def test_forget_tokens(self, mock_store):
+        osclients.forget_tokens([self.endpoint])
+        mock_store.return_value.prune.assert_called_once_with(
+            [tokenstore.endpoint_key(self.endpoint)])
+
+        mock_store.return_value = None
+        osclients.forget_tokens([self.endpoint])
+
+    @mock.patch("rally.osclients.get_token_store")
+    @mock.patch("rally.osclients.keystone")
+    def test_evict_token(self, mock_keystone, mock_store):
+        clients = osclients.cached_clients(self.endpoint)
+        self.assertIs(clients, osclients.cached_clients(self.endpoint))
+        osclients.evict_token(self.endpoint)
+        mock_store.return_value.evict.assert_called_once_with(
+            tokenstore.endpoint_key(self.endpoint))
+        self.assertIsNot(clients, osclients.cached_clients(self.endpoint))
+
     @mock.patch("rally.osclients.Clients.keystone")
     def test_verified_keystone_user_not_admin(self, mock_keystone):
         mock_keystone.return_value = fakes.FakeKeystoneClient()
@@ -82,7 +163,7 @@ class OSClientsTestCase(test.TestCase):
                 service_type="compute",
                 http_log_debug=False,
                 timeout=cfg.CONF.openstack_client_http_timeout,
-                insecure=False, cacert=None)
+                insecure=False, cacert=None, connection_pool=True)
             self.assertEqual(self.clients.cache["nova"], fake_nova)
 
     @mock.patch("rally.osclients.neutron")
@@ -181,3 +262,50 @@ class OSClientsTestCase(test.TestCase):
         }
         mock_ironic.Client.assert_called_once_with("1.0", **kw)
         self.assertEqual(self.clients.cache["ironic"], fake_ironic)
+
+    def test_token_expires_soon(self):
+        self.assertFalse(self.clients.token_expires_soon())
+        keystone = mock.MagicMock()
+        self.clients.cache["keystone"] = keystone
+        keystone.auth_ref.will_expire_soon.return_value = True
+        self.assertTrue(self.clients.token_expires_soon())
+        keystone.auth_ref.will_expire_soon.assert_called_once_with(
+            cfg.CONF.openstack_client_token_stale_duration)
+
+
+class ClientsCacheTestCase(test.TestCase):
+
+    def setUp(self):
+        super(ClientsCacheTestCase, self).setUp()
+        self.endpoint = endpoint.Endpoint("http://auth_url", "use", "pass",
+                                          "tenant")
+        osclients._CACHE["pid"] = None
+        self.addCleanup(osclients._CACHE.update, {"pid": None})
+
+    def test_cached_clients(self):
+        clients = osclients.cached_clients(self.endpoint)
+        self.assertIs(clients, osclients.cached_clients(
+            endpoint.Endpoint("http://auth_url", "use", "pass", "tenant")))
+        self.assertIsNot(clients, osclients.cached_clients(
+            endpoint.Endpoint("http://auth_url", "use2", "pass", "tenant")))
+
+    @mock.patch("rally.osclients.os.getpid")
+    def test_cached_clients_forked(self, mock_getpid):
+        mock_getpid.return_value = 1
+        clients = osclients.cached_clients(self.endpoint)
+        mock_getpid.return_value = 2
+        self.assertIsNot(clients, osclients.cached_clients(self.endpoint))
+
+    @mock.patch("rally.osclients.Clients.token_expires_soon")
+    def test_cached_clients_token_expired(self, mock_expires_soon):
+        mock_expires_soon.return_value = True
+        clients = osclients.cached_clients(self.endpoint)
+        self.assertIsNot(clients, osclients.cached_clients(self.endpoint))
+
+    def test_forget_clients(self):
+        other = endpoint.Endpoint("http://auth_url", "use2", "pass", "tenant")
+        clients = osclients.cached_clients(self.endpoint)
+        other_clients = osclients.cached_clients(other)
+        osclients.forget_clients([self.endpoint])
+        self.assertIsNot(clients, osclients.cached_clients(self.endpoint))
+        self.assertIs(other_clients, osclients.cached_clients(other))
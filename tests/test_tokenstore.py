@@ -0,0 +1,134 @@
+# Copyright 2014: Mirantis Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import os
+import shutil
+import stat
+import tempfile
+
+import mock
+
+from rally import exceptions
+from rally.objects import endpoint
+from rally import tokenstore
+from tests import test
+
+
+def _auth_ref(token, expires_in):
+    expires = datetime.datetime.utcnow() + datetime.timedelta(
+        seconds=expires_in)
+    return {"version": "v2.0",
+            "token": {"id": token,
+                      "expires": expires.strftime("%Y-%m-%dT%H:%M:%SZ")},
+            "user": {"roles": []},
+            "serviceCatalog": []}
+
+
+class TokenStoreTestCase(test.TestCase):
+
+    def setUp(self):
+        super(TokenStoreTestCase, self).setUp()
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.path = os.path.join(tmp, "tokens.sqlite")
+        self.store = tokenstore.TokenStore(self.path, stale_duration=60,
+                                           wait=0.3)
+
+    def test_endpoint_key(self):
+        key = tokenstore.endpoint_key(
+            endpoint.Endpoint("http://auth_url", "user", "pass", "tenant"))
+        self.assertEqual(key, tokenstore.endpoint_key(
+            endpoint.Endpoint("http://auth_url", "user", "pass", "tenant")))
+        self.assertNotEqual(key, tokenstore.endpoint_key(
+            endpoint.Endpoint("http://auth_url", "user", "pass2", "tenant")))
+        self.assertNotIn("pass", key)
+
+    def test_file_permissions(self):
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path).st_mode))
+
+    def test_directory_created(self):
+        path = os.path.join(os.path.dirname(self.path), "rally", "tokens")
+        tokenstore.TokenStore(path)
+        self.assertEqual(0o700, stat.S_IMODE(
+            os.stat(os.path.dirname(path)).st_mode))
+
+    def test_symlink_rejected(self):
+        path = os.path.join(os.path.dirname(self.path), "link")
+        os.symlink(self.path, path)
+        self.assertRaises(exceptions.InsecureTokenStore,
+                          tokenstore.TokenStore, path)
+
+    def test_accessible_by_others_rejected(self):
+        os.chmod(self.path, 0o644)
+        self.assertRaises(exceptions.InsecureTokenStore,
+                          tokenstore.TokenStore, self.path)
+
+    @mock.patch("rally.tokenstore.os.getuid", return_value=-1)
+    def test_owned_by_other_user_rejected(self, mock_getuid):
+        self.assertRaises(exceptions.InsecureTokenStore,
+                          tokenstore.TokenStore, self.path)
+
+    def test_get_put(self):
+        self.assertIsNone(self.store.get("key"))
+        self.store.put("key", _auth_ref("token", 3600))
+        auth_ref = self.store.get("key")
+        self.assertEqual("token", auth_ref.auth_token)
+        self.assertEqual({"hits": 1, "misses": 1}, self.store.stats())
+
+    def test_get_shared(self):
+        self.store.put("key", _auth_ref("token", 3600))
+        other = tokenstore.TokenStore(self.path)
+        self.assertEqual("token", other.get("key").auth_token)
+        self.assertEqual({"hits": 1, "misses": 0}, self.store.stats())
+
+    @mock.patch("rally.tokenstore.POLL_INTERVAL", 0.01)
+    def test_get_claimed(self):
+        self.assertIsNone(self.store.get("key"))
+        # Nobody puts the token, so the claim expires
+        self.assertIsNone(self.store.get("key"))
+        self.assertEqual({"hits": 0, "misses": 2}, self.store.stats())
+
+    def test_get_released(self):
+        self.assertIsNone(self.store.get("key"))
+        self.store.release("key")
+        self.assertIsNone(self.store.get("key"))
+
+    def test_get_stale(self):
+        self.store.put("key", _auth_ref("token", 30))
+        # The first process refreshes the token, the others use the old one
+        self.assertIsNone(self.store.get("key"))
+        self.assertEqual("token", self.store.get("key").auth_token)
+        self.store.put("key", _auth_ref("new_token", 3600))
+        self.assertEqual("new_token", self.store.get("key").auth_token)
+
+    def test_evict(self):
+        self.store.put("key", _auth_ref("token", 3600))
+        self.store.evict("key")
+        self.assertIsNone(self.store.get("key"))
+
+    def test_prune(self):
+        self.store.put("deleted", _auth_ref("token", 3600))
+        self.store.put("valid", _auth_ref("token", 3600))
+        self.store.put("expired", _auth_ref("token", -30))
+        self.assertIsNone(self.store.get("claimed"))
+        self.store.prune(["deleted"])
+        with self.store._connect() as conn:
+            keys = [row[0] for row in conn.execute("SELECT key FROM tokens")]
+        self.assertEqual(["claimed", "valid"], sorted(keys))
+
+    def test_get_expired(self):
+        self.store.put("key", _auth_ref("token", -30))
+        self.assertIsNone(self.store.get("key"))
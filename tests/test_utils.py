@@ -84,17 +84,36 @@ class StdIOCaptureTestCase(test.TestCase):
 
 class TimerTestCase(test.TestCase):
 
-    def test_timer_duration(self):
-        start_time = time.time()
-        end_time = time.time()
-
-        with mock.patch('rally.utils.time') as mock_time:
-            mock_time.time = mock.MagicMock(return_value=start_time)
-            with utils.Timer() as timer:
-                mock_time.time = mock.MagicMock(return_value=end_time)
+    @mock.patch("rally.utils.time.time")
+    @mock.patch("rally.utils.monotonic")
+    def test_timer_duration(self, mock_monotonic, mock_time):
+        mock_monotonic.side_effect = [10, 12.5]
+        mock_time.return_value = 1000
+        with utils.Timer() as timer:
+            pass
 
         self.assertIsNone(timer.error)
-        self.assertEqual(end_time - start_time, timer.duration())
+        self.assertEqual(2.5, timer.duration())
+        self.assertEqual(1000, timer.start)
+        self.assertEqual(1002.5, timer.finish)
+
+    def test_monotonic(self):
+        start = utils.monotonic()
+        time.sleep(0.01)
+        self.assertTrue(utils.monotonic() - start >= 0.01)
+
+    def test_thread_time(self):
+        start = utils.thread_time()
+        sum(xrange(100000))
+        self.assertTrue(utils.thread_time() > start)
+
+    def test_posix_clock(self):
+        if not sys.platform.startswith("linux"):
+            self.assertIsNone(utils._posix_clock(utils._CLOCK_MONOTONIC))
+            return
+        clock = utils._posix_clock(utils._CLOCK_MONOTONIC)
+        self.assertIsInstance(clock(), float)
+        self.assertIsNone(utils._posix_clock(-42))
 
     def test_timer_exception(self):
         try:
@@ -29,3 +29,4 @@ mkdir rally-plot
 rally task plot2html --out rally-plot/results.html
 gzip -9 rally-plot/results.html
 env
+rally task sla_check